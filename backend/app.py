@@ -1,58 +1,7 @@
-from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from flask_cors import CORS
-from flask_jwt_extended import JWTManager
-from config import Config
-
-
-db = SQLAlchemy()
-jwt = JWTManager()
-
-
-def create_app():
-    app = Flask(__name__)
-    app.config.from_object(Config)
-    
-    # 初始化扩展
-    db.init_app(app)
-    # 将db实例附加到app上，以便在应用上下文中访问
-    app.db = db
-    
-    CORS(app)  # 允许跨域请求
-    jwt.init_app(app)  # 初始化JWT
-    
-    # 注册蓝图
-    from routes.main import main_bp
-    from routes.cultural_resources import cultural_resources_bp
-    from routes.community import community_bp
-    from routes.auth import auth_bp
-    
-    app.register_blueprint(main_bp)
-    app.register_blueprint(cultural_resources_bp)
-    app.register_blueprint(community_bp)
-    app.register_blueprint(auth_bp)
-    
-    # 注册全局异常处理器
-    @app.errorhandler(Exception)
-    def handle_exception(e):
-        # 记录错误日志
-        app.logger.error(f"Unhandled exception: {str(e)}", exc_info=True)
-        
-        # 返回JSON格式的错误响应
-        import traceback
-        return {"error": "服务器内部错误", "details": str(e)}, 500
-    
-    # 注册shell上下文处理器
-    @app.shell_context_processor
-    def make_shell_context():
-        from models.user import User
-        from models.cultural_resource import CulturalResource
-        from models.community_post import CommunityPost
-        return {'db': db, 'User': User, 'CulturalResource': CulturalResource, 'CommunityPost': CommunityPost}
-    
-    return app
+from app import create_app
 
 
+# 应用工厂位于 app 包中（app/__init__.py），此文件仅作为开发环境的启动入口
 if __name__ == '__main__':
     app_instance = create_app()
-    app_instance.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app_instance.run(debug=True, host='0.0.0.0', port=5000)
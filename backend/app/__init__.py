@@ -3,31 +3,88 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from config import Config
+from services.db_routing import RoutingSession
 
 
-db = SQLAlchemy()
+# 使用读写分离会话：只读接口可从从库读取
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 jwt = JWTManager()
 
 
-def create_app():
+def create_app(config_class=Config):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_class)
     
     # 初始化扩展
     db.init_app(app)
+    # 将db实例附加到app上，以便在应用上下文中访问
+    app.db = db
+    
     CORS(app)  # 允许跨域请求
     jwt.init_app(app)  # 初始化JWT
     
+    # 初始化运行指标（请求耗时、连接池和缓存命中率）
+    from services.metrics import metrics
+    metrics.init_app(app)
+    
+    # 初始化按请求的SQL统计和 N+1 检测
+    from services.sql_instrumentation import sql_instrumentation
+    sql_instrumentation.init_app(app)
+    
+    # 初始化读写分离（配置了从库时生效）
+    from services.db_routing import replica_router
+    replica_router.init_app(app)
+    
+    # 初始化文化资源全文索引
+    from services.search import search_index
+    search_index.init_app(app)
+    
+    # 初始化帖子和文化资源的相似内容推荐
+    from services.recommender import recommender
+    recommender.init_app(app)
+    
+    # 初始化密码哈希进程池
+    from services.password_hasher import password_hasher
+    password_hasher.init_app(app)
+    
+    # 初始化当前用户身份缓存
+    from services.identity_cache import identity_cache
+    identity_cache.init_app(app)
+    
+    # 初始化列表接口响应缓存
+    from services.cache import response_cache
+    response_cache.init_app(app)
+    
+    # 初始化资源分面统计
+    from services.facets import facet_counts
+    facet_counts.init_app(app)
+    
+    # 初始化浏览量写缓冲
+    from services.view_counter import view_counter
+    view_counter.init_app(app)
+    
+    # 初始化热度分定时刷新任务
+    from services.hot_score import hot_score_refresher
+    hot_score_refresher.init_app(app)
+    
+    # 初始化已删除帖子的后台清理任务
+    from services.purge import post_purger
+    post_purger.init_app(app)
+    
     # 注册蓝图
     from routes.main import main_bp
     from routes.cultural_resources import cultural_resources_bp
     from routes.community import community_bp
     from routes.auth import auth_bp
+    from routes.export import export_bp
+    from routes.batch import batch_bp
     
     app.register_blueprint(main_bp)
     app.register_blueprint(cultural_resources_bp)
     app.register_blueprint(community_bp)
     app.register_blueprint(auth_bp)
+    app.register_blueprint(export_bp)
+    app.register_blueprint(batch_bp)
     
     # 注册全局异常处理器
     @app.errorhandler(Exception)
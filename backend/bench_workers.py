@@ -0,0 +1,201 @@
+"""
+同步工作进程与 gevent 工作进程的吞吐量对比
+
+分别用两种模式启动 Gunicorn，以不同并发数持续请求若干列表接口，输出吞吐量和延迟分位数。
+SQLite 的查询在本地完成，无法体现等待网络数据库的时间，可用 --db-latency 为每条 SQL
+增加固定的等待（模拟到 MySQL 的网络往返）；针对真实 MySQL 测试时设置 DATABASE_URL 并使用 --no-seed。
+
+用法：
+    python bench_workers.py                                  # 临时 SQLite 数据库
+    python bench_workers.py --db-latency 5 --concurrency 10 100 500
+    DATABASE_URL=mysql+pymysql://... python bench_workers.py --no-seed
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+# 压测的接口（关闭响应缓存，每个请求都访问数据库）
+PATHS = [
+    '/api/community/posts?cursor=',
+    '/api/community/posts?sortBy=popular&cursor=',
+    '/api/community/posts/1/comments',
+    '/api/resources/?cursor=',
+]
+
+
+def _latency_hook(app):
+    """为每条 SQL 增加 BENCH_DB_LATENCY_MS 毫秒等待，模拟数据库网络往返"""
+    latency = float(os.environ.get('BENCH_DB_LATENCY_MS') or 0) / 1000
+    if not latency:
+        return
+    from sqlalchemy import event
+
+    with app.app_context():
+        @event.listens_for(app.db.engine, 'before_cursor_execute')
+        def wait(conn, cursor, statement, parameters, context, executemany):
+            time.sleep(latency)  # gevent 模式下 time.sleep 已被替换为协程让出
+
+
+def load_app():
+    """供 Gunicorn 加载的应用（gunicorn bench_workers:load_app()）"""
+    from wsgi import app
+    _latency_hook(app)
+    return app
+
+
+def seed(posts=200, comments=20, resources=200):
+    from app import create_app, db
+    from models.user import User
+    from models.cultural_resource import CulturalResource
+    from models.community_post import CommunityPost, Comment
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        users = [User(username=f'bench{i}', email=f'bench{i}@example.com', password_hash='-') for i in range(20)]
+        db.session.add_all(users)
+        db.session.flush()
+        for i in range(posts):
+            db.session.add(CommunityPost(title=f'湖湘文化帖子{i}', content='湖湘文化源远流长' * 10,
+                                         author_id=users[i % 20].id, category='讨论', like_count=i % 50))
+        db.session.flush()
+        for i in range(comments):
+            db.session.add(Comment(content=f'评论{i}', author_id=users[i % 20].id, post_id=1))
+        for i in range(resources):
+            db.session.add(CulturalResource(title=f'岳麓书院{i}', description='书院文化', content='千年学府',
+                                            type='history', category='history', tags='湖湘,书院', priority=i % 5))
+        db.session.commit()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(mode, port, workers, env):
+    command = [sys.executable, '-m', 'gunicorn', '-b', f'127.0.0.1:{port}', '-w', str(workers),
+               '--log-level', 'warning']
+    if mode == 'gevent':
+        command += ['-c', 'gunicorn_gevent.conf.py']
+    command.append('bench_workers:load_app()')
+    process = subprocess.Popen(command, env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/health')
+            conn.getresponse().read()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'{mode} 模式的 Gunicorn 未能启动')
+
+
+def run_load(port, concurrency, duration):
+    """以 concurrency 个保持连接的客户端持续请求 duration 秒"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+
+    def client(index):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        local, failed, i = [], 0, index
+        while time.time() < stop_at:
+            path = PATHS[i % len(PATHS)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    failed += 1
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                continue
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    started = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - started
+
+    latencies.sort()
+
+    def percentile(p):
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 1) if latencies else None
+
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': percentile(0.50),
+        'p99_ms': percentile(0.99),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 1) if latencies else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='对比同步与 gevent 工作进程的吞吐量')
+    parser.add_argument('--workers', type=int, default=4, help='Gunicorn 工作进程数（两种模式相同）')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 100, 500], help='并发客户端数')
+    parser.add_argument('--duration', type=float, default=10, help='每轮压测秒数')
+    parser.add_argument('--db-latency', type=float, default=0, help='为每条SQL增加的等待毫秒数')
+    parser.add_argument('--modes', nargs='+', default=['sync', 'gevent'], choices=['sync', 'gevent'])
+    parser.add_argument('--no-seed', action='store_true', help='使用 DATABASE_URL 中已有的数据')
+    parser.add_argument('--json', help='将结果写入该JSON文件')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_workers_')
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(workdir, 'bench.db'))
+    env.setdefault('SEARCH_INDEX_PATH', os.path.join(workdir, 'search_index.pkl'))
+    env['RESPONSE_CACHE_BACKEND'] = 'none'
+    env['BENCH_DB_LATENCY_MS'] = str(args.db_latency)
+    if not args.no_seed:
+        os.environ.update(env)
+        seed()
+
+    results = []
+    for mode in args.modes:
+        port = free_port()
+        process = start_server(mode, port, args.workers, env)
+        try:
+            for concurrency in args.concurrency:
+                result = dict(run_load(port, concurrency, args.duration), mode=mode)
+                results.append(result)
+                print(f"{mode:<7}并发 {concurrency:>5}  {result['rps']:>8} req/s  "
+                      f"p50 {result['p50_ms']} ms  p99 {result['p99_ms']} ms  错误 {result['errors']}")
+        finally:
+            process.terminate()
+            process.wait()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'workers': args.workers, 'db_latency_ms': args.db_latency, 'results': results},
+                      f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,8 @@
+"""
+性能基准测试
+
+    python -m benchmark generate --scale small   # 生成确定性的测试数据集
+    python -m benchmark run --output results.json  # 压测全部接口并输出 JSON 结果
+
+详见 README 中的“性能基准测试”一节。
+"""
@@ -0,0 +1,122 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+
+def _create_app():
+    from app import create_app
+    return create_app()
+
+
+def generate(args):
+    from sqlalchemy import func, select
+    from app import db
+    from benchmark.data import DatasetGenerator
+    from models.user import User
+    from services.recommender import recommender
+    from services.search import search_index
+
+    app = _create_app()
+    with app.app_context():
+        if args.drop:
+            print('正在删除已有数据表...')
+            db.drop_all()
+        db.create_all()
+        if db.session.execute(select(func.count(User.id))).scalar():
+            print('数据库中已有数据，请使用空数据库或加上 --drop 参数')
+            return 1
+        DatasetGenerator(db, scale=args.scale, seed=args.seed, batch_size=args.batch_size).generate()
+        print('正在重建全文索引...')
+        search_index.rebuild()
+        print('正在构建相似内容推荐索引...')
+        recommender.rebuild(db.session)
+    print('数据集生成完成')
+    return 0
+
+
+def run(args):
+    from benchmark.runner import run_benchmark
+
+    if not args.cache:
+        # 默认关闭响应缓存，测量的是接口本身的开销
+        os.environ['RESPONSE_CACHE_BACKEND'] = 'none'
+    avatar_dir = None
+    if not args.url:
+        # 进程内压测上传的头像写入临时目录，不写入源码目录下的 public/static/avatars
+        avatar_dir = tempfile.mkdtemp(prefix='benchmark_avatars_')
+        os.environ['AVATAR_UPLOAD_PATH'] = avatar_dir
+    app = _create_app()
+    try:
+        result = run_benchmark(app, requests=args.requests, warmup=args.warmup, concurrency=args.concurrency,
+                               seed=args.seed, url=args.url, only=args.only)
+        with app.app_context():
+            # 写回缓冲中的浏览量，避免影响下一次运行
+            from services.view_counter import view_counter
+            view_counter.flush()
+    finally:
+        if avatar_dir:
+            shutil.rmtree(avatar_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f'结果已写入 {args.output}')
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            return compare(json.load(f), result, args.threshold)
+    return 0
+
+
+def compare(baseline, current, threshold):
+    """与基线结果比较，p95 延迟变慢超过 threshold 倍或SQL条数增加时以非零状态退出"""
+    regressions = 0
+    for name, now in current['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(name)
+        if not before or not before.get('p95_ms') or not now.get('p95_ms'):
+            continue
+        ratio = now['p95_ms'] / before['p95_ms']
+        more_queries = (now.get('queries_per_request') or 0) > (before.get('queries_per_request') or 0) + 0.5
+        flag = ''
+        if ratio > threshold or more_queries:
+            regressions += 1
+            flag = '  <-- 退化'
+        print(f"{name:<24} p95 {before['p95_ms']:>9} -> {now['p95_ms']:>9} ms ({ratio:.2f}x)  "
+              f"SQL {before.get('queries_per_request')} -> {now.get('queries_per_request')}{flag}")
+    print(f'共 {regressions} 个接口退化')
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmark', description='湖湘文化平台后端性能基准测试')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    parser_generate = subparsers.add_parser('generate', help='生成确定性的测试数据集')
+    parser_generate.add_argument('--scale', default='small', choices=['tiny', 'small', 'medium', 'full'],
+                                 help='数据规模，full 为10万用户、100万帖子、1000万评论和点赞、50万资源')
+    parser_generate.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser_generate.add_argument('--batch-size', type=int, default=5000, help='每个事务写入的行数')
+    parser_generate.add_argument('--drop', action='store_true', help='先删除已有的数据表')
+    parser_generate.set_defaults(func=generate)
+
+    parser_run = subparsers.add_parser('run', help='压测全部接口')
+    parser_run.add_argument('--requests', type=int, default=200, help='每个接口的请求数')
+    parser_run.add_argument('--warmup', type=int, default=20, help='每个接口预热的请求数（不计入结果）')
+    parser_run.add_argument('--concurrency', type=int, default=1, help='并发线程数')
+    parser_run.add_argument('--seed', type=int, default=42, help='随机种子，决定请求的参数')
+    parser_run.add_argument('--url', help='压测正在运行的服务（如 http://127.0.0.1:5000），不指定时在进程内调用')
+    parser_run.add_argument('--only', nargs='+', help='只压测名称以这些前缀开头的接口，如 posts resources.search')
+    parser_run.add_argument('--cache', action='store_true', help='保留响应缓存（默认关闭）')
+    parser_run.add_argument('--output', help='将结果写入该JSON文件')
+    parser_run.add_argument('--compare', help='与该基线结果文件比较')
+    parser_run.add_argument('--threshold', type=float, default=1.5, help='p95 延迟超过基线的倍数视为退化')
+    parser_run.set_defaults(func=run)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
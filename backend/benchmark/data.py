@@ -0,0 +1,290 @@
+"""
+确定性的大规模测试数据生成
+
+相同的 scale 和 seed 总是生成完全相同的数据（主键、文本、时间、点赞关系都一致），
+不同版本之间的压测结果因此可以直接比较。数据通过 Core 的 executemany 分批写入，
+每批一个事务，内存占用与数据规模无关（帖子级别的计数数组除外）。
+"""
+import bisect
+import itertools
+import random
+import time
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from werkzeug.security import generate_password_hash
+
+
+# 数据规模：用户、帖子、评论、点赞、文化资源
+SCALES = {
+    'tiny': {'users': 200, 'posts': 2000, 'comments': 20000, 'likes': 20000, 'resources': 1000},
+    'small': {'users': 2000, 'posts': 20000, 'comments': 200000, 'likes': 200000, 'resources': 10000},
+    'medium': {'users': 20000, 'posts': 200000, 'comments': 2000000, 'likes': 2000000, 'resources': 100000},
+    'full': {'users': 100000, 'posts': 1000000, 'comments': 10000000, 'likes': 10000000, 'resources': 500000},
+}
+
+# 所有生成用户的密码，压测登录接口时使用
+BENCHMARK_PASSWORD = 'benchmark'
+
+# 数据时间范围的终点固定，保证热度分等派生值可复现
+END_TIME = datetime(2025, 1, 1)
+TIME_SPAN = timedelta(days=365)
+
+# 生成文本用的词库
+PLACES = ['长沙', '岳阳', '衡阳', '湘潭', '常德', '张家界', '凤凰古城', '岳麓山', '橘子洲', '洞庭湖', '韶山', '南岳衡山',
+          '湘江', '浏阳', '株洲', '郴州', '永州', '怀化', '邵阳', '益阳', '娄底', '湘西']
+SUBJECTS = ['岳麓书院', '湘绣', '湘剧', '花鼓戏', '湘菜', '马王堆汉墓', '浏阳花炮', '醴陵瓷器', '苗族银饰', '土家织锦',
+            '女书', '侗族大歌', '湘西赶尸传说', '屈原', '曾国藩', '王夫之', '周敦颐', '毛泽东故居', '天心阁', '岳阳楼',
+            '臭豆腐', '剁椒鱼头', '擂茶', '滩头年画', '长沙窑', '湘楚文化', '梅山文化', '辰河高腔', '湘江号子', '傩戏']
+VERBS = ['探访', '品味', '走进', '解读', '重温', '传承', '记录', '寻找', '感受', '守护']
+ADJECTIVES = ['源远流长的', '独具特色的', '鲜为人知的', '历久弥新的', '充满烟火气的', '古色古香的', '气势恢宏的', '精巧细腻的']
+SENTENCES = [
+    '{place}的{subject}承载着湖湘儿女的集体记忆。',
+    '第一次{verb}{subject}，才真正理解了“心忧天下，敢为人先”的湖湘精神。',
+    '{subject}的技艺代代相传，如今在{place}仍能见到老师傅的身影。',
+    '有人说不了解{subject}，就不算真正到过{place}。',
+    '这次去{place}{verb}了{adjective}{subject}，收获很多。',
+    '关于{subject}的起源，史料记载与民间传说并不完全一致。',
+    '{adjective}{subject}正在通过短视频被更多年轻人看见。',
+    '建议大家{verb}{subject}之前先读一读相关的地方志。',
+]
+POST_CATEGORIES = ['讨论', '提问', '分享', '活动', '攻略']
+RESOURCE_TYPES = ['history', 'art', 'literature', 'folk', 'food', 'architecture']
+RESOURCE_CATEGORIES = ['历史人物', '传统技艺', '民间文学', '民俗节庆', '饮食文化', '古建筑', '非物质文化遗产', '红色文化']
+# 标签按 Zipf 分布抽取：少数热门标签覆盖大部分资源
+TAGS = ['湖湘', '湖南', '文化', '历史', '非遗', '书院', '美食', '民俗', '艺术', '建筑', '名人', '戏曲', '手工艺', '红色',
+        '旅游', '古镇', '诗词', '节庆', '少数民族', '考古'] + [f'{subject}' for subject in SUBJECTS]
+
+
+class ZipfSampler:
+    """按 Zipf 分布（权重 1/rank^s）抽取下标，rank 从1开始"""
+
+    def __init__(self, n, s=1.1):
+        weights = [1 / (rank ** s) for rank in range(1, n + 1)]
+        self._cumulative = list(itertools.accumulate(weights))
+        self._total = self._cumulative[-1]
+
+    def sample(self, rng):
+        return bisect.bisect_left(self._cumulative, rng.random() * self._total)
+
+
+def _sentence(rng):
+    return rng.choice(SENTENCES).format(place=rng.choice(PLACES), subject=rng.choice(SUBJECTS),
+                                        verb=rng.choice(VERBS), adjective=rng.choice(ADJECTIVES))
+
+
+def _paragraph(rng, sentences):
+    return ''.join(_sentence(rng) for _ in range(sentences))
+
+
+def _title(rng):
+    return f'{rng.choice(VERBS)}{rng.choice(PLACES)}：{rng.choice(ADJECTIVES)}{rng.choice(SUBJECTS)}'
+
+
+def _timestamp(rng, index, total):
+    """按 id 递增分布在一年内的时间，并加入少量抖动"""
+    offset = TIME_SPAN * (index / max(total, 1)) + timedelta(seconds=rng.randint(0, 3600))
+    return END_TIME - TIME_SPAN + offset
+
+
+def _allocate(total, buckets, rng, cap=None):
+    """把 total 个对象按重尾分布分配到 buckets 个桶中（随机排列的 Zipf 权重），返回每个桶的数量"""
+    ranks = list(range(1, buckets + 1))
+    rng.shuffle(ranks)
+    weights = [1 / (rank ** 0.9) for rank in ranks]
+    scale = total / sum(weights)
+    counts = [int(w * scale) for w in weights]
+    if cap is not None:
+        counts = [min(c, cap) for c in counts]
+    # 把取整和截断丢失的数量补给随机的桶
+    remaining = total - sum(counts)
+    while remaining > 0:
+        i = rng.randrange(buckets)
+        if cap is None or counts[i] < cap:
+            counts[i] += 1
+            remaining -= 1
+    return counts
+
+
+class DatasetGenerator:
+    """生成并写入压测数据集"""
+
+    def __init__(self, db, scale='small', seed=42, batch_size=5000, log=print):
+        if scale not in SCALES:
+            raise ValueError(f'未知的数据规模: {scale}')
+        self.db = db
+        self.scale = scale
+        self.sizes = dict(SCALES[scale])
+        self.seed = seed
+        self.batch_size = batch_size
+        self.log = log
+
+    def _rng(self, name):
+        # 每类数据使用独立的随机数序列，调整某一类的生成逻辑不会影响其他类
+        return random.Random(f'{self.seed}:{name}')
+
+    def _insert(self, table_name, rows):
+        """分批写入，每批一个事务，返回写入行数"""
+        table = self.db.metadata.tables[table_name]
+        total, started = 0, time.time()
+        for batch in iter(lambda: list(itertools.islice(rows, self.batch_size)), []):
+            with self.db.engine.begin() as conn:
+                conn.execute(table.insert(), batch)
+            total += len(batch)
+            if total % (self.batch_size * 20) == 0:
+                self.log(f'  {table_name}: {total} 行（{total / (time.time() - started):.0f} 行/秒）')
+        self.log(f'  {table_name}: 共 {total} 行，用时 {time.time() - started:.1f} 秒')
+        return total
+
+    def generate(self):
+        from models.community_post import compute_hot_score
+        from services.password_hasher import password_hasher
+
+        sizes = self.sizes
+        self.log(f"正在生成 {self.scale} 规模数据集（seed={self.seed}）：{sizes}")
+        self.db.create_all()
+
+        # 所有用户共用同一个密码哈希，按当前配置的方法计算一次（登录时不会触发重新哈希）
+        password_hash = generate_password_hash(BENCHMARK_PASSWORD, method=password_hasher.method)
+        rng = self._rng('users')
+
+        def users():
+            for i in range(1, sizes['users'] + 1):
+                yield {
+                    'id': i,
+                    'username': f'user{i:06d}',
+                    'email': f'user{i:06d}@example.com',
+                    'password_hash': password_hash,
+                    'avatar': None,
+                    'bio': _sentence(rng) if rng.random() < 0.3 else None,
+                    'role': 'admin' if i == 1 else 'user',
+                    'is_active': True,
+                    'created_at': _timestamp(rng, i, sizes['users']),
+                    'updated_at': END_TIME,
+                }
+        self._insert('users', users())
+
+        # 先确定每个帖子的评论数、评论的回复结构和点赞数，帖子行中的计数与关联数据保持一致
+        comment_counts = _allocate(sizes['comments'], sizes['posts'], self._rng('comment-counts'))
+        like_counts = _allocate(sizes['likes'], sizes['posts'], self._rng('like-counts'), cap=sizes['users'])
+
+        user_sampler = ZipfSampler(sizes['users'])
+        category_sampler = ZipfSampler(len(POST_CATEGORIES))
+        post_times = self._rng('post-times')
+        post_created = [_timestamp(post_times, i, sizes['posts']) for i in range(1, sizes['posts'] + 1)]
+        rng = self._rng('posts')
+
+        def posts():
+            for i in range(1, sizes['posts'] + 1):
+                created_at = post_created[i - 1]
+                view_count = like_counts[i - 1] * rng.randint(5, 20) + rng.randint(0, 50)
+                yield {
+                    'id': i,
+                    'title': _title(rng),
+                    'content': _paragraph(rng, rng.randint(2, 12)),
+                    'author_id': user_sampler.sample(rng) + 1,
+                    'category': POST_CATEGORIES[category_sampler.sample(rng)],
+                    'status': 'published' if rng.random() < 0.98 else 'hidden',
+                    'view_count': view_count,
+                    'like_count': like_counts[i - 1],
+                    'comment_count': comment_counts[i - 1],
+                    'hot_score': compute_hot_score(like_counts[i - 1], comment_counts[i - 1], view_count, created_at),
+                    'created_at': created_at,
+                    'updated_at': created_at,
+                }
+        self._insert('community_posts', posts())
+
+        rng = self._rng('comments')
+
+        def comments():
+            comment_id = 0
+            for post_index, count in enumerate(comment_counts):
+                first_id = comment_id + 1
+                created_at = post_created[post_index]
+                parents = self._comment_parents(post_index, count)
+                reply_counts = Counter(parent for parent in parents if parent is not None)
+                for index, parent in enumerate(parents):
+                    comment_id += 1
+                    created_at += timedelta(seconds=rng.randint(1, 3600))
+                    yield {
+                        'id': comment_id,
+                        'content': _paragraph(rng, rng.randint(1, 3)),
+                        'author_id': user_sampler.sample(rng) + 1,
+                        'post_id': post_index + 1,
+                        'parent_id': None if parent is None else first_id + parent,
+                        'reply_count': reply_counts[index],
+                        'created_at': created_at,
+                        'updated_at': created_at,
+                    }
+        self._insert('comments', comments())
+
+        rng = self._rng('likes')
+
+        def likes():
+            for post_index, count in enumerate(like_counts):
+                for user_id in sorted(rng.sample(range(1, sizes['users'] + 1), count)):
+                    yield {'user_id': user_id, 'post_id': post_index + 1}
+        self._insert('user_post_likes', likes())
+
+        rng = self._rng('resources')
+        tag_sampler = ZipfSampler(len(TAGS))
+        # 资源与标签的关联（资源id, 标签下标），用紧凑数组保存
+        tagged_resources, tag_indexes = array('I'), array('I')
+
+        def resources():
+            for i in range(1, sizes['resources'] + 1):
+                tags = []
+                for _ in range(rng.randint(1, 5)):
+                    tag_index = tag_sampler.sample(rng)
+                    if TAGS[tag_index] not in tags:
+                        tags.append(TAGS[tag_index])
+                        tagged_resources.append(i)
+                        tag_indexes.append(tag_index)
+                created_at = _timestamp(rng, i, sizes['resources'])
+                yield {
+                    'id': i,
+                    'title': _title(rng),
+                    'description': _paragraph(rng, 2),
+                    'content': _paragraph(rng, rng.randint(5, 30)),
+                    'type': rng.choice(RESOURCE_TYPES),
+                    'category': rng.choice(RESOURCE_CATEGORIES),
+                    'tags': ','.join(tags),
+                    'author': f'作者{rng.randint(1, 500)}',
+                    'source': rng.choice(['湖南省博物馆', '湖南图书馆', '地方志', '田野调查', None]),
+                    'status': 'published' if rng.random() < 0.95 else 'draft',
+                    'priority': min(int(rng.expovariate(1.0)), 9),
+                    'view_count': int(rng.paretovariate(1.2) * 10),
+                    'like_count': int(rng.paretovariate(1.5) * 2),
+                    'created_at': created_at,
+                    'updated_at': created_at,
+                }
+        self._insert('cultural_resources', resources())
+        self._insert('tags', ({'id': i + 1, 'name': name} for i, name in enumerate(TAGS)))
+        self._insert('cultural_resource_tags', (
+            {'resource_id': resource_id, 'tag_id': tag_index + 1}
+            for resource_id, tag_index in zip(tagged_resources, tag_indexes)
+        ))
+
+        self._reset_sequences()
+        return sizes
+
+    def _comment_parents(self, post_index, count):
+        """
+        帖子下第 n 条评论回复的是同一帖子中的第几条评论（None 表示顶级评论）
+
+        每个帖子使用独立的随机数序列，生成结果与其他帖子的评论数无关。
+        """
+        rng = random.Random(f'{self.seed}:comment-parents:{post_index}')
+        # 约30%的评论回复同一帖子下更早的评论
+        return [rng.randrange(n) if n and rng.random() < 0.3 else None for n in range(count)]
+
+    def _reset_sequences(self):
+        """显式写入主键后，PostgreSQL 需要同步序列；SQLite 和 MySQL 会自动继续编号"""
+        if self.db.engine.dialect.name != 'postgresql':
+            return
+        with self.db.engine.begin() as conn:
+            for table in ('users', 'community_posts', 'comments', 'cultural_resources', 'tags'):
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"
+                ))
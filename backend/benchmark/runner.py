@@ -0,0 +1,281 @@
+"""
+接口压测
+
+依次压测各蓝图的全部接口，统计每个接口的延迟分位数（p50/p95/p99）、吞吐量和每个请求执行的SQL条数。
+默认在进程内通过 Flask 测试客户端调用（可统计SQL条数）；指定 --url 时通过 HTTP 压测正在运行的服务。
+"""
+import http.client
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import quote, urlsplit
+from benchmark.data import BENCHMARK_PASSWORD
+
+
+# 1x1 像素的 PNG，用于压测头像上传
+_PNG = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000100e221bc330000000049454e44ae426082'
+)
+
+
+def _post_id(ctx, rng):
+    return rng.randint(1, ctx['max_post_id'])
+
+
+def _resource_id(ctx, rng):
+    return rng.randint(1, ctx['max_resource_id'])
+
+
+def _post_detail_batch(post_id):
+    # 帖子详情页的批量请求：详情和相关帖子
+    return {'requests': [f'/api/community/posts/{post_id}', f'/api/community/posts/related/{post_id}?limit=2']}
+
+
+# 压测场景：(名称, 方法, 路径或生成路径的函数, 是否需要登录, 请求体或生成请求体的函数)
+# 删除类接口放在最后，并且每次删除不同的数据
+ENDPOINTS = [
+    ('index', 'GET', '/', False, None),
+    ('health', 'GET', '/health', False, None),
+    ('auth.login', 'POST', '/api/auth/login', False,
+     lambda ctx, rng: {'username': f"user{rng.randint(2, ctx['max_user_id']):06d}", 'password': BENCHMARK_PASSWORD}),
+    ('auth.register', 'POST', '/api/auth/register', False,
+     lambda ctx, rng: {'username': f'bench_{ctx["run_id"]}_{rng.getrandbits(40)}',
+                       'email': f'bench_{ctx["run_id"]}_{rng.getrandbits(40)}@example.com', 'password': 'benchmark'}),
+    ('auth.profile', 'GET', '/api/auth/profile', True, None),
+    ('auth.update_profile', 'PUT', '/api/auth/profile', True, lambda ctx, rng: {'bio': f'压测简介{rng.randint(1, 1000)}'}),
+    ('auth.upload_avatar', 'POST', '/api/auth/upload-avatar', True, 'avatar'),
+    ('auth.logout', 'POST', '/api/auth/logout', True, None),
+    ('posts.list', 'GET', '/api/community/posts', False, None),
+    ('posts.list_category', 'GET', '/api/community/posts?category=讨论', False, None),
+    ('posts.list_popular', 'GET', '/api/community/posts?sortBy=popular', False, None),
+    ('posts.list_comments', 'GET', '/api/community/posts?sortBy=comments', False, None),
+    ('posts.list_deep_page', 'GET', lambda ctx, rng: f'/api/community/posts?page={rng.randint(50, 500)}', False, None),
+    ('posts.list_cursor', 'GET', '/api/community/posts?cursor=', False, None),
+    ('posts.detail', 'GET', lambda ctx, rng: f'/api/community/posts/{_post_id(ctx, rng)}', True, None),
+    ('posts.comments', 'GET', lambda ctx, rng: f'/api/community/posts/{_post_id(ctx, rng)}/comments', False, None),
+    ('posts.related', 'GET', lambda ctx, rng: f'/api/community/posts/related/{_post_id(ctx, rng)}', False, None),
+    ('batch.post_detail', 'POST', '/api/batch', True, lambda ctx, rng: _post_detail_batch(_post_id(ctx, rng))),
+    ('posts.create', 'POST', '/api/community/posts', True,
+     lambda ctx, rng: {'title': '压测帖子', 'content': '湖湘文化' * rng.randint(1, 50), 'category': '讨论'}),
+    ('posts.update', 'PUT', lambda ctx, rng: f'/api/community/posts/{_post_id(ctx, rng)}', True,
+     lambda ctx, rng: {'title': f'压测标题{rng.randint(1, 1000)}'}),
+    ('posts.like', 'POST', lambda ctx, rng: f'/api/community/posts/{_post_id(ctx, rng)}/like', True, None),
+    ('posts.add_comment', 'POST', lambda ctx, rng: f'/api/community/posts/{_post_id(ctx, rng)}/comments', True,
+     lambda ctx, rng: {'content': '压测评论'}),
+    ('resources.list', 'GET', '/api/resources/', False, None),
+    ('resources.list_category', 'GET', '/api/resources/?category=传统技艺', False, None),
+    ('resources.list_cursor', 'GET', '/api/resources/?cursor=', False, None),
+    ('resources.search', 'GET', lambda ctx, rng: '/api/resources/?search=' + rng.choice(['湖湘', '岳麓书院', '湘绣', '花鼓戏', '长沙']),
+     False, None),
+    ('resources.tag', 'GET', lambda ctx, rng: '/api/resources/?tag=' + rng.choice(['湖湘', '非遗', '书院', '湖湘,文化']),
+     False, None),
+    ('resources.facets', 'GET', '/api/resources/facets', False, None),
+    ('resources.facets_scoped', 'GET', lambda ctx, rng: '/api/resources/facets?tag=' + rng.choice(['湖湘', '非遗', '书院']),
+     False, None),
+    ('resources.detail', 'GET', lambda ctx, rng: f'/api/resources/{_resource_id(ctx, rng)}', False, None),
+    ('resources.related', 'GET', lambda ctx, rng: f'/api/resources/{_resource_id(ctx, rng)}/related', False, None),
+    ('resources.like', 'POST', lambda ctx, rng: f'/api/resources/{_resource_id(ctx, rng)}/like', True, None),
+    ('resources.create', 'POST', '/api/resources/', True,
+     lambda ctx, rng: {'title': '压测资源', 'content': '湖湘文化', 'type': 'history', 'category': '传统技艺', 'tags': ['湖湘']}),
+    ('comments.delete', 'DELETE', lambda ctx, rng: f"/api/community/comments/{ctx['deletable_comments'].pop()}", True, None),
+    ('posts.delete', 'DELETE', lambda ctx, rng: f"/api/community/posts/{ctx['deletable_posts'].pop()}", True, None),
+]
+
+
+def _percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(p * len(sorted_values))) - 1))
+    return round(sorted_values[index] * 1000, 3)
+
+
+def summarize(latencies, statuses, queries, elapsed):
+    latencies = sorted(latencies)
+    errors = sum(1 for status in statuses if status >= 500 or status == 0)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'status_codes': {str(code): statuses.count(code) for code in sorted(set(statuses))},
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else None,
+        'p50_ms': _percentile(latencies, 0.50),
+        'p95_ms': _percentile(latencies, 0.95),
+        'p99_ms': _percentile(latencies, 0.99),
+        'max_ms': round(latencies[-1] * 1000, 3) if latencies else None,
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+        'max_queries': max(queries) if queries else None,
+    }
+
+
+class _TestClientTransport:
+    """进程内调用，通过 SQL 统计（services.sql_instrumentation）记录每个请求执行的SQL条数"""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, headers, body):
+        from services.sql_instrumentation import sql_instrumentation
+
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        with sql_instrumentation.capture() as stats:
+            if body == 'avatar':
+                response = client.open(path, method=method, headers=headers,
+                                       data={'avatar': (io.BytesIO(_PNG), 'avatar.png')},
+                                       content_type='multipart/form-data')
+            else:
+                response = client.open(path, method=method, headers=headers, json=body)
+            response.get_data()
+        return response.status_code, stats.count
+
+
+class _HTTPTransport:
+    """通过 HTTP 压测正在运行的服务（每个线程一个保持连接），无法统计SQL条数"""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self._local = threading.local()
+
+    def request(self, method, path, headers, body):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        headers = dict(headers)
+        if body == 'avatar':
+            boundary = 'benchmarkboundary'
+            payload = (f'--{boundary}\r\nContent-Disposition: form-data; name="avatar"; filename="avatar.png"\r\n'
+                       f'Content-Type: image/png\r\n\r\n').encode() + _PNG + f'\r\n--{boundary}--\r\n'.encode()
+            headers['Content-Type'] = f'multipart/form-data; boundary={boundary}'
+        elif body is not None:
+            payload = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        else:
+            payload = None
+        try:
+            conn.request(method, quote(path, safe='/?=&%'), body=payload, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            return response.status, None
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self._local.conn = None
+            return 0, None
+
+
+def _dataset_context(app, seed):
+    """读取数据集的主键范围，并准备每次删除用的不同数据"""
+    from sqlalchemy import func, select
+    from models.user import User
+    from models.cultural_resource import CulturalResource
+    from models.community_post import CommunityPost, Comment
+
+    with app.app_context():
+        session = app.db.session
+        ctx = {
+            'max_user_id': session.execute(select(func.max(User.id))).scalar() or 1,
+            'max_post_id': session.execute(select(func.max(CommunityPost.id))).scalar() or 1,
+            'max_resource_id': session.execute(select(func.max(CulturalResource.id))).scalar() or 1,
+            'max_comment_id': session.execute(select(func.max(Comment.id))).scalar() or 1,
+        }
+    rng = random.Random(f'{seed}:deletes')
+    ctx['deletable_posts'] = rng.sample(range(1, ctx['max_post_id'] + 1), min(ctx['max_post_id'], 10000))
+    ctx['deletable_comments'] = rng.sample(range(1, ctx['max_comment_id'] + 1), min(ctx['max_comment_id'], 10000))
+    ctx['run_id'] = datetime.utcnow().strftime('%Y%m%d%H%M%S')
+    return ctx
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(app, requests=200, warmup=20, concurrency=1, seed=42, url=None, only=None, log=print):
+    """压测全部接口，返回可序列化为 JSON 的结果"""
+    from flask_jwt_extended import create_access_token
+
+    ctx = _dataset_context(app, seed)
+    with app.app_context():
+        # 以管理员（用户1）身份调用需要登录的接口
+        token = create_access_token(identity=1)
+        dialect = app.db.engine.dialect.name
+    transport = _HTTPTransport(url) if url else _TestClientTransport(app)
+
+    results = {}
+    for name, method, path, auth, body in ENDPOINTS:
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        rng = random.Random(f'{seed}:{name}')
+        lock = threading.Lock()
+        headers = {'Authorization': f'Bearer {token}'} if auth else {}
+        # 请求参数在主线程中预先生成，保证与并发数无关、结果可复现
+        calls = []
+        for _ in range(warmup + requests):
+            try:
+                calls.append((path(ctx, rng) if callable(path) else path,
+                              body(ctx, rng) if callable(body) else body))
+            except IndexError:  # 可删除的数据已用完
+                break
+        if not calls:
+            continue
+
+        for call_path, call_body in calls[:warmup]:
+            transport.request(method, call_path, headers, call_body)
+
+        latencies, statuses, queries = [], [], []
+
+        def execute(call):
+            started = time.perf_counter()
+            status, count = transport.request(method, call[0], headers, call[1])
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                statuses.append(status)
+                if count is not None:
+                    queries.append(count)
+
+        started = time.perf_counter()
+        if concurrency > 1:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(execute, calls[warmup:]))
+        else:
+            for call in calls[warmup:]:
+                execute(call)
+        elapsed = time.perf_counter() - started
+
+        results[name] = dict(summarize(latencies, statuses, queries, elapsed), method=method)
+        summary = results[name]
+        log(f"{name:<24} {summary['throughput_rps']:>9} req/s  p50 {summary['p50_ms']:>9} ms  "
+            f"p95 {summary['p95_ms']:>9} ms  p99 {summary['p99_ms']:>9} ms  SQL {summary['queries_per_request']}"
+            + (f"  错误 {summary['errors']}" if summary['errors'] else ''))
+
+    return {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'git_revision': _git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'database': dialect,
+            'transport': 'http' if url else 'test_client',
+            'url': url,
+            'requests_per_endpoint': requests,
+            'warmup': warmup,
+            'concurrency': concurrency,
+            'seed': seed,
+            'dataset': {key: ctx[key] for key in ('max_user_id', 'max_post_id', 'max_comment_id', 'max_resource_id')},
+        },
+        'endpoints': results,
+    }
@@ -0,0 +1,22 @@
+"""
+查询计划回归检查（tests/test_query_plans.py 的命令行入口）
+
+检查本身是 pytest 测试，随 `python -m pytest tests` 一起运行；本脚本只运行这一组测试，额外参数原样传给 pytest。
+
+用法：
+    python check_query_plans.py                 # 使用临时 SQLite 数据库
+    python check_query_plans.py -x -k popular
+    TEST_DATABASE_URL=mysql+pymysql://... python check_query_plans.py   # 使用一个空的 MySQL 数据库
+"""
+import os
+import sys
+import pytest
+
+
+def main():
+    tests = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tests', 'test_query_plans.py')
+    return pytest.main(['-q', tests, *sys.argv[1:]])
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+数据导出脚本
+
+与 GET /api/export/<name> 相同，以服务端游标逐行读取并输出 NDJSON，内存占用与表大小无关。
+
+用法：
+    python export_data.py resources > resources.ndjson
+    python export_data.py resources posts comments --output-dir dumps --gzip
+    python export_data.py posts --updated-since 2024-06-01T00:00:00 --output posts.ndjson
+"""
+import argparse
+import os
+import sys
+import time
+from app import create_app, db
+from services.export import EXPORT_MODELS, export_rows, gzip_chunks, ndjson_lines, parse_updated_since
+
+
+def export_to(stream, name, updated_since=None, compress=False):
+    """将一张表写入二进制流，返回导出的行数"""
+    count = 0
+
+    def counted(rows):
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    chunks = ndjson_lines(counted(export_rows(db.session, name, updated_since)))
+    if compress:
+        chunks = gzip_chunks(chunks)
+    for chunk in chunks:
+        stream.write(chunk)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='以 NDJSON 格式导出文化资源、帖子和评论')
+    parser.add_argument('names', nargs='+', choices=list(EXPORT_MODELS), help='要导出的数据')
+    parser.add_argument('--updated-since', help='只导出此时间（ISO 8601）之后更新过的行')
+    parser.add_argument('--gzip', action='store_true', help='gzip 压缩输出')
+    parser.add_argument('--output', help='输出文件（只导出一张表时使用），默认为标准输出')
+    parser.add_argument('--output-dir', help='输出目录，每张表写入 <名称>.ndjson[.gz]')
+    args = parser.parse_args()
+
+    if len(args.names) > 1 and not args.output_dir:
+        parser.error('导出多张表时需要指定 --output-dir')
+    try:
+        updated_since = parse_updated_since(args.updated_since)
+    except ValueError as e:
+        parser.error(str(e))
+
+    app = create_app()
+    with app.app_context():
+        for name in args.names:
+            if args.output_dir:
+                os.makedirs(args.output_dir, exist_ok=True)
+                path = os.path.join(args.output_dir, f"{name}.ndjson{'.gz' if args.gzip else ''}")
+            else:
+                path = args.output
+
+            started = time.monotonic()
+            if path:
+                with open(path, 'wb') as f:
+                    count = export_to(f, name, updated_since, compress=args.gzip)
+            else:
+                count = export_to(sys.stdout.buffer, name, updated_since, compress=args.gzip)
+                sys.stdout.flush()
+            elapsed = time.monotonic() - started
+            print(f"已导出 {name} {count} 行，耗时 {elapsed:.1f} 秒" + (f"：{path}" if path else ''), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,13 @@
+"""
+Gunicorn 默认配置（在 backend 目录下运行 gunicorn 时自动加载）
+
+    gunicorn -w 4 -b 0.0.0.0:5000 wsgi:app
+
+只登记多进程运行指标所需的钩子，工作进程数、监听地址等仍以命令行参数为准；gevent 模式见 gunicorn_gevent.conf.py。
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gunicorn_hooks import child_exit, on_starting  # noqa: E402,F401
@@ -0,0 +1,31 @@
+"""
+Gunicorn gevent 工作进程预设
+
+    pip install gevent
+    gunicorn -c gunicorn_gevent.conf.py wsgi:app
+
+每个工作进程用协程并发处理请求，等待 MySQL（PyMySQL 为纯 Python 实现，打补丁后的 socket 可让出执行权）时
+不占用工作进程。monkey patch 必须在导入 app、SQLAlchemy、PyMySQL 之前完成，因此放在配置文件的最开头：
+Gunicorn 先加载配置文件，再导入应用（包括 --preload）。
+"""
+from gevent import monkey
+
+monkey.patch_all()
+
+import multiprocessing  # noqa: E402
+import os  # noqa: E402
+import sys  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# 多个工作进程的运行指标写入 instance/metrics 并由 /metrics 汇总（钩子与默认配置共用）
+from gunicorn_hooks import child_exit, on_starting  # noqa: E402,F401
+
+bind = os.environ.get('GUNICORN_BIND') or '0.0.0.0:5000'
+worker_class = 'gevent'
+# 协程模式下并发度由 worker_connections 决定，工作进程数与 CPU 核数一致即可
+workers = int(os.environ.get('GUNICORN_WORKERS') or multiprocessing.cpu_count())
+# 每个工作进程同时处理的最大连接数（协程数），数据库连接数由 GeventConfig 的连接池单独限制
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS') or 1000)
+timeout = int(os.environ.get('GUNICORN_TIMEOUT') or 30)
+keepalive = 5
@@ -0,0 +1,26 @@
+"""
+Gunicorn 配置共用的服务器钩子（由 gunicorn.conf.py 和 gunicorn_gevent.conf.py 导入）
+
+多个工作进程的运行指标写入 METRICS_DIR（默认 instance/metrics），由 /metrics 汇总：
+主进程启动时清空上次运行留下的文件；工作进程退出后把它的计数合并进 exited.json 并删除 <pid>.json，
+避免 pid 被新的工作进程复用时覆盖或重复计算。
+"""
+import glob
+import os
+
+os.environ.setdefault('METRICS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'metrics'))
+
+
+def on_starting(server):
+    metrics_dir = os.environ['METRICS_DIR']
+    os.makedirs(metrics_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(metrics_dir, '*.json')):
+        os.remove(path)
+
+
+def child_exit(server, worker):
+    from services.metrics import mark_process_dead
+    try:
+        mark_process_dead(os.environ['METRICS_DIR'], worker.pid)
+    except OSError as e:
+        server.log.error(f'合并工作进程 {worker.pid} 的运行指标失败: {e}')
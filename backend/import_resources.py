@@ -0,0 +1,165 @@
+"""
+文化资源批量导入脚本
+
+以流式方式读取 CSV 或 JSONL 文件（内存占用与文件大小无关），使用与 POST /api/resources/ 相同的校验规则，
+每批记录用一条 executemany INSERT 写入（连同标签关联）并单独提交事务。导入中断时可以用 --offset 从提示的位置继续。
+
+CSV 文件第一行为列名（title, content, type, category, description, tags, author, source, cover_image, media_url），
+tags 为逗号分隔的字符串；JSONL 文件每行一个 JSON 对象，tags 可以是列表。
+
+用法：
+    python import_resources.py archive.jsonl
+    python import_resources.py archive.csv --batch-size 2000
+    python import_resources.py archive.csv --offset 350000   # 从第350001条记录继续
+    python import_resources.py archive.jsonl --dry-run       # 只校验，不写入
+    cat archive.jsonl | python import_resources.py - --format jsonl
+"""
+import argparse
+import csv
+import itertools
+import json
+import sys
+import time
+from sqlalchemy import func, insert, select
+from app import create_app, db
+from models.cultural_resource import CulturalResource
+from services.cache import response_cache
+from services.resources import resource_values, validate_resource
+from services.recommender import recommender
+from services.search import search_index
+from services.tags import attach_tags
+
+
+def read_records(handle, file_format, offset=0):
+    """
+    逐条产出 (记录序号, 数据)，序号从1开始；无法解析的行产出 (序号, 错误信息)
+
+    前 offset 条记录直接跳过：JSONL 只按行计数，不解析 JSON；CSV 只做切分（带引号的字段可能跨行），不构造字典。
+    """
+    if file_format == 'csv':
+        rows = csv.DictReader(handle)
+        rows.fieldnames  # 先读取列名
+        skipped = 0
+        while skipped < offset:
+            row = next(rows.reader, None)
+            if row is None:
+                return
+            if row:  # 与 DictReader 一致，空行不计为记录
+                skipped += 1
+        for number, row in enumerate(rows, start=offset + 1):
+            yield number, row
+        return
+    lines = (line for line in handle if line.strip())
+    for number, line in enumerate(itertools.islice(lines, offset, None), start=offset + 1):
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield number, f'JSON 解析失败: {e}'
+            continue
+        yield number, record if isinstance(record, dict) else '每行必须是一个 JSON 对象'
+
+
+def insert_batch(table, rows):
+    """用一条 executemany INSERT 写入一批资源，并为新行写入标签关联"""
+    last_id = db.session.scalar(select(func.max(table.c.id))) or 0
+    db.session.execute(insert(table), rows)
+    # 本批新行的id都大于插入前的最大id。关联按各行自身的 tags 列生成，
+    # 即使混入其他进程同时插入的行也只会重复写入相同的关联（被忽略），无需数据库支持 RETURNING
+    new_rows = db.session.execute(
+        select(table.c.id, table.c.tags).where(table.c.id > last_id, table.c.tags != '')
+    ).all()
+    attach_tags(db.session, new_rows)
+
+
+def import_resources(records, batch_size=1000, offset=0, dry_run=False):
+    """
+    按批写入已校验的记录，返回统计信息；某一批写入失败时回滚该批并抛出异常
+
+    records 为 read_records 的结果（已跳过前 offset 条），offset 只用于统计继续导入的位置。
+    """
+    # position 为已处理到的记录序号，committed 为已全部写入数据库的记录序号（可作为 --offset 继续）
+    stats = {'read': 0, 'imported': 0, 'invalid': 0, 'position': offset, 'committed': offset}
+    table = CulturalResource.__table__
+    started = time.monotonic()
+
+    def write(batch):
+        if batch and not dry_run:
+            try:
+                insert_batch(table, batch)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise RuntimeError(f"第 {stats['committed'] + 1} 至 {stats['position']} 条记录写入失败，"
+                                   f"修正后可使用 --offset {stats['committed']} 继续导入")
+        stats['imported'] += len(batch)
+        stats['committed'] = stats['position']
+        elapsed = time.monotonic() - started
+        rate = stats['read'] / elapsed if elapsed > 0 else 0.0
+        print(f"已处理 {stats['position']} 条（本次导入 {stats['imported']}，无效 {stats['invalid']}），"
+              f"{rate:.0f} 条/秒")
+
+    batch = []
+    for number, record in records:
+        stats['read'] += 1
+        stats['position'] = number
+        error = record if isinstance(record, str) else validate_resource(record)
+        if error:
+            stats['invalid'] += 1
+            print(f"第 {number} 条记录无效：{error}", file=sys.stderr)
+        else:
+            batch.append(resource_values(record))
+        if len(batch) >= batch_size:
+            write(batch)
+            batch = []
+    write(batch)
+    stats['elapsed'] = time.monotonic() - started
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='从 CSV 或 JSONL 文件批量导入文化资源')
+    parser.add_argument('path', help='输入文件，- 表示标准输入')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help='文件格式，默认按扩展名判断')
+    parser.add_argument('--batch-size', type=int, default=1000, help='每批（每个事务）写入的记录数')
+    parser.add_argument('--offset', type=int, default=0, help='跳过前 N 条记录（用于中断后继续导入）')
+    parser.add_argument('--dry-run', action='store_true', help='只校验记录，不写入数据库')
+    parser.add_argument('--no-index', action='store_true', help='导入后不重建全文索引和相似资源索引（稍后手动重建）')
+    args = parser.parse_args()
+
+    file_format = args.format or ('csv' if args.path.lower().endswith('.csv') else 'jsonl')
+    if args.path == '-':
+        handle = sys.stdin
+    else:
+        handle = open(args.path, 'r', encoding='utf-8-sig', newline='' if file_format == 'csv' else None)
+
+    app = create_app()
+    with app.app_context():
+        try:
+            offset = max(0, args.offset)
+            stats = import_resources(read_records(handle, file_format, offset), batch_size=max(1, args.batch_size),
+                                     offset=offset, dry_run=args.dry_run)
+        except RuntimeError as e:
+            print(str(e), file=sys.stderr)
+            return 1
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+
+        if stats['imported'] and not args.dry_run:
+            # 新资源需要出现在列表和检索结果中
+            response_cache.invalidate('resources')
+            if not args.no_index:
+                print("正在重建全文索引...")
+                search_index.rebuild()
+                print("正在重建相似资源索引...")
+                recommender.resources.rebuild(db.session)
+
+    rate = stats['read'] / stats['elapsed'] if stats['elapsed'] > 0 else 0.0
+    action = '校验通过' if args.dry_run else '导入'
+    print(f"共读取 {stats['read']} 条记录，{action} {stats['imported']} 条，无效 {stats['invalid']} 条，"
+          f"耗时 {stats['elapsed']:.1f} 秒（{rate:.0f} 条/秒）")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
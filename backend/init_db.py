@@ -1,8 +1,162 @@
 import os
+from sqlalchemy import bindparam, func, inspect, select, text, update
+from sqlalchemy.dialects import mysql
 from app import create_app, db
 from models.user import User
 from models.cultural_resource import CulturalResource
-from models.community_post import CommunityPost, user_likes_table
+from models.community_post import CommunityPost, Comment, user_likes_table
+
+
+# 已从模型中移除的索引（查询改由其他索引覆盖），升级已有数据库时删除：{表名: [索引名, ...]}
+DROPPED_INDEXES = {
+    # 资源列表总是按状态过滤，由 (status, priority) 和 (category, status, priority) 索引覆盖
+    'cultural_resources': ['ix_cultural_resources_category_priority', 'ix_cultural_resources_priority'],
+}
+
+
+def upgrade_schema():
+    """
+    为已有数据库补充模型中新增的列和索引，返回新增的列 [(表名, 列名), ...]
+
+    先补充全部缺失的列并回填需要按已有数据计算的列，再创建索引，索引建好时列中已是正确的值。
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    added_columns = []
+    
+    drop_unused_indexes(inspector, existing_tables)
+    
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        
+        # 补充缺失的列
+        existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            print(f"正在为 {table.name} 添加列 {column.name}...")
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            default = ''
+            if column.default is not None and column.default.is_scalar:
+                default = f' DEFAULT {column.default.arg!r}'
+            elif column.server_default is not None:
+                arg = column.server_default.arg
+                default = f' DEFAULT {getattr(arg, "text", None) or repr(arg)}'
+            if default and not column.nullable:
+                default += ' NOT NULL'
+            with db.engine.begin() as conn:
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}{default}'))
+            added_columns.append((table.name, column.name))
+    
+    # 新增回复数列后按已有回复补齐
+    if ('comments', 'reply_count') in added_columns:
+        print("正在统计评论回复数...")
+        backfill_reply_counts()
+        print("评论回复数统计完成")
+    
+    if 'community_posts' in existing_tables:
+        upgrade_hot_score_column(('community_posts', 'hot_score') in added_columns)
+    
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        
+        # 补充缺失的索引
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                print(f"正在创建索引 {index.name}...")
+                index.create(db.engine)
+    
+    return added_columns
+
+
+def drop_unused_indexes(inspector, existing_tables):
+    """删除 DROPPED_INDEXES 中列出的、已有数据库中仍存在的索引"""
+    for table_name, index_names in DROPPED_INDEXES.items():
+        if table_name not in existing_tables:
+            continue
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table_name)}
+        for name in index_names:
+            if name not in existing_indexes:
+                continue
+            print(f"正在删除索引 {name}...")
+            on_table = f' ON {table_name}' if db.engine.dialect.name == 'mysql' else ''
+            with db.engine.begin() as conn:
+                conn.execute(text(f'DROP INDEX {name}{on_table}'))
+
+
+def upgrade_hot_score_column(added):
+    """
+    热度分列改为双精度、非空
+
+    新增的列和早期版本中可为空的列都先按帖子数据回填，再（MySQL 上）把单精度 FLOAT 或可为空的列
+    修改为 DOUBLE NOT NULL，之后热门排序的索引和游标分页才会用到它。
+    """
+    from services.hot_score import refresh_all_hot_scores
+    
+    column = CommunityPost.__table__.c.hot_score
+    info = {c['name']: c for c in inspect(db.engine).get_columns('community_posts')}['hot_score']
+    is_mysql = db.engine.dialect.name == 'mysql'
+    single_precision = is_mysql and isinstance(info['type'], mysql.FLOAT)
+    if not (added or info['nullable'] or single_precision):
+        return
+    
+    print("正在回填帖子热度分...")
+    refresh_all_hot_scores()
+    print("帖子热度分回填完成")
+    
+    if is_mysql and (info['nullable'] or single_precision):
+        print("正在将热度分列修改为双精度、非空...")
+        column_type = column.type.compile(dialect=db.engine.dialect)
+        with db.engine.begin() as conn:
+            conn.execute(text(f'ALTER TABLE community_posts MODIFY hot_score {column_type} NOT NULL DEFAULT 0'))
+
+
+def migrate_tags(batch_size=1000):
+    """根据 cultural_resources.tags 中逗号分隔的标签补建标签表和关联表（可重复执行，已有关联会被忽略）"""
+    from services.tags import attach_tags
+    
+    last_id = 0
+    migrated = 0
+    while True:
+        rows = db.session.execute(
+            select(CulturalResource.id, CulturalResource.tags)
+            .where(CulturalResource.id > last_id)
+            .order_by(CulturalResource.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        migrated += attach_tags(db.session, [row for row in rows if row.tags])
+        db.session.commit()
+    return migrated
+
+
+def backfill_reply_counts(batch_size=1000):
+    """按父评论分批统计回复数并写入 comments.reply_count（新增该列后执行一次）"""
+    last_id = 0
+    updated = 0
+    while True:
+        rows = db.session.execute(
+            select(Comment.parent_id, func.count())
+            .where(Comment.parent_id > last_id)
+            .group_by(Comment.parent_id)
+            .order_by(Comment.parent_id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        db.session.execute(
+            update(Comment.__table__)
+            .where(Comment.__table__.c.id == bindparam('comment_id'))
+            .values(reply_count=bindparam('count')),
+            [{'comment_id': parent_id, 'count': count} for parent_id, count in rows]
+        )
+        db.session.commit()
+        updated += len(rows)
+    return updated
 
 
 def init_database():
@@ -21,6 +175,16 @@ def init_database():
         
         print("数据库表创建完成")
         
+        # 为已有数据库补充新增的列和索引
+        print("正在检查数据库结构更新...")
+        upgrade_schema()
+        print("数据库结构检查完成")
+        
+        # 将逗号分隔的资源标签迁移到标签关联表
+        print("正在迁移资源标签...")
+        migrate_tags()
+        print("资源标签迁移完成")
+        
         # 检查是否已有管理员账户
         admin = User.query.filter_by(username='admin').first()
         if not admin:
@@ -55,6 +219,9 @@ def init_database():
             )
             
             db.session.add(sample_resource)
+            db.session.flush()
+            from services.tags import attach_tags
+            attach_tags(db.session, [(sample_resource.id, sample_resource.tags)])
             db.session.commit()
             print("示例文化资源创建完成")
         else:
@@ -90,6 +257,24 @@ def init_database():
         else:
             print("示例社区帖子已存在")
         
+        # 重新计算帖子热度分
+        print("正在计算帖子热度分...")
+        from services.hot_score import refresh_all_hot_scores
+        refresh_all_hot_scores()
+        print("帖子热度分计算完成")
+        
+        # 重建文化资源全文索引
+        print("正在重建全文索引...")
+        from services.search import search_index
+        search_index.rebuild()
+        print("全文索引重建完成")
+        
+        # 重建帖子和文化资源的相似内容索引
+        print("正在构建相似内容推荐索引...")
+        from services.recommender import recommender
+        recommender.rebuild(db.session)
+        print("相似内容推荐索引构建完成")
+        
         print("数据库初始化完成！")
 
 
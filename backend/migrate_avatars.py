@@ -0,0 +1,117 @@
+"""
+头像迁移脚本（一次性）
+
+将 users.avatar 中内嵌的 base64 图片和旧版上传的头像文件（/static/avatars/<用户ID>_<uuid>.<扩展名>）
+按内容哈希转存到头像目录，数据库中只保存短路径；无法识别的值置空（使用默认头像）。
+全部转换完成后，MySQL 上会将 avatar 列收窄为 VARCHAR(255)。
+
+用法：
+    python migrate_avatars.py            # 执行迁移
+    python migrate_avatars.py --dry-run  # 只统计，不写入
+"""
+import argparse
+import os
+import sys
+from sqlalchemy import bindparam, select, text, update
+from app import create_app, db
+from models.user import User
+from services.avatars import (
+    AVATAR_URL_PREFIX, InvalidAvatar, avatar_folder, avatar_url, decode_data_uri, normalize_avatar, store_avatar
+)
+from services.cache import response_cache
+
+
+def is_content_addressed(avatar):
+    """已经是 /static/avatars/ab/<sha256>.<扩展名> 形式"""
+    if not avatar.startswith(AVATAR_URL_PREFIX):
+        return False
+    parts = avatar[len(AVATAR_URL_PREFIX):].split('/')
+    return len(parts) == 2 and len(parts[0]) == 2 and parts[1].startswith(parts[0])
+
+
+def convert(avatar, dry_run=False):
+    """返回迁移后的头像地址，无需修改时原样返回；dry_run 时只计算地址，不写入文件"""
+    if avatar.startswith('data:'):
+        data = decode_data_uri(avatar)
+    elif avatar.startswith(AVATAR_URL_PREFIX) and not is_content_addressed(avatar):
+        file_path = os.path.join(avatar_folder(), avatar[len(AVATAR_URL_PREFIX):])
+        if not os.path.isfile(file_path):
+            return avatar  # 文件不在本机，保留原地址
+        with open(file_path, 'rb') as f:
+            data = f.read()
+    else:
+        return normalize_avatar(avatar)
+    return avatar_url(data) if dry_run else store_avatar(data)
+
+
+def migrate(batch_size=500, dry_run=False):
+    stats = {'scanned': 0, 'converted': 0, 'cleared': 0}
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(User.id, User.avatar)
+            .where(User.id > last_id, User.avatar.isnot(None))
+            .order_by(User.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        stats['scanned'] += len(rows)
+
+        changes = []
+        for row in rows:
+            try:
+                avatar = convert(row.avatar, dry_run=dry_run)
+            except InvalidAvatar as e:
+                print(f"用户 {row.id} 的头像无法转换（{e}），将使用默认头像")
+                avatar = None
+            if avatar != row.avatar:
+                changes.append({'user_id': row.id, 'avatar': avatar})
+                stats['converted' if avatar else 'cleared'] += 1
+
+        if changes and not dry_run:
+            db.session.execute(
+                update(User.__table__)
+                .where(User.__table__.c.id == bindparam('user_id'))
+                .values(avatar=bindparam('avatar')),
+                changes
+            )
+            db.session.commit()
+        print(f"已处理到用户 {last_id}：转换 {stats['converted']}，置空 {stats['cleared']}")
+    return stats
+
+
+def shrink_column():
+    """MySQL 上将 avatar 列收窄为 VARCHAR(255)，SQLite 不限制长度，无需修改"""
+    if db.engine.dialect.name != 'mysql':
+        return
+    too_long = db.session.execute(
+        select(User.id).where(db.func.char_length(User.avatar) > 255).limit(1)
+    ).first()
+    if too_long:
+        print("仍有超过255个字符的头像地址，跳过收窄 avatar 列")
+        return
+    print("正在将 users.avatar 收窄为 VARCHAR(255)...")
+    with db.engine.begin() as conn:
+        conn.execute(text('ALTER TABLE users MODIFY avatar VARCHAR(255)'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='将内嵌的base64头像转存为按内容哈希命名的文件')
+    parser.add_argument('--batch-size', type=int, default=500, help='每批处理的用户数')
+    parser.add_argument('--dry-run', action='store_true', help='只统计需要转换的行，不写入文件和数据库')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        stats = migrate(batch_size=args.batch_size, dry_run=args.dry_run)
+        if not args.dry_run:
+            shrink_column()
+            if stats['converted'] or stats['cleared']:
+                response_cache.invalidate('posts')
+    print(f"共扫描 {stats['scanned']} 个用户，转换 {stats['converted']} 个头像，置空 {stats['cleared']} 个")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
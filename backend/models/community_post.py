@@ -1,34 +1,74 @@
 from app import db
 from datetime import datetime
+import math
 
 
 # 用户点赞关联表
 user_likes_table = db.Table('user_post_likes',
     db.Column('user_id', db.Integer, db.ForeignKey('users.id'), primary_key=True),
-    db.Column('post_id', db.Integer, db.ForeignKey('community_posts.id'), primary_key=True)
+    db.Column('post_id', db.Integer, db.ForeignKey('community_posts.id'), primary_key=True),
+    # 按帖子反查点赞记录（删除帖子、统计点赞）
+    db.Index('ix_user_post_likes_post_id_user_id', 'post_id', 'user_id')
 )
 
 
+# 帖子状态；deleted 表示已删除、等待后台分批清理（见 services/purge.py），所有读取接口都按不存在处理
+POST_STATUSES = ('draft', 'published', 'hidden', 'deleted')
+POST_DELETED = 'deleted'
+
+
+# 热度分计算参数：互动量每增加10倍，相当于发布时间晚 HOT_SCORE_DECAY 秒
+HOT_SCORE_EPOCH = datetime(2024, 1, 1)
+HOT_SCORE_DECAY = 45000
+
+
+def compute_hot_score(like_count, comment_count, view_count, created_at):
+    """计算随时间衰减的热度分：log10(互动量) + 发布时间 / 衰减周期"""
+    engagement = (like_count or 0) + 2 * (comment_count or 0) + (view_count or 0) / 10
+    age = ((created_at or datetime.utcnow()) - HOT_SCORE_EPOCH).total_seconds()
+    return round(math.log10(max(engagement, 1)) + age / HOT_SCORE_DECAY, 7)
+
+
+def _initial_hot_score(context):
+    params = context.get_current_parameters()
+    return compute_hot_score(params.get('like_count'), params.get('comment_count'),
+                             params.get('view_count'), params.get('created_at'))
+
+
 class CommunityPost(db.Model):
     __tablename__ = 'community_posts'
+    __table_args__ = (
+        # 帖子列表按状态、分类过滤，并按发布时间、热度分或评论数排序
+        db.Index('ix_community_posts_status_created_at', 'status', 'created_at'),
+        db.Index('ix_community_posts_status_category_created_at', 'status', 'category', 'created_at'),
+        db.Index('ix_community_posts_status_hot_score', 'status', 'hot_score'),
+        db.Index('ix_community_posts_status_category_hot_score', 'status', 'category', 'hot_score'),
+        db.Index('ix_community_posts_status_comment_count', 'status', 'comment_count'),
+        db.Index('ix_community_posts_status_category_comment_count', 'status', 'category', 'comment_count'),
+        # 增量导出按更新时间读取
+        db.Index('ix_community_posts_updated_at', 'updated_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text, nullable=False)
     author_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     category = db.Column(db.String(50), nullable=False)  # 分类：讨论、提问、分享等
-    status = db.Column(db.String(20), default='published')  # 状态：draft, published, hidden
+    status = db.Column(db.String(20), default='published')  # 状态：draft, published, hidden, deleted
     view_count = db.Column(db.Integer, default=0)  # 浏览次数
     like_count = db.Column(db.Integer, default=0)  # 点赞数
     comment_count = db.Column(db.Integer, default=0)  # 评论数
+    # 热度分，用于热门排序；游标分页会把它原样带回做等值和大小比较，MySQL 上需为双精度（DOUBLE）且不能为空
+    hot_score = db.Column(db.Float(precision=53), nullable=False, default=_initial_hot_score,
+                          server_default=db.text('0'))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # 关联评论
     comments = db.relationship('Comment', backref='post', lazy=True, foreign_keys='Comment.post_id')
 
-    # 关联点赞用户
-    liked_users = db.relationship('User', secondary=user_likes_table, lazy='subquery',
+    # 关联点赞用户（按需加载，列表查询不再附带点赞用户子查询）
+    liked_users = db.relationship('User', secondary=user_likes_table, lazy=True,
                                   backref=db.backref('liked_posts', lazy=True))
 
     def __repr__(self):
@@ -37,12 +77,22 @@ class CommunityPost(db.Model):
 
 class Comment(db.Model):
     __tablename__ = 'comments'
+    __table_args__ = (
+        # 按帖子获取顶级评论并按时间排序；按父评论获取回复并按时间排序
+        db.Index('ix_comments_post_id_parent_id_created_at', 'post_id', 'parent_id', 'created_at'),
+        db.Index('ix_comments_parent_id_created_at', 'parent_id', 'created_at'),
+        # 清理已删除的帖子时按 id 分批删除其评论
+        db.Index('ix_comments_post_id_id', 'post_id', 'id'),
+        # 增量导出按更新时间读取
+        db.Index('ix_comments_updated_at', 'updated_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
     author_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     post_id = db.Column(db.Integer, db.ForeignKey('community_posts.id'), nullable=False)
     parent_id = db.Column(db.Integer, db.ForeignKey('comments.id'), nullable=True)  # 回复评论的功能
+    reply_count = db.Column(db.Integer, default=0)  # 直接回复数，回复列表按需分页加载
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -2,8 +2,36 @@ from app import db
 from datetime import datetime
 
 
+# 资源与标签的关联表
+resource_tags_table = db.Table('cultural_resource_tags',
+    db.Column('resource_id', db.Integer, db.ForeignKey('cultural_resources.id'), primary_key=True),
+    db.Column('tag_id', db.Integer, db.ForeignKey('tags.id'), primary_key=True),
+    # 按标签查找资源
+    db.Index('ix_cultural_resource_tags_tag_id_resource_id', 'tag_id', 'resource_id')
+)
+
+
+class Tag(db.Model):
+    __tablename__ = 'tags'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)  # 标签名
+
+    def __repr__(self):
+        return f'<Tag {self.name}>'
+
+
 class CulturalResource(db.Model):
     __tablename__ = 'cultural_resources'
+    __table_args__ = (
+        # 资源列表按状态（和分类）过滤并按优先级排序
+        db.Index('ix_cultural_resources_status_priority', 'status', 'priority'),
+        db.Index('ix_cultural_resources_category_status_priority', 'category', 'status', 'priority'),
+        # 分面统计：按状态过滤后按分类、类型分组（覆盖索引）
+        db.Index('ix_cultural_resources_status_category_type', 'status', 'category', 'type'),
+        # 增量导出按更新时间读取
+        db.Index('ix_cultural_resources_updated_at', 'updated_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)  # 资源标题
@@ -11,7 +39,7 @@ class CulturalResource(db.Model):
     content = db.Column(db.Text)  # 详细内容
     type = db.Column(db.String(50), nullable=False)  # 类型：历史遗迹、传统艺术、民间文学等
     category = db.Column(db.String(50), nullable=False)  # 分类
-    tags = db.Column(db.String(200))  # 标签
+    tags = db.Column(db.String(200))  # 标签（逗号分隔，用于展示；按标签过滤使用关联表）
     author = db.Column(db.String(100))  # 作者
     source = db.Column(db.String(200))  # 来源
     cover_image = db.Column(db.String(255))  # 封面图片
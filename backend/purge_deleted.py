@@ -0,0 +1,46 @@
+"""
+已删除帖子的清理脚本
+
+与后台清理任务相同，分批删除已删除帖子的评论、点赞记录和帖子本身；
+与正在运行的服务通过文件锁互斥，服务正在清理时直接退出。
+
+用法：
+    python purge_deleted.py                          # 清理全部已删除的帖子
+    python purge_deleted.py --batch-size 200 --pause 0.2
+    python purge_deleted.py --status                 # 只查看清理进度
+"""
+import argparse
+import json
+import sys
+from app import create_app, db
+from services.purge import post_purger
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分批清理已删除的帖子及其评论和点赞记录')
+    parser.add_argument('--batch-size', type=int, help='每批删除的行数，默认为 PURGE_BATCH_SIZE')
+    parser.add_argument('--pause', type=float, help='批次之间暂停的秒数，默认为 PURGE_BATCH_PAUSE')
+    parser.add_argument('--status', action='store_true', help='只输出清理进度，不执行清理')
+    args = parser.parse_args()
+
+    app = create_app()
+    if args.status:
+        with app.app_context():
+            print(json.dumps(post_purger.status(db.session), ensure_ascii=False, indent=2))
+        return 0
+
+    if args.batch_size:
+        post_purger.batch_size = args.batch_size
+    if args.pause is not None:
+        post_purger.pause = args.pause
+
+    purged = post_purger.purge(log=lambda message: print(message, file=sys.stderr))
+    if purged is None:
+        print('其他进程正在清理，请稍后再试', file=sys.stderr)
+        return 1
+    print(f'共清理 {purged} 个帖子', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
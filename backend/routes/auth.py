@@ -1,6 +1,10 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from models.user import User
+from services.avatars import InvalidAvatar, normalize_avatar, store_avatar
+from services.cache import response_cache
+from services.identity_cache import identity_cache
+from services.password_hasher import password_hasher, HasherBusy
 from sqlalchemy import text
 import re
 
@@ -37,7 +41,8 @@ def register():
             username=data['username'],
             email=data['email']
         )
-        user.set_password(data['password'])
+        # 在独立进程池中计算密码哈希，不阻塞请求线程
+        user.password_hash = password_hasher.hash(data['password'])
         
         current_app.db.session.add(user)
         current_app.db.session.flush()  # 获取分配的ID，但暂不提交事务
@@ -59,6 +64,9 @@ def register():
                 'avatar': user.avatar
             }
         }), 201
+    except HasherBusy:
+        current_app.db.session.rollback()
+        return jsonify({'message': '服务器繁忙，请稍后重试'}), 503, {'Retry-After': '1'}
     except Exception as e:
         current_app.db.session.rollback()
         return jsonify({'message': '注册失败: ' + str(e)}), 500
@@ -85,7 +93,12 @@ def login():
             (User.username == username_or_email) | (User.email == username_or_email)
         ).first()
         
-        if user and user.check_password(password) and user.is_active:
+        if user and user.is_active and password_hasher.verify(user.password_hash, password):
+            # 哈希方法或强度配置变化后，在登录成功时透明地升级已存储的哈希
+            if password_hasher.needs_rehash(user.password_hash):
+                user.password_hash = password_hasher.hash(password)
+                current_app.db.session.commit()
+            
             access_token = create_access_token(identity=user.id)
             return jsonify({
                 'success': True,
@@ -101,7 +114,11 @@ def login():
             })
         
         return jsonify({'message': '用户名/邮箱或密码错误'}), 401
+    except HasherBusy:
+        current_app.db.session.rollback()
+        return jsonify({'message': '服务器繁忙，请稍后重试'}), 503, {'Retry-After': '1'}
     except Exception as e:
+        current_app.db.session.rollback()
         return jsonify({'message': '登录失败: ' + str(e)}), 500
 
 
@@ -151,7 +168,11 @@ def update_profile():
         if 'bio' in data:
             user.bio = data['bio']
         if 'avatar' in data:
-            user.avatar = data['avatar']
+            # 内嵌的 base64 图片转存为文件，数据库中只保存短路径
+            try:
+                user.avatar = normalize_avatar(data['avatar'])
+            except InvalidAvatar as e:
+                return jsonify({'message': str(e)}), 400
         if 'username' in data:
             # 检查用户名是否已被其他用户使用
             existing_user = current_app.db.session.query(User).filter(
@@ -163,6 +184,10 @@ def update_profile():
             user.username = data['username']
         
         current_app.db.session.commit()
+        identity_cache.invalidate(user_id)
+        if 'avatar' in data or 'username' in data:
+            # 帖子列表中缓存了作者的用户名和头像
+            response_cache.invalidate('posts')
         
         return jsonify({'success': True, 'message': '资料更新成功'})
     except Exception as e:
@@ -195,36 +220,14 @@ def upload_avatar():
                 file.filename.rsplit('.', 1)[1].lower() in allowed_extensions):
             return jsonify({'message': '不支持的文件格式'}), 400
         
-        # 生成唯一的文件名
-        import uuid
-        import os
-        extension = file.filename.rsplit('.', 1)[1].lower()
-        unique_filename = f"{user.id}_{uuid.uuid4().hex}.{extension}"
-        
-        # 确定上传目录 - 首先尝试使用环境变量定义的上传目录
-        import tempfile
-        upload_base = os.environ.get('AVATAR_UPLOAD_PATH', None)
-        
-        if upload_base:
-            # 如果设置了环境变量，则使用环境变量指定的路径
-            upload_folder = os.path.join(upload_base, 'avatars')
-        else:
-            # 否则使用相对于项目根目录的路径
-            upload_folder = os.path.join(current_app.root_path, '..', 'public', 'static', 'avatars')
-        
-        # 使用abspath规范化路径
-        upload_folder = os.path.abspath(upload_folder)
-        
-        os.makedirs(upload_folder, exist_ok=True)
-        
-        # 保存文件
-        file_path = os.path.join(upload_folder, unique_filename)
-        file.save(file_path)
-        
-        # 更新用户头像路径
-        # 使用正斜杠构建Web访问路径
-        user.avatar = f"/static/avatars/{unique_filename}"
+        # 按内容哈希保存，相同的图片只保存一份
+        try:
+            user.avatar = store_avatar(file.read())
+        except InvalidAvatar as e:
+            return jsonify({'message': str(e)}), 400
         current_app.db.session.commit()
+        identity_cache.invalidate(user_id)
+        response_cache.invalidate('posts')
         
         return jsonify({
             'success': True, 
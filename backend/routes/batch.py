@@ -0,0 +1,92 @@
+from contextlib import contextmanager
+from flask import Blueprint, request, jsonify, current_app, g
+from werkzeug.test import EnvironBuilder
+
+
+batch_bp = Blueprint('batch', __name__)
+
+# 转发给子请求的请求头：身份（JWT）和读主库的 Cookie
+FORWARDED_HEADERS = ('Authorization', 'Cookie')
+
+
+@contextmanager
+def _isolated_g():
+    # 子请求与外层请求共用应用上下文（因而共用数据库会话），但各自使用独立的 g，
+    # 避免子请求覆盖外层请求的运行指标、SQL 统计和读写分离状态
+    saved = g.__dict__.copy()
+    g.__dict__.clear()
+    try:
+        yield
+    finally:
+        g.__dict__.clear()
+        g.__dict__.update(saved)
+
+
+def _sub_request(item, headers):
+    """在当前应用上下文中执行一个子请求，返回 (状态码, 响应体)"""
+    path = item.get('path') if isinstance(item, dict) else item
+    method = (item.get('method') or 'GET').upper() if isinstance(item, dict) else 'GET'
+    if not isinstance(path, str) or not path.startswith('/'):
+        return 400, {'message': 'path 必须是以 / 开头的接口路径'}
+    if method != 'GET':
+        return 405, {'message': '批量请求只支持 GET 接口'}
+    if path.split('?', 1)[0].rstrip('/') == '/api/batch':
+        return 400, {'message': '批量请求不能嵌套'}
+
+    environ = EnvironBuilder(
+        path=path, method='GET', base_url=request.host_url, headers=headers,
+        environ_base={'REMOTE_ADDR': request.remote_addr}
+    ).get_environ()
+    with _isolated_g(), current_app.request_context(environ):
+        response = current_app.full_dispatch_request()
+        try:
+            if response.is_streamed:
+                return 400, {'message': '批量请求不支持流式输出的接口'}
+            if response.is_json:
+                body = response.get_json(silent=True)
+            else:
+                body = response.get_data(as_text=True)
+            return response.status_code, body
+        finally:
+            response.close()
+
+
+@batch_bp.route('/api/batch', methods=['POST'])
+def batch_requests():
+    """
+    批量执行多个 GET 接口，一次往返返回全部结果
+
+    请求体：{"requests": [{"id": "post", "path": "/api/community/posts/1"}, "/api/community/posts/related/1"]}，
+    每一项为接口路径或包含 path（可带查询参数）和可选 id 的对象；子请求使用本请求的 Authorization 头，
+    在同一个应用上下文和数据库会话中依次执行，结果按请求顺序返回 {"id", "status", "body"}。
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        items = data.get('requests') if isinstance(data, dict) else None
+        if not isinstance(items, list) or not items:
+            return jsonify({'message': 'requests 必须是非空列表'}), 400
+
+        max_requests = current_app.config.get('BATCH_MAX_REQUESTS', 20)
+        if len(items) > max_requests:
+            return jsonify({'message': f'一次最多批量执行 {max_requests} 个请求'}), 400
+
+        headers = {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers}
+        responses = []
+        for item in items:
+            status, body = _sub_request(item, headers)
+            if status >= 500:
+                # 失败的子请求可能使会话处于不可用状态，回滚后继续执行后面的请求
+                current_app.db.session.rollback()
+            responses.append({
+                'id': item.get('id') if isinstance(item, dict) else None,
+                'status': status,
+                'body': body
+            })
+
+        return jsonify({
+            'success': True,
+            'responses': responses
+        })
+    except Exception as e:
+        current_app.db.session.rollback()
+        return jsonify({'message': '批量请求失败: ' + str(e)}), 500
@@ -1,15 +1,74 @@
 from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models.community_post import CommunityPost, Comment
-from models.user import User
-from sqlalchemy import text
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
+from models.community_post import CommunityPost, Comment, POST_DELETED, POST_STATUSES
+from services.authors import author_payload, hydrate_authors
+from services.cache import response_cache
+from services.comment_tree import build_comment_tree
+from services.db_routing import read_replica
+from services.hot_score import refresh_hot_scores
+from services.identity_cache import identity_cache
+from services.likes import toggle_post_like
+from services.pagination import paginate_keyset, cached_count
+from services.purge import post_purger
+from services.recommender import recommender, related_items
+from services.view_counter import view_counter
+from sqlalchemy import func, text, update
 import math
 
 
 community_bp = Blueprint('community', __name__, url_prefix='/api/community')
 
+# 帖子列表各排序方式的排序键（均为降序，以 id 作为最后的唯一键）
+POST_SORT_KEYS = {
+    'latest': [
+        (CommunityPost.created_at, lambda post: post.created_at),
+        (CommunityPost.id, lambda post: post.id)
+    ],
+    'popular': [
+        (CommunityPost.hot_score, lambda post: post.hot_score),
+        (CommunityPost.id, lambda post: post.id)
+    ],
+    'comments': [
+        (CommunityPost.comment_count, lambda post: post.comment_count),
+        (CommunityPost.id, lambda post: post.id)
+    ]
+}
+
+# 评论列表的排序键（一级评论按时间倒序、回复按时间正序，以 id 作为最后的唯一键）
+COMMENT_SORT_KEYS = [
+    (Comment.created_at, lambda comment: comment.created_at),
+    (Comment.id, lambda comment: comment.id)
+]
+
+# 评论和回复每页的最大条数
+MAX_COMMENT_PAGE_SIZE = 100
+
+
+def _current_user_id():
+    """当前登录用户的id（用于不要求登录的接口），未登录或令牌无效时返回 None"""
+    try:
+        verify_jwt_in_request(optional=True)
+        return get_jwt_identity()
+    except Exception:
+        return None
+
+
+def _can_view_post(post, user_id):
+    """
+    帖子及其评论、回复和相关帖子是否对该用户可见
+
+    已删除的帖子对所有人按不存在处理；未发布（草稿、隐藏）的帖子只对作者和管理员可见，对其他人同样按不存在处理。
+    """
+    if not post or post.status == POST_DELETED:
+        return False
+    if post.status == 'published':
+        return True
+    return user_id is not None and (user_id == post.author_id or identity_cache.is_admin(user_id))
+
 
 @community_bp.route('/posts', methods=['GET'])
+@response_cache.cached('posts')
+@read_replica
 def get_posts():
     """获取帖子列表"""
     try:
@@ -17,8 +76,11 @@ def get_posts():
         limit = request.args.get('limit', 10, type=int)
         category = request.args.get('category')
         sort_by = request.args.get('sortBy', 'latest')  # 新增排序参数，默认为最新发布
+        cursor = request.args.get('cursor')  # 传入cursor参数（首页为空字符串）即启用游标分页
         
-        offset = (page - 1) * limit
+        if sort_by not in POST_SORT_KEYS:
+            sort_by = 'latest'
+        sort_keys = POST_SORT_KEYS[sort_by]
         
         # 构建查询
         query = current_app.db.session.query(CommunityPost)
@@ -27,31 +89,48 @@ def get_posts():
             query = query.filter(CommunityPost.category == category)
         
         query = query.filter(CommunityPost.status == 'published')
+        count_key = ('community_posts', category)
+        
+        if cursor is not None:
+            # 游标分页：按排序键定位，不再扫描被跳过的行
+            limit = max(1, limit)
+            try:
+                posts, next_cursor = paginate_keyset(query, sort_by, sort_keys, cursor, limit)
+            except ValueError as e:
+                return jsonify({'message': str(e)}), 400
+            
+            pagination = {
+                'limit': limit,
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
+            }
+            if request.args.get('withTotal', 'false').lower() in ('1', 'true'):
+                pagination['total'] = cached_count(count_key, query)
+        else:
+            # 根据排序参数构建排序条件：latest 最新发布，popular 热度分，comments 评论数
+            query = query.order_by(*[column.desc() for column, _ in sort_keys])
+            
+            offset = (page - 1) * limit
+            total = cached_count(count_key, query)
+            posts = query.offset(offset).limit(limit).all()
+            
+            pagination = {
+                'page': page,
+                'limit': limit,
+                'total': total,
+                'pages': math.ceil(total / limit)
+            }
         
-        # 根据排序参数构建排序条件
-        if sort_by == 'popular':  # 热门：按点赞数+评论数
-            query = query.order_by((CommunityPost.like_count + CommunityPost.comment_count).desc())
-        elif sort_by == 'comments':  # 评论最多：按评论数
-            query = query.order_by(CommunityPost.comment_count.desc())
-        else:  # 默认按最新发布：按创建时间
-            query = query.order_by(CommunityPost.created_at.desc())
-        
-        total = query.count()
-        posts = query.offset(offset).limit(limit).all()
+        # 批量获取作者信息
+        authors = hydrate_authors(posts)
         
         result = []
         for post in posts:
-            # 获取作者信息
-            author = current_app.db.session.get(User, post.author_id)
             result.append({
                 'id': post.id,
                 'title': post.title,
                 'summary': post.content[:100] + '...' if len(post.content) > 100 else post.content,
-                'author': {
-                    'id': author.id,
-                    'username': author.username,
-                    'avatar': author.avatar
-                },
+                'author': authors[post.author_id],
                 'category': post.category,
                 'view_count': post.view_count,
                 'like_count': post.like_count,
@@ -62,12 +141,7 @@ def get_posts():
         return jsonify({
             'success': True,
             'data': result,
-            'pagination': {
-                'page': page,
-                'limit': limit,
-                'total': total,
-                'pages': math.ceil(total / limit)
-            }
+            'pagination': pagination
         })
     except Exception as e:
         return jsonify({'message': '获取帖子列表失败: ' + str(e)}), 500
@@ -77,77 +151,32 @@ def get_posts():
 def get_post(id):
     """获取单个帖子"""
     try:
+        current_user_id = _current_user_id()
         post = current_app.db.session.get(CommunityPost, id)
         
-        if not post:
+        # 已删除的帖子、以及非作者和管理员查看未发布的帖子，都按不存在处理
+        if not _can_view_post(post, current_user_id):
             return jsonify({'message': '帖子不存在'}), 404
-            
-        if post.status != 'published':
-            # 如果不是发布的状态，需要验证用户权限
-            current_user_id = get_jwt_identity()
-            if not current_user_id or current_user_id != post.author_id:
-                return jsonify({'message': '没有权限查看此帖子'}), 403
-        
-        # 增加浏览量
-        post.view_count += 1
-        current_app.db.session.commit()
         
-        # 获取作者信息
-        author = current_app.db.session.get(User, post.author_id)
+        # 增加浏览量：计入写缓冲，由后台批量写回数据库
+        pending_views = view_counter.incr('community_posts', post.id)
         
         # 获取当前用户是否已点赞
         liked_by_current_user = False
-        try:
-            current_user_id = get_jwt_identity()
-            if current_user_id:
-                from models.community_post import user_likes_table  # 修复导入路径
-                existing_like = current_app.db.session.query(user_likes_table).filter(
-                    user_likes_table.c.user_id == current_user_id,
-                    user_likes_table.c.post_id == id
-                ).first()
-                liked_by_current_user = bool(existing_like)
-        except:
-            # 如果用户未登录，get_jwt_identity()会抛出异常，这里忽略即可
-            pass
-        
-        # 获取评论
-        comments = current_app.db.session.query(Comment).filter(
-            Comment.post_id == id,
-            Comment.parent_id.is_(None)  # 只获取顶级评论
-        ).order_by(Comment.created_at.desc()).all()
-        
-        comments_data = []
-        for comment in comments:
-            comment_author = current_app.db.session.get(User, comment.author_id)
-            replies = current_app.db.session.query(Comment).filter(
-                Comment.parent_id == comment.id
-            ).all()
-            
-            reply_data = []
-            for reply in replies:
-                reply_author = current_app.db.session.get(User, reply.author_id)
-                reply_data.append({
-                    'id': reply.id,
-                    'content': reply.content,
-                    'author': {
-                        'id': reply_author.id,
-                        'username': reply_author.username,
-                        'avatar': reply_author.avatar
-                    },
-                    'created_at': reply.created_at.isoformat()
-                })
-            
-            comments_data.append({
-                'id': comment.id,
-                'content': comment.content,
-                'author': {
-                    'id': comment_author.id,
-                    'username': comment_author.username,
-                    'avatar': comment_author.avatar
-                },
-                'replies': reply_data,
-                'created_at': comment.created_at.isoformat()
-            })
+        if current_user_id:
+            from models.community_post import user_likes_table  # 修复导入路径
+            existing_like = current_app.db.session.query(user_likes_table).filter(
+                user_likes_table.c.user_id == current_user_id,
+                user_likes_table.c.post_id == id
+            ).first()
+            liked_by_current_user = bool(existing_like)
+        
+        # 获取评论树，maxDepth 限制回复的嵌套层数
+        max_depth = request.args.get('maxDepth', type=int)
+        comments_data = build_comment_tree(id, max_depth=max_depth)
+        
+        # 获取作者信息
+        author = hydrate_authors([post], with_bio=True)[post.author_id]
         
         return jsonify({
             'success': True,
@@ -155,14 +184,9 @@ def get_post(id):
                 'id': post.id,
                 'title': post.title,
                 'content': post.content,
-                'author': {
-                    'id': author.id,
-                    'username': author.username,
-                    'avatar': author.avatar,
-                    'bio': author.bio
-                },
+                'author': author,
                 'category': post.category,
-                'view_count': post.view_count,
+                'view_count': (post.view_count or 0) + pending_views,
                 'like_count': post.like_count,
                 'comment_count': post.comment_count,
                 'created_at': post.created_at.isoformat(),
@@ -197,6 +221,8 @@ def create_post():
         
         current_app.db.session.add(post)
         current_app.db.session.commit()
+        response_cache.invalidate('posts')
+        _update_recommendations(post.id, post)
         
         return jsonify({
             'success': True,
@@ -211,6 +237,17 @@ def create_post():
         return jsonify({'message': '发布帖子失败: ' + str(e)}), 500
 
 
+def _update_recommendations(post_id, post=None):
+    # 增量更新相似帖子索引（post 为 None 表示已删除），索引失败不影响帖子的发布和修改
+    try:
+        if post is None or post.status != 'published':
+            recommender.posts.remove(post_id)
+        else:
+            recommender.posts.upsert(post)
+    except Exception as e:
+        current_app.logger.warning(f"更新相似帖子索引失败: {str(e)}")
+
+
 @community_bp.route('/posts/<int:id>', methods=['PUT'])
 @jwt_required()
 def update_post(id):
@@ -219,12 +256,11 @@ def update_post(id):
         current_user_id = get_jwt_identity()
         post = current_app.db.session.get(CommunityPost, id)
         
-        if not post:
+        if not post or post.status == POST_DELETED:
             return jsonify({'message': '帖子不存在'}), 404
         
         # 检查权限：只有作者或管理员可以编辑
-        user = current_app.db.session.get(User, current_user_id)
-        if post.author_id != current_user_id and user.role != 'admin':
+        if post.author_id != current_user_id and not identity_cache.is_admin(current_user_id):
             return jsonify({'message': '没有权限编辑此帖子'}), 403
         
         data = request.get_json()
@@ -236,6 +272,9 @@ def update_post(id):
             post.category = data['category']
         
         current_app.db.session.commit()
+        response_cache.invalidate('posts')
+        if 'title' in data or 'content' in data:
+            _update_recommendations(post.id, post)
         
         return jsonify({
             'success': True,
@@ -258,22 +297,19 @@ def delete_post(id):
         current_user_id = get_jwt_identity()
         post = current_app.db.session.get(CommunityPost, id)
         
-        if not post:
+        if not post or post.status == POST_DELETED:
             return jsonify({'message': '帖子不存在'}), 404
         
         # 检查权限：只有作者或管理员可以删除
-        user = current_app.db.session.get(User, current_user_id)
-        if post.author_id != current_user_id and user.role != 'admin':
+        if post.author_id != current_user_id and not identity_cache.is_admin(current_user_id):
             return jsonify({'message': '没有权限删除此帖子'}), 403
         
-        # 删除相关评论
-        from sqlalchemy import delete
-        stmt = delete(Comment).where(Comment.post_id == id)
-        current_app.db.session.execute(stmt)
-        
-        # 删除帖子
-        current_app.db.session.delete(post)
+        # 只标记为已删除，评论、点赞记录和帖子本身由后台任务分批清理
+        post.status = POST_DELETED
         current_app.db.session.commit()
+        response_cache.invalidate('posts')
+        _update_recommendations(id)
+        post_purger.wake()
         
         return jsonify({
             'success': True,
@@ -290,48 +326,20 @@ def like_post(id):
     """点赞或取消点赞帖子"""
     try:
         current_user_id = get_jwt_identity()
-        post = current_app.db.session.get(CommunityPost, id)
         
-        if not post:
+        # 在一个事务内完成点赞/取消点赞和点赞数更新（未发布的帖子只有作者和管理员可以点赞）
+        result = toggle_post_like(id, current_user_id, include_unpublished=identity_cache.is_admin(current_user_id))
+        if result is None:
             return jsonify({'message': '帖子不存在'}), 404
-            
-        # 检查用户是否已经点赞
-        from models.community_post import user_likes_table  # 修复导入路径
-        existing_like = current_app.db.session.query(user_likes_table).filter(
-            user_likes_table.c.user_id == current_user_id,
-            user_likes_table.c.post_id == id
-        ).first()
-        
-        if existing_like:
-            # 如果已点赞，则取消点赞
-            current_app.db.session.execute(
-                user_likes_table.delete().where(
-                    user_likes_table.c.user_id == current_user_id
-                ).where(
-                    user_likes_table.c.post_id == id
-                )
-            )
-            post.like_count = max(0, post.like_count - 1)  # 确保不会小于0
-            message = '取消点赞成功'
-            liked = False
-        else:
-            # 如果未点赞，则添加点赞
-            current_app.db.session.execute(
-                user_likes_table.insert().values(
-                    user_id=current_user_id,
-                    post_id=id
-                )
-            )
-            post.like_count += 1
-            message = '点赞成功'
-            liked = True
         
-        current_app.db.session.commit()
+        liked, like_count = result
+        response_cache.invalidate('posts')
+        message = '点赞成功' if liked else '取消点赞成功'
         
         return jsonify({
             'success': True,
             'message': message,
-            'like_count': post.like_count,
+            'like_count': like_count,
             'liked': liked
         })
     except Exception as e:
@@ -339,60 +347,142 @@ def like_post(id):
         return jsonify({'message': '操作失败: ' + str(e)}), 500
 
 
+@community_bp.route('/posts/<int:id>/status', methods=['PUT'])
+@jwt_required()
+def update_post_status(id):
+    """修改帖子状态（仅管理员）：draft、published、hidden、deleted，已删除但尚未清理的帖子可以恢复"""
+    try:
+        if not identity_cache.is_admin(get_jwt_identity()):
+            return jsonify({'message': '没有权限修改帖子状态'}), 403
+        
+        status = (request.get_json() or {}).get('status')
+        if status not in POST_STATUSES:
+            return jsonify({'message': f'status 必须是 {", ".join(POST_STATUSES)} 之一'}), 400
+        
+        post = current_app.db.session.get(CommunityPost, id)
+        if not post:
+            return jsonify({'message': '帖子不存在'}), 404
+        
+        old_status = post.status
+        post.status = status
+        current_app.db.session.commit()
+        if old_status != status:
+            response_cache.invalidate('posts')
+            _update_recommendations(post.id, post)
+            if status == POST_DELETED:
+                post_purger.wake()
+        
+        return jsonify({
+            'success': True,
+            'message': '帖子状态已更新',
+            'data': {'id': post.id, 'status': post.status}
+        })
+    except Exception as e:
+        current_app.db.session.rollback()
+        return jsonify({'message': '修改帖子状态失败: ' + str(e)}), 500
+
+
+@community_bp.route('/purge', methods=['GET'])
+@jwt_required()
+def get_purge_status():
+    """已删除帖子的后台清理进度（仅管理员）"""
+    try:
+        if not identity_cache.is_admin(get_jwt_identity()):
+            return jsonify({'message': '没有权限查看清理进度'}), 403
+        
+        return jsonify({
+            'success': True,
+            'data': post_purger.status(current_app.db.session)
+        })
+    except Exception as e:
+        return jsonify({'message': '获取清理进度失败: ' + str(e)}), 500
+
+
+def _comment_page(query, sort, descending):
+    """按游标分页读取评论（cursor 为空时返回第一页），返回 (评论数据列表, 分页信息)"""
+    cursor = request.args.get('cursor', '')
+    limit = max(1, min(request.args.get('limit', 20, type=int), MAX_COMMENT_PAGE_SIZE))
+    comments, next_cursor = paginate_keyset(query, sort, COMMENT_SORT_KEYS, cursor, limit, descending=descending)
+    
+    # 批量获取评论作者信息
+    authors = hydrate_authors(comments)
+    comments_data = [{
+        'id': comment.id,
+        'content': comment.content,
+        'created_at': comment.created_at.isoformat(),
+        'updated_at': comment.updated_at.isoformat(),
+        'author': authors[comment.author_id],
+        'reply_count': comment.reply_count or 0
+    } for comment in comments]
+    
+    pagination = {
+        'limit': limit,
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    }
+    return comments_data, pagination
+
+
 @community_bp.route('/posts/<int:post_id>/comments', methods=['GET'])
+@read_replica
 def get_comments(post_id):
-    """获取帖子的评论列表"""
+    """获取帖子的一级评论（按时间倒序游标分页，回复通过回复列表接口按需加载）"""
     try:
         # 获取帖子
         post = current_app.db.session.get(CommunityPost, post_id)
-        if not post:
+        if not _can_view_post(post, _current_user_id()):
             return jsonify({'message': '帖子不存在'}), 404
         
-        # 查询帖子的评论，并按时间倒序排列
-        comments = current_app.db.session.query(Comment).filter(
+        # 只获取一级评论，不包含回复
+        query = current_app.db.session.query(Comment).filter(
             Comment.post_id == post_id,
-            Comment.parent_id.is_(None)  # 只获取一级评论，不包含回复
-        ).order_by(Comment.created_at.desc()).all()
-        
-        # 获取评论作者信息
-        from models.user import User
-        comments_data = []
-        for comment in comments:
-            author = current_app.db.session.get(User, comment.author_id)
-            # 确保即使作者不存在也有默认值
-            if author and author.avatar:
-                # 使用用户上传的头像
-                avatar_url = author.avatar
-            elif author:
-                # 如果用户存在但没有头像，使用基于用户名首字母+ID的头像
-                initial = author.username[0].upper() if author.username else 'U'
-                avatar_url = f'https://picsum.photos/seed/{initial}{author.id}/100'
-            else:
-                # 如果作者不存在，使用默认头像
-                avatar_url = f'https://picsum.photos/seed/default{comment.author_id}/100'
-                
-            author_data = {
-                'id': author.id if author else None,
-                'username': author.username if author else '匿名用户',
-                'avatar': avatar_url
-            }
-            comments_data.append({
-                'id': comment.id,
-                'content': comment.content,
-                'created_at': comment.created_at.isoformat(),
-                'updated_at': comment.updated_at.isoformat(),
-                'author': author_data
-            })
+            Comment.parent_id.is_(None)
+        )
+        comments_data, pagination = _comment_page(query, 'comments', descending=True)
         
         return jsonify({
             'success': True,
             'data': comments_data,
-            'count': len(comments_data)
+            'count': len(comments_data),
+            'pagination': pagination
         })
+    except ValueError as e:
+        # 游标无效
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': '获取评论失败: ' + str(e)}), 500
 
 
+@community_bp.route('/comments/<int:comment_id>/replies', methods=['GET'])
+@read_replica
+def get_replies(comment_id):
+    """获取评论的直接回复（按时间正序游标分页）"""
+    try:
+        comment = current_app.db.session.get(Comment, comment_id)
+        if not comment:
+            return jsonify({'message': '评论不存在'}), 404
+        
+        # 帖子对当前用户不可见（已删除或未发布）时其评论也按不存在处理
+        post = current_app.db.session.get(CommunityPost, comment.post_id)
+        if not _can_view_post(post, _current_user_id()):
+            return jsonify({'message': '评论不存在'}), 404
+        
+        query = current_app.db.session.query(Comment).filter(Comment.parent_id == comment_id)
+        replies_data, pagination = _comment_page(query, 'replies', descending=False)
+        
+        return jsonify({
+            'success': True,
+            'data': replies_data,
+            'count': len(replies_data),
+            'pagination': pagination
+        })
+    except ValueError as e:
+        # 游标无效
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': '获取回复失败: ' + str(e)}), 500
+
+
 @community_bp.route('/posts/<int:post_id>/comments', methods=['POST'])
 @jwt_required()
 def add_comment(post_id):
@@ -406,7 +496,7 @@ def add_comment(post_id):
         
         # 检查帖子是否存在
         post = current_app.db.session.get(CommunityPost, post_id)
-        if not post:
+        if not _can_view_post(post, current_user_id):
             return jsonify({'message': '帖子不存在'}), 404
         
         comment = Comment(
@@ -423,32 +513,23 @@ def add_comment(post_id):
             comment.parent_id = parent_comment.id
         
         current_app.db.session.add(comment)
+        if comment.parent_id:
+            # 父评论的回复数
+            current_app.db.session.execute(
+                update(Comment).where(Comment.id == comment.parent_id)
+                .values(reply_count=func.coalesce(Comment.reply_count, 0) + 1)
+            )
         current_app.db.session.commit()
         
-        # 更新评论数
+        # 更新评论数和热度分
         post.comment_count += 1
+        current_app.db.session.flush()
+        refresh_hot_scores([post.id])
         current_app.db.session.commit()
+        response_cache.invalidate('posts')
         
-        # 获取评论作者信息用于返回
-        from models.user import User
-        author = current_app.db.session.get(User, current_user_id)
-        # 根据作者信息生成头像URL
-        if author and author.avatar:
-            # 使用用户上传的头像
-            avatar_url = author.avatar
-        elif author:
-            # 如果用户存在但没有头像，使用基于用户名首字母+ID的头像
-            initial = author.username[0].upper() if author.username else 'U'
-            avatar_url = f'https://picsum.photos/seed/{initial}{author.id}/100'
-        else:
-            # 如果作者不存在，使用默认头像
-            avatar_url = f'https://picsum.photos/seed/default{current_user_id}/100'
-        
-        author_data = {
-            'id': author.id if author else None,
-            'username': author.username if author else '匿名用户',
-            'avatar': avatar_url
-        }
+        # 评论作者即当前用户，从身份缓存生成作者信息
+        author_data = author_payload(identity_cache.get(current_user_id), current_user_id)
         
         return jsonify({
             'success': True,
@@ -465,43 +546,34 @@ def add_comment(post_id):
 
 
 @community_bp.route('/posts/related/<int:post_id>', methods=['GET'])
+@response_cache.cached('posts')
+@read_replica
 def get_related_posts(post_id):
     """获取相关帖子"""
     try:
         # 获取当前帖子
         current_post = current_app.db.session.get(CommunityPost, post_id)
-        if not current_post:
+        if not _can_view_post(current_post, _current_user_id()):
             return jsonify({'message': '帖子不存在'}), 404
         
-        # 获取参数
-        category = request.args.get('category', '')
         limit = request.args.get('limit', 2, type=int)
         
-        # 查询相关帖子：同类别的其他帖子
-        query = current_app.db.session.query(CommunityPost).filter(
-            CommunityPost.id != post_id,  # 排除当前帖子
-            CommunityPost.status == 'published',  # 只查询已发布的帖子
-            CommunityPost.category == current_post.category  # 同一类别
+        # 内容相似的帖子（预先计算的近邻），不足时以同类别按热度分排序的帖子补足
+        related_posts = related_items(
+            current_app.db.session, recommender.posts, current_post, limit,
+            [CommunityPost.hot_score.desc(), CommunityPost.id.desc()]
         )
         
-        # 按点赞数和评论数排序
-        related_posts = query.order_by(
-            (CommunityPost.like_count + CommunityPost.comment_count).desc()
-        ).limit(limit).all()
+        # 批量获取作者信息
+        authors = hydrate_authors(related_posts)
         
         result = []
         for post in related_posts:
-            # 获取作者信息
-            author = current_app.db.session.get(User, post.author_id)
             result.append({
                 'id': post.id,
                 'title': post.title,
                 'content': post.content[:150] + '...' if len(post.content) > 150 else post.content,
-                'author': {
-                    'id': author.id if author else None,
-                    'username': author.username if author else '匿名用户',
-                    'avatar': author.avatar if author and hasattr(author, 'avatar') else None
-                },
+                'author': authors[post.author_id],
                 'category': post.category,
                 'view_count': post.view_count,
                 'like_count': post.like_count,
@@ -509,10 +581,14 @@ def get_related_posts(post_id):
                 'created_at': post.created_at.isoformat(),
             })
         
-        return jsonify({
+        response = jsonify({
             'success': True,
             'data': result
         })
+        if current_post.status != 'published':
+            # 只有作者和管理员能看到的结果不能进入共享的响应缓存
+            response.cache_control.private = True
+        return response
     except Exception as e:
         return jsonify({'message': '获取相关帖子失败: ' + str(e)}), 500
 
@@ -525,14 +601,15 @@ def delete_comment(comment_id):
         current_user_id = get_jwt_identity()
         comment = current_app.db.session.get(Comment, comment_id)
         
-        if not comment:
+        if not comment or not _can_view_post(comment.post, current_user_id):
             return jsonify({'message': '评论不存在'}), 404
         
         # 检查权限：只有评论作者或管理员可以删除
-        user = current_app.db.session.get(User, current_user_id)
-        if comment.author_id != current_user_id and user.role != 'admin':
+        if comment.author_id != current_user_id and not identity_cache.is_admin(current_user_id):
             return jsonify({'message': '没有权限删除此评论'}), 403
         
+        parent_id = comment.parent_id
+        
         # 删除评论及其所有回复
         from sqlalchemy import delete
         # 先删除回复
@@ -543,6 +620,13 @@ def delete_comment(comment_id):
         stmt_main = delete(Comment).where(Comment.id == comment_id)
         current_app.db.session.execute(stmt_main)
         
+        # 删除的是回复时减少父评论的回复数
+        if parent_id:
+            current_app.db.session.execute(
+                update(Comment).where(Comment.id == parent_id, Comment.reply_count > 0)
+                .values(reply_count=Comment.reply_count - 1)
+            )
+        
         # 更新帖子的评论计数
         post = current_app.db.session.get(CommunityPost, comment.post_id)
         if post:
@@ -552,7 +636,10 @@ def delete_comment(comment_id):
                 Comment.parent_id.is_(None)
             ).count()
             post.comment_count = remaining_comments
+            current_app.db.session.flush()
+            refresh_hot_scores([post.id])
             current_app.db.session.commit()
+            response_cache.invalidate('posts')
         
         return jsonify({
             'success': True,
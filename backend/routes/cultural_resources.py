@@ -1,38 +1,81 @@
 from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.cultural_resource import CulturalResource
+from services.cache import response_cache
+from services.db_routing import read_replica
+from services.facets import aggregate_facets, facet_counts
+from services.identity_cache import identity_cache
+from services.pagination import paginate_keyset, cached_count, encode_cursor, decode_cursor
+from services.recommender import recommender, related_items
+from services.resources import PUBLISHED_STATUS, RESOURCE_STATUSES, resource_values, validate_resource
+from services.search import search_index
+from services.tags import attach_tags, filter_ids_by_tags, parse_tag_args, tag_filter
+from services.view_counter import view_counter
 from sqlalchemy import text
 import math
 
 
 cultural_resources_bp = Blueprint('cultural_resources', __name__, url_prefix='/api/resources')
 
+# 资源列表的排序键（均为降序，以 id 作为最后的唯一键）
+RESOURCE_SORT_KEYS = [
+    (CulturalResource.priority, lambda resource: resource.priority),
+    (CulturalResource.id, lambda resource: resource.id)
+]
+
 
 @cultural_resources_bp.route('/', methods=['GET'])
+@response_cache.cached('resources')
+@read_replica
 def get_resources():
-    """获取文化资源列表"""
+    """获取已发布的文化资源列表"""
     try:
         page = request.args.get('page', 1, type=int)
         limit = request.args.get('limit', 10, type=int)
         category = request.args.get('category')
         search = request.args.get('search')
+        cursor = request.args.get('cursor')  # 传入cursor参数（首页为空字符串）即启用游标分页
+        tags, tag_mode = parse_tag_args(request.args)  # tag=a&tag=b 或 tag=a,b，tagMode=any 表示任一标签
         
-        offset = (page - 1) * limit
-        
-        # 构建查询
-        query = current_app.db.session.query(CulturalResource)
+        # 构建查询：只返回已发布的资源（与分面统计的范围一致）
+        query = current_app.db.session.query(CulturalResource).filter(CulturalResource.status == PUBLISHED_STATUS)
         
         if category:
             query = query.filter(CulturalResource.category == category)
-            
-        if search:
-            query = query.filter(
-                CulturalResource.title.contains(search) |
-                CulturalResource.description.contains(search)
-            )
+        if tags:
+            query = query.filter(tag_filter(tags, tag_mode))
         
-        total = query.count()
-        resources = query.offset(offset).limit(limit).all()
+        count_key = ('cultural_resources', category, tuple(sorted(tags)), tag_mode if tags else None)
+        
+        if search:
+            # 全文检索：按相关度排序，分页在检索结果上进行
+            resources, pagination = _search_resources(query, search, category, page, limit, cursor, tags, tag_mode)
+        elif cursor is not None:
+            # 游标分页：按优先级和id定位，不再扫描被跳过的行
+            limit = max(1, limit)
+            resources, next_cursor = paginate_keyset(query, 'priority', RESOURCE_SORT_KEYS, cursor, limit)
+            
+            pagination = {
+                'limit': limit,
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
+            }
+            if request.args.get('withTotal', 'false').lower() in ('1', 'true'):
+                pagination['total'] = cached_count(count_key, query)
+        else:
+            # 按排序优先级排列
+            query = query.order_by(*[column.desc() for column, _ in RESOURCE_SORT_KEYS])
+            
+            offset = (page - 1) * limit
+            total = cached_count(count_key, query)
+            resources = query.offset(offset).limit(limit).all()
+            
+            pagination = {
+                'page': page,
+                'limit': limit,
+                'total': total,
+                'pages': math.ceil(total / limit)
+            }
         
         result = [{
             'id': r.id,
@@ -51,15 +94,96 @@ def get_resources():
         return jsonify({
             'success': True,
             'data': result,
-            'pagination': {
-                'page': page,
-                'limit': limit,
+            'pagination': pagination
+        })
+    except ValueError as e:
+        # 游标无效
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': '获取文化资源列表失败: ' + str(e)}), 500
+
+
+@cultural_resources_bp.route('/facets', methods=['GET'])
+@response_cache.cached('resources')
+@read_replica
+def get_resource_facets():
+    """获取已发布资源的分类、类型和标签统计，可按 category、tag、search 缩小范围"""
+    try:
+        category = request.args.get('category')
+        search = request.args.get('search')
+        tags, tag_mode = parse_tag_args(request.args)
+        tag_limit = request.args.get('tagLimit', current_app.config.get('FACET_TAG_LIMIT', 50), type=int)
+        session = current_app.db.session
+        
+        if not (category or search or tags):
+            # 全量统计：进程内缓存并按增量更新
+            total, facets = facet_counts.get(session)
+        else:
+            conditions = []
+            if category:
+                conditions.append(CulturalResource.category == category)
+            if tags:
+                conditions.append(tag_filter(tags, tag_mode))
+            resource_ids = None
+            if search:
+                resource_ids = list(search_index.match(search, category=category))
+            total, facets = aggregate_facets(session, conditions, resource_ids)
+        
+        def buckets(counter, limit=None):
+            items = sorted(counter.items(), key=lambda item: (-item[1], item[0] or ''))
+            return [{'value': value, 'count': count} for value, count in items[:limit]]
+        
+        return jsonify({
+            'success': True,
+            'data': {
                 'total': total,
-                'pages': math.ceil(total / limit)
+                'category': buckets(facets['category']),
+                'type': buckets(facets['type']),
+                'tags': buckets(facets['tags'], max(0, tag_limit))
             }
         })
     except Exception as e:
-        return jsonify({'message': '获取文化资源列表失败: ' + str(e)}), 500
+        return jsonify({'message': '获取资源统计失败: ' + str(e)}), 500
+
+
+def _search_resources(query, search, category, page, limit, cursor, tags=None, tag_mode='all'):
+    """在全文索引的检索结果上分页，返回 (资源列表, 分页信息)"""
+    # 先取匹配的资源id（不打分）统计总数、按标签过滤，只对本页及之前的结果排序
+    matched_ids = search_index.match(search, category=category)
+    if tags:
+        matched_ids = set(filter_ids_by_tags(current_app.db.session, sorted(matched_ids), tags, tag_mode))
+    total = len(matched_ids)
+    
+    if cursor is not None:
+        limit = max(1, limit)
+        start = decode_cursor(cursor, 'relevance', types=[int])[0] if cursor else 0
+        if start < 0:
+            raise ValueError('无效的游标')
+        has_more = start + limit < total
+        pagination = {
+            'limit': limit,
+            'next_cursor': encode_cursor('relevance', [start + limit]) if has_more else None,
+            'has_more': has_more,
+            'total': total
+        }
+    else:
+        start = max(0, (page - 1) * limit)
+        pagination = {
+            'page': page,
+            'limit': limit,
+            'total': total,
+            'pages': math.ceil(total / limit)
+        }
+    
+    page_ids = []
+    if start < total:
+        ranked = search_index.search(search, category=category, limit=start + max(0, limit), within=matched_ids)
+        page_ids = [doc_id for doc_id, _ in ranked[start:]]
+    
+    # 按检索得分的顺序返回本页资源
+    rows = query.filter(CulturalResource.id.in_(page_ids)).all() if page_ids else []
+    rows_by_id = {r.id: r for r in rows}
+    return [rows_by_id[doc_id] for doc_id in page_ids if doc_id in rows_by_id], pagination
 
 
 @cultural_resources_bp.route('/<int:id>', methods=['GET'])
@@ -68,13 +192,13 @@ def get_resource(id):
     try:
         resource = current_app.db.session.get(CulturalResource, id)
         
-        if not resource:
+        # 未发布（草稿、已下线）的资源不对外展示
+        if not resource or resource.status != PUBLISHED_STATUS:
             return jsonify({'message': '文化资源不存在'}), 404
             
-        # 增加浏览量（排除作者自己）
+        # 增加浏览量：计入写缓冲，由后台批量写回数据库
         # 这里暂时不考虑身份验证，后续可以根据需要添加
-        resource.view_count += 1
-        current_app.db.session.commit()
+        pending_views = view_counter.incr('cultural_resources', resource.id)
         
         return jsonify({
             'success': True,
@@ -90,7 +214,7 @@ def get_resource(id):
                 'source': resource.source,
                 'cover_image': resource.cover_image,
                 'media_url': resource.media_url,
-                'view_count': resource.view_count,
+                'view_count': (resource.view_count or 0) + pending_views,
                 'like_count': resource.like_count,
                 'created_at': resource.created_at.isoformat(),
                 'updated_at': resource.updated_at.isoformat()
@@ -100,6 +224,64 @@ def get_resource(id):
         return jsonify({'message': '获取文化资源失败: ' + str(e)}), 500
 
 
+@cultural_resources_bp.route('/<int:id>/related', methods=['GET'])
+@response_cache.cached('resources')
+@read_replica
+def get_related_resources(id):
+    """获取内容相似的文化资源"""
+    try:
+        resource = current_app.db.session.get(CulturalResource, id)
+        
+        if not resource or resource.status != PUBLISHED_STATUS:
+            return jsonify({'message': '文化资源不存在'}), 404
+        
+        limit = request.args.get('limit', 4, type=int)
+        
+        # 预先计算的近邻，不足时以同分类按优先级排序的资源补足
+        related_resources = related_items(
+            current_app.db.session, recommender.resources, resource, limit,
+            [CulturalResource.priority.desc(), CulturalResource.id.desc()]
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': [{
+                'id': r.id,
+                'title': r.title,
+                'description': r.description,
+                'type': r.type,
+                'category': r.category,
+                'tags': r.tags.split(',') if r.tags else [],
+                'author': r.author,
+                'cover_image': r.cover_image,
+                'view_count': r.view_count,
+                'like_count': r.like_count,
+                'created_at': r.created_at.isoformat(),
+            } for r in related_resources]
+        })
+    except Exception as e:
+        return jsonify({'message': '获取相关文化资源失败: ' + str(e)}), 500
+
+
+def _update_search_index(resource):
+    # 增量更新全文索引（未发布的资源从索引中移除），索引失败不影响资源的创建和修改
+    try:
+        search_index.add_resource(resource)
+    except Exception as e:
+        current_app.logger.warning(f"更新全文索引失败: {str(e)}")
+
+
+def _update_recommendations(resource):
+    # 增量更新相似资源索引，索引失败不影响资源的创建和修改
+    try:
+        if resource.status == PUBLISHED_STATUS:
+            recommender.resources.upsert(resource)
+        else:
+            recommender.resources.remove(resource.id)
+    except Exception as e:
+        current_app.logger.warning(f"更新相似资源索引失败: {str(e)}")
+
+
 @cultural_resources_bp.route('/<int:id>/like', methods=['POST'])
 @jwt_required()
 def like_resource(id):
@@ -107,7 +289,7 @@ def like_resource(id):
     try:
         resource = current_app.db.session.get(CulturalResource, id)
         
-        if not resource:
+        if not resource or resource.status != PUBLISHED_STATUS:
             return jsonify({'message': '文化资源不存在'}), 404
             
         resource.like_count += 1
@@ -122,6 +304,41 @@ def like_resource(id):
         return jsonify({'message': '点赞失败: ' + str(e)}), 500
 
 
+@cultural_resources_bp.route('/<int:id>/status', methods=['PUT'])
+@jwt_required()
+def update_resource_status(id):
+    """修改文化资源状态（仅管理员）：draft、published、archived"""
+    try:
+        if not identity_cache.is_admin(get_jwt_identity()):
+            return jsonify({'message': '没有权限修改资源状态'}), 403
+        
+        status = (request.get_json() or {}).get('status')
+        if status not in RESOURCE_STATUSES:
+            return jsonify({'message': f'status 必须是 {", ".join(RESOURCE_STATUSES)} 之一'}), 400
+        
+        resource = current_app.db.session.get(CulturalResource, id)
+        if not resource:
+            return jsonify({'message': '文化资源不存在'}), 404
+        
+        old_status = resource.status
+        resource.status = status
+        current_app.db.session.commit()
+        if old_status != status:
+            response_cache.invalidate('resources')
+            facet_counts.resource_status_changed(current_app.db.session, resource, old_status)
+            _update_search_index(resource)
+            _update_recommendations(resource)
+        
+        return jsonify({
+            'success': True,
+            'message': '资源状态已更新',
+            'data': {'id': resource.id, 'status': resource.status}
+        })
+    except Exception as e:
+        current_app.db.session.rollback()
+        return jsonify({'message': '修改资源状态失败: ' + str(e)}), 500
+
+
 @cultural_resources_bp.route('/', methods=['POST'])
 @jwt_required()
 def create_resource():
@@ -129,27 +346,23 @@ def create_resource():
     try:
         data = request.get_json()
         
-        # 验证必需字段
-        required_fields = ['title', 'content', 'type', 'category']
-        for field in required_fields:
-            if not data.get(field):
-                return jsonify({'message': f'{field} 是必需的'}), 400
-        
-        resource = CulturalResource(
-            title=data['title'],
-            description=data.get('description'),
-            content=data['content'],
-            type=data['type'],
-            category=data['category'],
-            tags=','.join(data.get('tags', [])),
-            author=data.get('author'),
-            source=data.get('source'),
-            cover_image=data.get('cover_image'),
-            media_url=data.get('media_url')
-        )
+        # 验证必需字段（与批量导入共用同一套校验）
+        error = validate_resource(data)
+        if error:
+            return jsonify({'message': error}), 400
+        
+        resource = CulturalResource(**resource_values(data))
         
         current_app.db.session.add(resource)
+        current_app.db.session.flush()
+        # 写入标签关联（tags 列保留逗号分隔的标签用于展示）
+        attach_tags(current_app.db.session, [(resource.id, resource.tags)])
         current_app.db.session.commit()
+        response_cache.invalidate('resources')
+        facet_counts.resource_created(current_app.db.session, resource)
+        
+        _update_search_index(resource)
+        _update_recommendations(resource)
         
         return jsonify({
             'success': True,
@@ -0,0 +1,46 @@
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from services.export import EXPORT_MODELS, export_rows, gzip_chunks, ndjson_lines, parse_updated_since
+from services.identity_cache import identity_cache
+
+
+export_bp = Blueprint('export', __name__, url_prefix='/api/export')
+
+
+@export_bp.route('/<name>', methods=['GET'])
+@jwt_required()
+def export_data(name):
+    """
+    以 NDJSON 流式导出整张表（仅管理员）：resources、posts、comments
+
+    查询参数 updated_since（ISO 8601）只导出此后更新过的行，gzip=1 时压缩输出。
+    """
+    try:
+        if not identity_cache.is_admin(get_jwt_identity()):
+            return jsonify({'message': '没有权限导出数据'}), 403
+        if name not in EXPORT_MODELS:
+            return jsonify({'message': f'不支持导出 {name}，可选：{", ".join(EXPORT_MODELS)}'}), 404
+
+        updated_since = parse_updated_since(request.args.get('updated_since'))
+        compress = request.args.get('gzip', 'false').lower() in ('1', 'true')
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': '导出数据失败: ' + str(e)}), 500
+
+    def generate():
+        try:
+            yield from ndjson_lines(export_rows(current_app.db.session, name, updated_since))
+        except Exception as e:
+            # 响应头已经发出，只能记录错误并提前结束，客户端会收到不完整的数据
+            current_app.logger.error(f"导出 {name} 失败: {str(e)}", exc_info=True)
+
+    body = generate()
+    filename = f'{name}.ndjson'
+    headers = {'Cache-Control': 'no-store'}
+    if compress:
+        body = gzip_chunks(body)
+        filename += '.gz'
+        headers['Content-Encoding'] = 'gzip'
+    headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return Response(stream_with_context(body), mimetype='application/x-ndjson', headers=headers)
@@ -1,5 +1,8 @@
-from flask import Blueprint, jsonify, current_app
+from flask import Blueprint, Response, jsonify, current_app, send_from_directory
 from sqlalchemy import text
+from werkzeug.exceptions import NotFound
+from services.avatars import avatar_folder
+from services.metrics import metrics
 
 
 main_bp = Blueprint('main', __name__)
@@ -26,4 +29,21 @@ def health_check():
         current_app.db.session.execute(text('SELECT 1'))
         return jsonify({'status': 'healthy', 'database': 'connected'}), 200
     except Exception as e:
-        return jsonify({'status': 'unhealthy', 'database': 'error', 'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'status': 'unhealthy', 'database': 'error', 'error': str(e)}), 500
+
+
+@main_bp.route('/metrics')
+def metrics_endpoint():
+    """Prometheus 格式的运行指标（多进程部署时汇总所有工作进程）"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+@main_bp.route('/static/avatars/<path:filename>')
+def avatar_file(filename):
+    """头像文件，文件名由内容哈希决定，允许客户端永久缓存"""
+    try:
+        response = send_from_directory(avatar_folder(), filename, max_age=365 * 24 * 3600)
+    except NotFound:
+        return jsonify({'message': '头像不存在'}), 404
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
@@ -0,0 +1,58 @@
+from flask import current_app
+from sqlalchemy.orm import load_only
+from models.user import User
+
+
+def default_avatar(user_id, username=None):
+    """根据用户名首字母和用户ID生成默认头像"""
+    if username:
+        return f'https://picsum.photos/seed/{username[0].upper()}{user_id}/100'
+    return f'https://picsum.photos/seed/default{user_id}/100'
+
+
+def load_authors(author_ids, with_bio=False):
+    """一次IN查询批量加载作者，返回 {user_id: User}"""
+    ids = {author_id for author_id in author_ids if author_id is not None}
+    if not ids:
+        return {}
+
+    columns = [User.id, User.username, User.avatar]
+    if with_bio:
+        columns.append(User.bio)
+
+    users = current_app.db.session.query(User).options(load_only(*columns)).filter(
+        User.id.in_(ids)
+    ).all()
+    return {user.id: user for user in users}
+
+
+def author_payload(author, author_id=None, with_bio=False):
+    """生成统一的作者信息字典 {id, username, avatar}"""
+    if author:
+        data = {
+            'id': author.id,
+            'username': author.username,
+            'avatar': author.avatar or default_avatar(author.id, author.username)
+        }
+        if with_bio:
+            data['bio'] = author.bio
+    else:
+        # 作者不存在时返回匿名用户
+        data = {
+            'id': None,
+            'username': '匿名用户',
+            'avatar': default_avatar(author_id)
+        }
+        if with_bio:
+            data['bio'] = None
+    return data
+
+
+def hydrate_authors(items, with_bio=False):
+    """为一组帖子/评论批量生成作者信息，返回 {author_id: 作者信息字典}"""
+    items = list(items)
+    authors = load_authors((item.author_id for item in items), with_bio=with_bio)
+    return {
+        item.author_id: author_payload(authors.get(item.author_id), item.author_id, with_bio=with_bio)
+        for item in items
+    }
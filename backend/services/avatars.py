@@ -0,0 +1,115 @@
+import base64
+import binascii
+import hashlib
+import os
+import re
+import tempfile
+from flask import current_app
+
+
+# 头像访问路径前缀，对应 avatar_folder() 目录
+AVATAR_URL_PREFIX = '/static/avatars/'
+
+# 允许的图片格式：扩展名 -> 文件头
+IMAGE_SIGNATURES = {
+    'png': (b'\x89PNG\r\n\x1a\n',),
+    'jpg': (b'\xff\xd8\xff',),
+    'gif': (b'GIF87a', b'GIF89a'),
+}
+
+_DATA_URI = re.compile(r'^data:image/[\w.+-]+;base64,', re.IGNORECASE)
+
+
+class InvalidAvatar(ValueError):
+    """头像内容或地址不合法"""
+
+
+def avatar_folder():
+    """头像存储目录：优先使用 AVATAR_UPLOAD_PATH 环境变量"""
+    upload_base = os.environ.get('AVATAR_UPLOAD_PATH', None)
+    if upload_base:
+        upload_folder = os.path.join(upload_base, 'avatars')
+    else:
+        upload_folder = os.path.join(current_app.root_path, '..', 'public', 'static', 'avatars')
+    return os.path.abspath(upload_folder)
+
+
+def image_extension(data):
+    """根据文件头判断图片格式，返回扩展名，不支持的格式返回 None"""
+    for extension, signatures in IMAGE_SIGNATURES.items():
+        if data.startswith(signatures):
+            return extension
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def avatar_url(data):
+    """校验头像内容，返回按内容哈希生成的访问路径 /static/avatars/ab/abcdef....png（不写入文件）"""
+    max_bytes = current_app.config.get('AVATAR_MAX_BYTES', 2 * 1024 * 1024)
+    if not data:
+        raise InvalidAvatar('头像文件为空')
+    if len(data) > max_bytes:
+        raise InvalidAvatar(f'头像文件不能超过 {max_bytes // 1024} KB')
+    extension = image_extension(data)
+    if extension is None:
+        raise InvalidAvatar('不支持的文件格式')
+    digest = hashlib.sha256(data).hexdigest()
+    return f'{AVATAR_URL_PREFIX}{digest[:2]}/{digest}.{extension}'
+
+
+def store_avatar(data):
+    """
+    按内容哈希保存头像，返回访问路径
+
+    相同内容只保存一份；文件名由内容决定，写入后不再变化，可以长期缓存。
+    """
+    url = avatar_url(data)
+    file_path = os.path.join(avatar_folder(), *url[len(AVATAR_URL_PREFIX):].split('/'))
+    if not os.path.exists(file_path):
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        # 先写临时文件再原子重命名，避免并发上传相同内容时读到不完整的文件
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, file_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return url
+
+
+def decode_data_uri(value):
+    """解码 data:image/...;base64, 形式的头像"""
+    match = _DATA_URI.match(value)
+    if not match:
+        raise InvalidAvatar('头像格式不正确')
+    try:
+        return base64.b64decode(value[match.end():], validate=True)
+    except (binascii.Error, ValueError):
+        raise InvalidAvatar('头像数据不是有效的base64编码')
+
+
+def normalize_avatar(value):
+    """
+    规范化写入 users.avatar 的值
+
+    内嵌的 data URI 解码后按内容哈希保存为文件，返回短路径；
+    普通地址原样保留（长度不超过255）；空值返回 None（使用默认头像）。
+    """
+    if value is None or value == '':
+        return None
+    if not isinstance(value, str):
+        # JSON 中的数字、布尔值、对象等不是有效的头像
+        raise InvalidAvatar('头像必须是字符串')
+    value = value.strip()
+    if not value:
+        return None
+    if _DATA_URI.match(value):
+        return store_avatar(decode_data_uri(value))
+    if len(value) > 255 or not (value.startswith(('http://', 'https://')) or value.startswith(AVATAR_URL_PREFIX)):
+        raise InvalidAvatar('头像地址无效')
+    return value
@@ -0,0 +1,270 @@
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+from flask import current_app, make_response, request
+from services.db_routing import recently_wrote
+
+
+class TTLCache:
+    """线程安全的进程内 LRU + TTL 缓存"""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[1] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache:
+    """
+    基于本地 SQLite 文件的缓存，同一台机器上的多个 Gunicorn 进程共享
+
+    每个线程使用独立的连接，启用 WAL 以支持并发读写。
+    """
+
+    def __init__(self, path, ttl=60):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache '
+                '(key TEXT PRIMARY KEY, value BLOB, expires_at REAL)'
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key, default=None):
+        row = self._connect().execute(
+            'SELECT value, expires_at FROM cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            self.misses += 1
+            return default
+        self.hits += 1
+        return pickle.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        self._connect().execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), expires_at)
+        )
+        if random.random() < 0.01:
+            # 偶尔清理过期条目，避免文件无限增长
+            self._connect().execute('DELETE FROM cache WHERE expires_at < ?', (time.time(),))
+
+    def delete(self, key):
+        self._connect().execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def incr(self, key):
+        """原子地将整数值加一并返回新值（不过期）"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT value FROM cache WHERE key = ?', (key,)).fetchone()
+            value = (pickle.loads(row[0]) if row else 0) + 1
+            conn.execute(
+                'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, NULL)',
+                (key, pickle.dumps(value))
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return value
+
+    def clear(self):
+        self._connect().execute('DELETE FROM cache')
+
+
+class RedisCache:
+    """基于 Redis 的缓存，可在多台服务器之间共享，需要安装 redis 包"""
+
+    def __init__(self, url, ttl=60, prefix='huxiang:'):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return pickle.loads(value)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        self.client.set(self.prefix + key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), ex=ttl or None)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+
+class ResponseCache:
+    """
+    列表接口的响应缓存
+
+    缓存键由接口路径和规范化后的查询参数组成，并带上命名空间的版本号。
+    数据变更时调用 invalidate() 递增版本号，版本号保存在所有工作进程共享的存储中
+    （SQLite 文件或 Redis），因此任一进程的写操作都会让所有进程的旧缓存失效。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.backend = None
+        self.signal = None
+        self.ttl = 60
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        backend = (app.config.get('RESPONSE_CACHE_BACKEND') or 'memory').lower()
+        self.ttl = app.config.get('RESPONSE_CACHE_TTL', 60)
+        self.enabled = backend != 'none'
+        app.extensions['response_cache'] = self
+        if not self.enabled:
+            return
+
+        sqlite_path = app.config.get('RESPONSE_CACHE_PATH') or \
+            os.path.join(app.instance_path, 'response_cache.sqlite')
+        if backend == 'redis':
+            self.backend = RedisCache(app.config['RESPONSE_CACHE_REDIS_URL'], ttl=self.ttl)
+            self.signal = self.backend
+        elif backend == 'sqlite':
+            self.backend = SQLiteCache(sqlite_path, ttl=self.ttl)
+            self.signal = self.backend
+        else:
+            self.backend = TTLCache(maxsize=app.config.get('RESPONSE_CACHE_MAXSIZE', 1024), ttl=self.ttl)
+            # 进程内缓存各自独立，版本号放在共享的 SQLite 文件中
+            self.signal = SQLiteCache(sqlite_path)
+
+    def generation(self, namespace):
+        """命名空间当前的版本号；共享存储不可用（Redis 断开、SQLite 被锁）时返回 None"""
+        try:
+            return self.signal.get(f'generation:{namespace}', 0)
+        except Exception as e:
+            current_app.logger.warning(f"读取响应缓存版本号失败，跳过缓存: {str(e)}")
+            return None
+
+    def invalidate(self, *namespaces):
+        """使命名空间下的全部缓存失效（对所有工作进程生效）"""
+        if not self.enabled:
+            return
+        for namespace in namespaces:
+            try:
+                self.signal.incr(f'generation:{namespace}')
+            except Exception as e:
+                # 数据已提交，失效失败时旧缓存最多保留 RESPONSE_CACHE_TTL 秒
+                current_app.logger.error(f"响应缓存失效失败: {str(e)}")
+
+    def _cache_key(self, namespace):
+        """当前请求的缓存键，版本号无法读取时返回 None（不知道是否已失效，不能使用缓存）"""
+        generation = self.generation(namespace)
+        if generation is None:
+            return None
+        args = urlencode(sorted(request.args.items(multi=True)))
+        return f'{namespace}:{generation}:{request.path}?{args}'
+
+    def cached(self, namespace):
+        """缓存 GET 接口的成功响应；缓存是可选的，存储不可用时直接执行接口"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                # 刚写入过数据的客户端跳过缓存，避免读到写入前（或从库延迟）的结果
+                if not self.enabled or request.method != 'GET' or recently_wrote():
+                    return view(*args, **kwargs)
+
+                key = self._cache_key(namespace)
+                if key is None:
+                    return view(*args, **kwargs)
+                try:
+                    cached = self.backend.get(key)
+                except Exception as e:
+                    current_app.logger.warning(f"读取响应缓存失败，跳过缓存: {str(e)}")
+                    return view(*args, **kwargs)
+                if cached is not None:
+                    self.hits += 1
+                    body, mimetype = cached
+                    response = current_app.response_class(body, status=200, mimetype=mimetype)
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+
+                self.misses += 1
+                response = make_response(view(*args, **kwargs))
+                # 只缓存成功且未标记为私有（Cache-Control: private）的响应
+                if response.status_code == 200 and not response.cache_control.private:
+                    try:
+                        self.backend.set(key, (response.get_data(), response.mimetype))
+                    except Exception as e:
+                        current_app.logger.warning(f"写入响应缓存失败: {str(e)}")
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,56 @@
+from flask import current_app
+from models.community_post import Comment
+from services.authors import hydrate_authors
+
+
+def _serialize(comment, authors):
+    return {
+        'id': comment.id,
+        'content': comment.content,
+        'author': authors[comment.author_id],
+        'created_at': comment.created_at.isoformat(),
+        'replies': []
+    }
+
+
+def build_comment_tree(post_id, max_depth=None):
+    """
+    一次性获取帖子的全部评论并在内存中按 parent_id 组装成评论树
+
+    顶级评论按时间倒序，回复按时间正序；max_depth 为回复的最大嵌套层数
+    （0 表示只返回顶级评论），超出部分不返回，并通过 has_more_replies 标记。
+    """
+    comments = current_app.db.session.query(Comment).filter(
+        Comment.post_id == post_id
+    ).all()
+    # 在内存中排序，避免数据库为整个评论集合额外排序
+    comments.sort(key=lambda comment: (comment.created_at, comment.id))
+
+    authors = hydrate_authors(comments)
+
+    children = {}
+    for comment in comments:
+        children.setdefault(comment.parent_id, []).append(comment)
+
+    # 父评论已被删除的孤立回复无法挂到树上，直接忽略
+    tree = []
+    stack = []
+    for comment in reversed(children.get(None, [])):
+        node = _serialize(comment, authors)
+        tree.append(node)
+        stack.append((node, comment, 0))
+
+    # 使用显式栈展开，避免深层回复链触发递归深度限制
+    while stack:
+        node, comment, depth = stack.pop()
+        replies = children.get(comment.id, [])
+        if not replies:
+            continue
+        if max_depth is not None and depth >= max_depth:
+            node['has_more_replies'] = True
+            continue
+        for reply in replies:
+            reply_node = _serialize(reply, authors)
+            node['replies'].append(reply_node)
+            stack.append((reply_node, reply, depth + 1))
+    return tree
@@ -0,0 +1,81 @@
+import time
+from functools import wraps
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+
+# 发生写操作后，客户端在该 Cookie 指定的时间点之前的读请求仍走主库
+PRIMARY_COOKIE = 'db_primary_until'
+
+
+class RoutingSession(Session):
+    """
+    读写分离会话
+
+    被 @read_replica 装饰的只读接口在配置了从库（SQLALCHEMY_BINDS['replica']）时从从库读取；
+    其他接口、flush 写入以及刚写入过数据的客户端一律使用主库。
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _use_replica():
+            engine = self._db.engines.get('replica')
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _use_replica():
+    return has_request_context() and g.get('_db_read_replica', False)
+
+
+def recently_wrote():
+    """当前客户端是否刚写入过数据（仍在读主库的时间窗口内）"""
+    try:
+        return float(request.cookies.get(PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def read_replica(view):
+    """只读接口装饰器：允许从从库读取（客户端刚写入过数据时仍读主库，保证读到自己的写入）"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if recently_wrote():
+            return view(*args, **kwargs)
+        g._db_read_replica = True
+        try:
+            return view(*args, **kwargs)
+        finally:
+            g._db_read_replica = False
+    return wrapper
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _mark_write(session):
+    if has_request_context():
+        g._db_wrote = True
+
+
+class ReplicaRouter:
+    """写操作提交后设置 Cookie，在 REPLICA_STICKY_SECONDS 秒内该客户端的读请求走主库"""
+
+    def __init__(self):
+        self.enabled = False
+        self.sticky_seconds = 5
+
+    def init_app(self, app):
+        self.enabled = 'replica' in (app.config.get('SQLALCHEMY_BINDS') or {})
+        self.sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', 5)
+        app.extensions['replica_router'] = self
+        if self.enabled and self.sticky_seconds > 0:
+            app.after_request(self._stick_to_primary)
+
+    def _stick_to_primary(self, response):
+        if g.get('_db_wrote'):
+            response.set_cookie(PRIMARY_COOKIE, str(time.time() + self.sticky_seconds),
+                                max_age=self.sticky_seconds, httponly=True, samesite='Lax')
+        return response
+
+
+replica_router = ReplicaRouter()
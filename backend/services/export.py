@@ -0,0 +1,97 @@
+import json
+import zlib
+from datetime import date, datetime, timezone
+from sqlalchemy import select
+from models.cultural_resource import CulturalResource
+from models.community_post import CommunityPost, Comment, POST_DELETED
+
+
+# 可导出的数据：名称 -> 模型
+EXPORT_MODELS = {
+    'resources': CulturalResource,
+    'posts': CommunityPost,
+    'comments': Comment,
+}
+
+# 每次从数据库游标读取的行数
+EXPORT_BATCH_SIZE = 1000
+
+# 压缩输出时攒够该字节数再交给压缩器，避免产生大量很小的数据块
+_CHUNK_BYTES = 64 * 1024
+
+
+def parse_updated_since(value):
+    """解析 ISO 8601 时间（带时区时转换为 UTC），数据库中的时间均为不带时区的 UTC 时间"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f'无效的 updated_since: {value}')
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _export_filter(name, table):
+    """已删除（等待后台清理）的帖子及其评论不导出"""
+    deleted_posts = select(CommunityPost.id).where(CommunityPost.status == POST_DELETED)
+    if name == 'posts':
+        return table.c.id.notin_(deleted_posts)
+    if name == 'comments':
+        return table.c.post_id.notin_(deleted_posts)
+    return None
+
+
+def export_rows(session, name, updated_since=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    以服务端游标逐行读取整张表，产出字典
+
+    全量导出按主键顺序读取；指定 updated_since 时只读取此后更新过的行，按 (updated_at, id) 排序，
+    使用 updated_at 索引，调用方可以用最后一行的 updated_at 作为下一次增量导出的起点。
+    """
+    table = EXPORT_MODELS[name].__table__
+    query = select(table)
+    condition = _export_filter(name, table)
+    if condition is not None:
+        query = query.where(condition)
+    if updated_since is not None:
+        query = query.where(table.c.updated_at > updated_since).order_by(table.c.updated_at, table.c.id)
+    else:
+        query = query.order_by(table.c.id)
+
+    # yield_per 开启 stream_results：MySQL 使用非缓冲游标，内存占用与表大小无关
+    result = session.execute(query.execution_options(yield_per=batch_size))
+    try:
+        for row in result.mappings():
+            yield dict(row)
+    finally:
+        result.close()
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'无法序列化的类型: {type(value).__name__}')
+
+
+def ndjson_lines(rows):
+    """每行一个 JSON 对象（UTF-8 编码的字节串）"""
+    for row in rows:
+        yield (json.dumps(row, ensure_ascii=False, default=_json_default) + '\n').encode('utf-8')
+
+
+def gzip_chunks(chunks):
+    """流式 gzip 压缩"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    buffer = []
+    size = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= _CHUNK_BYTES:
+            data = compressor.compress(b''.join(buffer))
+            buffer, size = [], 0
+            if data:
+                yield data
+    yield compressor.compress(b''.join(buffer)) + compressor.flush()
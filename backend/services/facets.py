@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import Counter
+from sqlalchemy import func, select
+from models.cultural_resource import CulturalResource, Tag, resource_tags_table
+from services.cache import response_cache
+from services.resources import PUBLISHED_STATUS
+from services.tags import linked_tag_names
+
+
+# 参与统计的资源状态（与资源列表一致）
+FACET_STATUS = PUBLISHED_STATUS
+
+# IN 列表每批的最大元素数
+_CHUNK_SIZE = 500
+
+
+def aggregate_facets(session, conditions=(), resource_ids=None):
+    """
+    统计资源的分类、类型和标签分布，返回 (总数, {'category': Counter, 'type': Counter, 'tags': Counter})
+
+    分类和类型在同一条 GROUP BY category, type 聚合中得出（走 (status, category, type) 覆盖索引），
+    标签通过关联表聚合。resource_ids 不为 None 时只统计这些资源（全文检索结果），分批执行。
+    """
+    facets = {'category': Counter(), 'type': Counter(), 'tags': Counter()}
+    if resource_ids is None:
+        batches = [list(conditions)]
+    else:
+        batches = [
+            list(conditions) + [CulturalResource.id.in_(resource_ids[start:start + _CHUNK_SIZE])]
+            for start in range(0, len(resource_ids), _CHUNK_SIZE)
+        ]
+
+    for where in batches:
+        where = [CulturalResource.status == FACET_STATUS] + where
+        rows = session.execute(
+            select(CulturalResource.category, CulturalResource.type, func.count())
+            .where(*where)
+            .group_by(CulturalResource.category, CulturalResource.type)
+        ).all()
+        for category, resource_type, count in rows:
+            facets['category'][category] += count
+            facets['type'][resource_type] += count
+
+        tag_rows = session.execute(
+            select(Tag.name, func.count())
+            .select_from(resource_tags_table)
+            .join(Tag, Tag.id == resource_tags_table.c.tag_id)
+            .join(CulturalResource, CulturalResource.id == resource_tags_table.c.resource_id)
+            .where(*where)
+            .group_by(Tag.name)
+        ).all()
+        for name, count in tag_rows:
+            facets['tags'][name] += count
+
+    return sum(facets['category'].values()), facets
+
+
+class FacetCounts:
+    """
+    文化资源的分面统计（分类、类型、标签的资源数）
+
+    不带过滤条件的全量统计保存在进程内，新建资源或资源状态变化时按增量更新，不再重新聚合；
+    其他工作进程通过资源列表缓存的版本号（response_cache 的 'resources' 命名空间）发现变化后重新聚合一次，
+    并每隔 FACET_CACHE_TTL 秒重新聚合以纠正误差。带过滤条件的统计由接口上的响应缓存缓存。
+    """
+
+    def __init__(self):
+        self.ttl = 600
+        self._lock = threading.Lock()
+        self._total = 0
+        self._facets = None
+        self._loaded_at = 0.0
+        self._generation = None
+
+    def init_app(self, app):
+        self.ttl = app.config.get('FACET_CACHE_TTL', 600)
+        app.extensions['facet_counts'] = self
+
+    @staticmethod
+    def _current_generation():
+        return response_cache.generation('resources') if response_cache.enabled else None
+
+    def get(self, session):
+        """返回全量统计 (总数, facets)"""
+        generation = self._current_generation()
+        with self._lock:
+            fresh = (self._facets is not None and generation == self._generation
+                     and time.monotonic() - self._loaded_at < self.ttl)
+            if fresh:
+                # 返回副本，避免调用方遍历时被增量更新修改
+                return self._total, {name: Counter(counter) for name, counter in self._facets.items()}
+        total, facets = aggregate_facets(session)
+        with self._lock:
+            self._total, self._facets = total, facets
+            self._loaded_at = time.monotonic()
+            self._generation = generation
+            return total, {name: Counter(counter) for name, counter in facets.items()}
+
+    def _apply(self, category, resource_type, tag_names, delta):
+        self._total += delta
+        self._facets['category'][category] += delta
+        self._facets['type'][resource_type] += delta
+        for name in tag_names:
+            self._facets['tags'][name] += delta
+        for counter in self._facets.values():
+            for key in [key for key, count in counter.items() if count <= 0]:
+                del counter[key]
+
+    def _record(self, session, resource, delta):
+        # 需在 response_cache.invalidate('resources') 之后调用：版本号恰好只增加了1（即本次写入）时才按增量更新，
+        # 否则说明其他进程也修改了资源，下次读取时重新聚合
+        if self._facets is None:
+            return
+        # 标签按实际关联的 tags.name 计数（与全量聚合一致），而不是资源 tags 列中的写法（如 "tea" 关联到已有的 "Tea"）
+        tag_names = linked_tag_names(session, resource.id)
+        generation = self._current_generation()
+        with self._lock:
+            if self._facets is None:
+                return
+            expected = None if self._generation is None else self._generation + 1
+            if generation != expected:
+                self._facets = None
+                return
+            self._apply(resource.category, resource.type, tag_names, delta)
+            self._generation = generation
+
+    def resource_created(self, session, resource):
+        """新建资源（已写入标签关联）后更新统计"""
+        if resource.status in (None, FACET_STATUS):
+            self._record(session, resource, 1)
+
+    def resource_status_changed(self, session, resource, old_status):
+        """资源状态变化（如发布、下线）后更新统计"""
+        was_counted = old_status == FACET_STATUS
+        is_counted = resource.status == FACET_STATUS
+        if was_counted != is_counted:
+            self._record(session, resource, 1 if is_counted else -1)
+
+    def clear(self):
+        with self._lock:
+            self._facets = None
+
+
+facet_counts = FacetCounts()
@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from flask import current_app
+from sqlalchemy import bindparam, select, update
+from models.community_post import CommunityPost, compute_hot_score
+
+try:
+    import fcntl
+except ImportError:  # Windows 开发环境没有 fcntl，每个进程都会执行定时刷新
+    fcntl = None
+
+
+def refresh_hot_scores(post_ids, session=None):
+    """
+    按最新的点赞数、评论数和浏览量重新计算指定帖子的热度分（不提交事务）
+
+    session 默认为当前请求的会话，也可以传入 Engine 连接。
+    """
+    post_ids = list(set(post_ids))
+    if not post_ids:
+        return 0
+    session = session or current_app.db.session
+
+    rows = session.execute(
+        select(CommunityPost.id, CommunityPost.like_count, CommunityPost.comment_count,
+               CommunityPost.view_count, CommunityPost.created_at)
+        .where(CommunityPost.id.in_(post_ids))
+    ).all()
+    params = [
+        {'post_id': row.id,
+         'score': compute_hot_score(row.like_count, row.comment_count, row.view_count, row.created_at)}
+        for row in rows
+    ]
+    if params:
+        session.execute(
+            update(CommunityPost.__table__)
+            .where(CommunityPost.__table__.c.id == bindparam('post_id'))
+            .values(hot_score=bindparam('score')),
+            params
+        )
+    return len(params)
+
+
+def refresh_all_hot_scores(batch_size=1000, session=None):
+    """按 id 分批重新计算全部帖子的热度分，每批提交一次"""
+    session = session or current_app.db.session
+    last_id, total = 0, 0
+    while True:
+        ids = session.execute(
+            select(CommunityPost.id).where(CommunityPost.id > last_id)
+            .order_by(CommunityPost.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return total
+        total += refresh_hot_scores(ids, session=session)
+        session.commit()
+        last_id = ids[-1]
+
+
+class HotScoreRefresher:
+    """定期全量刷新热度分的后台任务，多个工作进程通过文件锁保证同一时间只有一个在执行"""
+
+    def __init__(self):
+        self.app = None
+        self.interval = 3600
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config.get('HOT_SCORE_REFRESH_INTERVAL', 3600)
+        self.lock_path = os.path.join(app.instance_path, 'hot_score_refresh.lock')
+        app.extensions['hot_score_refresher'] = self
+        if self.interval > 0:
+            app.before_request(self._ensure_worker)
+
+    def _ensure_worker(self):
+        # 在工作进程处理第一个请求时启动，避免线程在 fork 前启动而丢失
+        if self._pid != os.getpid() or not self._thread.is_alive():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='hot-score-refresh', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                self.app.logger.error(f"刷新热度分失败: {str(e)}", exc_info=True)
+
+    def refresh(self):
+        handle = None
+        if fcntl is not None:
+            os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+            last_refresh = os.path.getmtime(self.lock_path) if os.path.exists(self.lock_path) else 0
+            handle = open(self.lock_path, 'a')
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                handle.close()
+                return 0  # 其他进程正在刷新
+            if last_refresh > time.time() - self.interval / 2:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+                handle.close()
+                return 0  # 其他进程刚刚刷新过
+        try:
+            with self.app.app_context():
+                return refresh_all_hot_scores()
+        finally:
+            if handle is not None:
+                os.utime(self.lock_path)
+                fcntl.flock(handle, fcntl.LOCK_UN)
+                handle.close()
+
+
+hot_score_refresher = HotScoreRefresher()
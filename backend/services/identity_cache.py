@@ -0,0 +1,66 @@
+from collections import namedtuple
+from flask import current_app
+from sqlalchemy import select
+from models.user import User
+from services.cache import TTLCache
+
+
+# 鉴权和生成作者信息所需的用户字段
+Identity = namedtuple('Identity', ['id', 'username', 'avatar', 'role', 'is_active'])
+
+
+class IdentityCache:
+    """
+    按 JWT 身份缓存当前用户的基本信息（进程内 LRU + TTL）
+
+    需要登录的写接口只用这些字段判断权限或生成作者信息，命中缓存时不再查询 users 表。
+    修改资料和上传头像后调用 invalidate() 立即失效；其他工作进程中的缓存最多保留
+    IDENTITY_CACHE_TTL 秒。
+    """
+
+    def __init__(self):
+        self._cache = TTLCache(maxsize=4096, ttl=30)
+
+    def init_app(self, app):
+        self._cache = TTLCache(
+            maxsize=app.config.get('IDENTITY_CACHE_MAXSIZE', 4096),
+            ttl=app.config.get('IDENTITY_CACHE_TTL', 30)
+        )
+        app.extensions['identity_cache'] = self
+
+    @property
+    def hits(self):
+        return self._cache.hits
+
+    @property
+    def misses(self):
+        return self._cache.misses
+
+    def get(self, user_id):
+        """返回用户的 Identity，用户不存在时返回 None（不缓存）"""
+        if user_id is None:
+            return None
+        identity = self._cache.get(user_id)
+        if identity is None:
+            row = current_app.db.session.execute(
+                select(User.id, User.username, User.avatar, User.role, User.is_active)
+                .where(User.id == user_id)
+            ).first()
+            if row is None:
+                return None
+            identity = Identity(*row)
+            self._cache.set(user_id, identity)
+        return identity
+
+    def is_admin(self, user_id):
+        identity = self.get(user_id)
+        return identity is not None and identity.role == 'admin'
+
+    def invalidate(self, user_id):
+        self._cache.delete(user_id)
+
+    def clear(self):
+        self._cache.clear()
+
+
+identity_cache = IdentityCache()
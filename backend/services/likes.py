@@ -0,0 +1,79 @@
+from flask import current_app
+from sqlalchemy import and_, case, func, insert, or_, update
+from models.community_post import CommunityPost, POST_DELETED, user_likes_table
+
+
+def _engagement(like_count):
+    # 与 compute_hot_score 相同的互动量，小于1时按1计算
+    engagement = (like_count + 2 * func.coalesce(CommunityPost.comment_count, 0)
+                  + func.coalesce(CommunityPost.view_count, 0) / 10.0)
+    return case((engagement > 1, engagement), else_=1)
+
+
+def toggle_post_like(post_id, user_id, include_unpublished=False):
+    """
+    在同一事务内切换点赞状态，返回 (是否已点赞, 最新点赞数)；帖子对该用户不可见时返回 None
+
+    与帖子详情的可见性一致：已删除的帖子不能点赞；未发布（草稿、隐藏）的帖子只有作者
+    和 include_unpublished 为 True 的用户（管理员）可以点赞。
+
+    先以 INSERT IGNORE 插入点赞记录，插入成功即为点赞；被主键忽略时才删除记录，即为取消点赞。
+    点赞时不会先对 (user_id, post_id) 执行删除，避免 MySQL 在唯一索引上加间隙锁、并发点赞同一帖子时死锁。
+    点赞数和热度分在同一条 UPDATE 中原子地调整，最新点赞数由该语句直接返回。
+    """
+    session = current_app.db.session
+
+    inserted = session.execute(
+        insert(user_likes_table).values(user_id=user_id, post_id=post_id)
+        .prefix_with('IGNORE', dialect='mysql')
+        .prefix_with('OR IGNORE', dialect='sqlite')
+    ).rowcount
+    if inserted:
+        liked, delta = True, 1
+    else:
+        deleted = session.execute(
+            user_likes_table.delete().where(
+                user_likes_table.c.user_id == user_id,
+                user_likes_table.c.post_id == post_id
+            )
+        ).rowcount
+        # 删除不到说明并发请求刚刚取消了点赞，点赞数无需再变化
+        liked, delta = False, -1 if deleted else 0
+
+    old_count = func.coalesce(CommunityPost.like_count, 0)
+    new_count = case((old_count + delta < 0, 0), else_=old_count + delta)  # 确保不会小于0
+    values = []
+    if delta:
+        # 热度分只有互动量一项随点赞变化：减去旧互动量的对数、加上新互动量的对数
+        # （放在 like_count 之前赋值，MySQL 按从左到右的顺序计算 SET，这里读到的仍是旧点赞数）
+        values.append((CommunityPost.hot_score, func.round(
+            CommunityPost.hot_score - func.log10(_engagement(old_count)) + func.log10(_engagement(new_count)), 7
+        )))
+
+    not_deleted = func.coalesce(CommunityPost.status, '') != POST_DELETED
+    visible = not_deleted if include_unpublished else or_(
+        CommunityPost.status == 'published',
+        and_(CommunityPost.author_id == user_id, not_deleted)
+    )
+    statement = update(CommunityPost).where(
+        CommunityPost.id == post_id,
+        visible
+    ).execution_options(synchronize_session=False)
+
+    if session.get_bind().dialect.update_returning:
+        values.append((CommunityPost.like_count, new_count))
+        like_count = session.execute(
+            statement.ordered_values(*values).returning(CommunityPost.like_count)
+        ).scalar()
+        found = like_count is not None
+    else:
+        # MySQL 不支持 UPDATE ... RETURNING：LAST_INSERT_ID(expr) 把新值带回到本条语句结果的 lastrowid 中
+        values.append((CommunityPost.like_count, func.last_insert_id(new_count)))
+        result = session.execute(statement.ordered_values(*values))
+        found, like_count = result.rowcount > 0, result.lastrowid
+
+    if not found:
+        session.rollback()
+        return None
+    session.commit()
+    return liked, like_count
@@ -0,0 +1,340 @@
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from flask import g, request
+
+
+# 请求耗时直方图的默认分桶（秒），与 Prometheus 客户端库一致
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+# 指标名称 -> (类型, 说明)
+METRIC_FAMILIES = {
+    'http_requests_total': ('counter', '按接口、方法和状态码统计的请求数'),
+    'http_request_errors_total': ('counter', '按接口和方法统计的 5xx 错误数'),
+    'http_request_duration_seconds': ('histogram', '按接口和方法统计的请求耗时（秒）'),
+    'http_requests_in_flight': ('gauge', '正在处理的请求数'),
+    'db_pool_size': ('gauge', '连接池常驻连接数上限'),
+    'db_pool_checked_out': ('gauge', '连接池中已借出的连接数'),
+    'db_pool_checked_in': ('gauge', '连接池中空闲的连接数'),
+    'db_pool_overflow': ('gauge', '超出常驻连接数的溢出连接数'),
+    'cache_hits_total': ('counter', '缓存命中次数'),
+    'cache_misses_total': ('counter', '缓存未命中次数'),
+    'cache_hit_ratio': ('gauge', '缓存命中率（命中 / (命中 + 未命中)）'),
+}
+
+
+class Metrics:
+    """
+    Prometheus 格式的运行指标
+
+    按蓝图接口统计请求数、错误数和耗时直方图，并采集正在处理的请求数、连接池使用情况和各缓存的命中率。
+    配置了 METRICS_DIR 时，每个工作进程每隔 METRICS_FLUSH_INTERVAL 秒将自己的指标写入目录下的
+    <pid>.json，/metrics 汇总目录中所有进程的数据：计数器和直方图累加（已退出的进程由 mark_process_dead
+    合并进 exited.json），gauge 只累加仍在运行的进程。未配置时只输出当前进程的指标。
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self.directory = None
+        self.flush_interval = 5
+        self.buckets = DEFAULT_BUCKETS
+        self.caches = {}
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            # Gunicorn 预加载应用后 fork 出的工作进程需要各自的计数和后台线程
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._errors = {}
+        self._durations = {}
+        self._in_flight = 0
+        self._last_flush = 0.0
+        self._thread = None
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('METRICS_ENABLED', True)
+        self.directory = app.config.get('METRICS_DIR')
+        self.flush_interval = app.config.get('METRICS_FLUSH_INTERVAL', 5)
+        self.buckets = tuple(sorted(app.config.get('METRICS_BUCKETS') or DEFAULT_BUCKETS))
+        app.extensions['metrics'] = self
+
+        from services.cache import response_cache
+        from services.identity_cache import identity_cache
+        from services.pagination import _count_cache
+        self.register_cache('response', response_cache)
+        self.register_cache('identity', identity_cache)
+        self.register_cache('count', _count_cache)
+
+        if not self.enabled:
+            return
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            atexit.register(self.flush)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._teardown_request)
+
+    def register_cache(self, name, source):
+        """登记需要统计命中率的缓存，source 需提供 hits 和 misses 属性"""
+        self.caches[name] = source
+
+    def _start_request(self):
+        g._metrics_started = time.perf_counter()
+        with self._lock:
+            self._in_flight += 1
+
+    def _finish_request(self, response):
+        self._observe(response.status_code)
+        return response
+
+    def _teardown_request(self, exc):
+        if g.pop('_metrics_started', None) is None:
+            return
+        if not g.get('_metrics_observed'):
+            # 未生成响应（after_request 之前抛出异常）按 500 计
+            self._observe(500)
+        with self._lock:
+            self._in_flight -= 1
+        if self.directory:
+            self._ensure_worker()
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                try:
+                    self.flush()
+                except OSError as e:
+                    self.app.logger.error(f"写出运行指标失败: {str(e)}")
+
+    def _observe(self, status):
+        started = g.get('_metrics_started')
+        if started is None or g.get('_metrics_observed'):
+            return
+        g._metrics_observed = True
+        duration = time.perf_counter() - started
+        endpoint = request.endpoint or 'unmatched'
+        method = request.method
+        with self._lock:
+            key = (endpoint, method, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+            if status >= 500:
+                self._errors[(endpoint, method)] = self._errors.get((endpoint, method), 0) + 1
+            histogram = self._durations.get((endpoint, method))
+            if histogram is None:
+                histogram = self._durations[(endpoint, method)] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if duration <= bound:
+                    histogram[i] += 1
+            histogram[-2] += duration
+            histogram[-1] += 1
+
+    def _ensure_worker(self):
+        # 空闲的工作进程也要定期写出 gauge，避免汇总时停留在最后一个请求时的值
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='metrics-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                self.app.logger.error(f"写出运行指标失败: {str(e)}", exc_info=True)
+
+    def snapshot(self):
+        """当前进程的指标：{'pid', 'counters', 'gauges', 'histograms'}，每项为 [名称, 标签, 值] 列表"""
+        with self._lock:
+            counters = [['http_requests_total', {'endpoint': e, 'method': m, 'status': s}, n]
+                        for (e, m, s), n in self._requests.items()]
+            counters += [['http_request_errors_total', {'endpoint': e, 'method': m}, n]
+                         for (e, m), n in self._errors.items()]
+            histograms = [['http_request_duration_seconds', {'endpoint': e, 'method': m}, list(h)]
+                          for (e, m), h in self._durations.items()]
+            gauges = [['http_requests_in_flight', {}, self._in_flight]]
+
+        for name, source in self.caches.items():
+            counters.append(['cache_hits_total', {'cache': name}, getattr(source, 'hits', 0)])
+            counters.append(['cache_misses_total', {'cache': name}, getattr(source, 'misses', 0)])
+        gauges += self._pool_gauges()
+        return {'pid': os.getpid(), 'buckets': list(self.buckets),
+                'counters': counters, 'gauges': gauges, 'histograms': histograms}
+
+    def _pool_gauges(self):
+        if self.app is None:
+            return []
+        gauges = []
+        with self.app.app_context():
+            engines = self.app.db.engines
+        for bind, engine in engines.items():
+            pool = engine.pool
+            if not hasattr(pool, 'checkedout'):
+                # 内存 SQLite 等使用 StaticPool，没有连接池统计
+                continue
+            labels = {'bind': bind or 'default'}
+            gauges.append(['db_pool_size', labels, pool.size()])
+            gauges.append(['db_pool_checked_out', labels, pool.checkedout()])
+            gauges.append(['db_pool_checked_in', labels, pool.checkedin()])
+            gauges.append(['db_pool_overflow', labels, max(0, pool.overflow())])
+        return gauges
+
+    def flush(self):
+        """将当前进程的指标写入 METRICS_DIR/<pid>.json"""
+        if not self.directory:
+            return
+        self._last_flush = time.monotonic()
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        # 后台线程和请求结束时都可能写出，临时文件按线程区分
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def collect(self):
+        """汇总所有工作进程的指标"""
+        if not self.directory:
+            return _aggregate([self.snapshot()])
+
+        self.flush()
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                # 文件正在被替换或已损坏，跳过本次
+                continue
+            if not _pid_alive(snapshot.get('pid')):
+                snapshot['gauges'] = []
+            snapshots.append(snapshot)
+        return _aggregate(snapshots)
+
+    def render(self):
+        """以 Prometheus 文本格式输出汇总后的指标"""
+        return render_prometheus(self.collect())
+
+
+# 已退出的工作进程的计数器和直方图合并保存的文件（位于 METRICS_DIR）
+EXITED_SNAPSHOT = 'exited.json'
+
+
+def mark_process_dead(directory, pid):
+    """
+    工作进程退出后（由 Gunicorn 主进程的 child_exit 钩子调用），把它的计数器和直方图合并进 exited.json
+    并删除 <pid>.json：计数器不会因进程退出而减少，pid 被新进程复用时也不会覆盖或重复计算旧数据
+    """
+    path = os.path.join(directory, f'{pid}.json')
+    try:
+        with open(path, encoding='utf-8') as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return
+    snapshots = [snapshot]
+    exited_path = os.path.join(directory, EXITED_SNAPSHOT)
+    try:
+        with open(exited_path, encoding='utf-8') as f:
+            snapshots.insert(0, json.load(f))
+    except (OSError, ValueError):
+        pass
+
+    merged = _aggregate(snapshots)
+    exited = {
+        'pid': None,
+        'buckets': merged['buckets'],
+        'counters': [[name, dict(labels), value] for (name, labels), value in merged['counters'].items()],
+        'gauges': [],
+        'histograms': [[name, dict(labels), values] for (name, labels), values in merged['histograms'].items()],
+    }
+    tmp_path = f'{exited_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(exited, f, ensure_ascii=False)
+    os.replace(tmp_path, exited_path)
+    os.remove(path)
+
+
+def _pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (OSError, TypeError):
+        # 没有权限发送信号说明进程仍存在；pid 无效时按已退出处理
+        return pid is not None
+    return True
+
+
+def _aggregate(snapshots):
+    counters, gauges, histograms = {}, {}, {}
+    buckets = snapshots[0]['buckets'] if snapshots else list(DEFAULT_BUCKETS)
+    for snapshot in snapshots:
+        for target, samples in ((counters, snapshot['counters']), (gauges, snapshot['gauges'])):
+            for name, labels, value in samples:
+                key = (name, tuple(sorted(labels.items())))
+                target[key] = target.get(key, 0) + value
+        if snapshot['buckets'] != buckets:
+            # 分桶配置变更前写出的直方图无法合并
+            continue
+        for name, labels, values in snapshot['histograms']:
+            key = (name, tuple(sorted(labels.items())))
+            merged = histograms.setdefault(key, [0] * len(values))
+            for i, value in enumerate(values):
+                merged[i] += value
+
+    # 命中率由汇总后的命中和未命中次数计算
+    for (name, labels), hits in list(counters.items()):
+        if name == 'cache_hits_total':
+            total = hits + counters.get(('cache_misses_total', labels), 0)
+            gauges[('cache_hit_ratio', labels)] = hits / total if total else 0.0
+    return {'buckets': buckets, 'counters': counters, 'gauges': gauges, 'histograms': histograms}
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        f'{key}="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for key, value in labels
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(data):
+    """将汇总结果格式化为 Prometheus 文本格式（version 0.0.4）"""
+    series = {}
+    for kind in ('counters', 'gauges', 'histograms'):
+        for (name, labels), value in data[kind].items():
+            series.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name, (metric_type, help_text) in METRIC_FAMILIES.items():
+        samples = sorted(series.get(name, []))
+        if not samples:
+            continue
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for labels, value in samples:
+            if metric_type != 'histogram':
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                continue
+            # 分桶计数在记录时已经是累计值（耗时 <= 上界）
+            for bound, count in zip(data['buckets'], value):
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", _format_value(float(bound))),))} {count}')
+            lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {value[-1]}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(value[-2])}')
+            lines.append(f'{name}_count{_format_labels(labels)} {value[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
@@ -0,0 +1,106 @@
+import base64
+import json
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import and_, or_
+from services.cache import TTLCache
+
+
+# 总数缓存：近似值即可，避免每次请求都执行 COUNT(*)
+_count_cache = TTLCache(maxsize=2048)
+
+
+def cached_count(key, query):
+    """返回查询的总数，结果在 COUNT_CACHE_TTL 秒内复用"""
+    total = _count_cache.get(key)
+    if total is None:
+        total = query.order_by(None).count()
+        _count_cache.set(key, total, ttl=current_app.config.get('COUNT_CACHE_TTL', 30))
+    return total
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        return datetime.fromisoformat(value['dt'])
+    return value
+
+
+def encode_cursor(sort, values):
+    """将排序方式和排序键编码为不透明的游标字符串"""
+    payload = json.dumps({'s': sort, 'k': [_encode_value(v) for v in values]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _matches_type(value, expected):
+    # 游标由客户端传回，只接受与排序列类型一致的标量；bool 是 int 的子类，需单独排除
+    if isinstance(value, bool):
+        return expected is bool
+    if expected is float:
+        return isinstance(value, (int, float))
+    return isinstance(value, expected)
+
+
+def _column_type(column):
+    try:
+        return column.type.python_type
+    except (AttributeError, NotImplementedError):
+        return None
+
+
+def decode_cursor(cursor, sort, types=None):
+    """
+    解析游标，游标无效或与排序方式不匹配时抛出 ValueError
+
+    types 为各排序键期望的 Python 类型（如 [datetime, int]），传入时同时校验取值的个数和类型，
+    列表、对象等被篡改的取值不会进入SQL比较。
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values = [_decode_value(v) for v in payload['k']]
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise ValueError('无效的游标') from e
+    if payload.get('s') != sort:
+        raise ValueError('游标与排序方式不匹配')
+    if types is not None:
+        if len(values) != len(types):
+            raise ValueError('无效的游标')
+        for value, expected in zip(values, types):
+            if expected is not None and not _matches_type(value, expected):
+                raise ValueError('无效的游标')
+    return values
+
+
+def paginate_keyset(query, sort, order, cursor, limit, descending=True):
+    """
+    基于游标（keyset）分页
+
+    order 为 [(列或表达式, 取值函数), ...]，全部按降序（descending=False 时全部按升序）排列，
+    最后一项必须是唯一的 id。cursor 为空字符串时返回第一页。返回 (结果列表, 下一页游标或 None)。
+    """
+    columns = [column for column, _ in order]
+
+    if cursor:
+        values = decode_cursor(cursor, sort, types=[_column_type(column) for column in columns])
+        # 降序时 (a, b) < (va, vb) 展开为 a < va OR (a = va AND b < vb)，升序时比较方向相反
+        conditions = []
+        for i, column in enumerate(columns):
+            equals = [columns[j] == values[j] for j in range(i)]
+            after = column < values[i] if descending else column > values[i]
+            conditions.append(and_(*equals, after))
+        query = query.filter(or_(*conditions))
+
+    rows = query.order_by(*[column.desc() if descending else column.asc() for column in columns]).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort, [getter(last) for _, getter in order])
+    return rows, next_cursor
@@ -0,0 +1,123 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+
+class HasherBusy(Exception):
+    """密码哈希进程池已满或等待超时"""
+
+
+def _hash_password(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _verify_password(password_hash, password):
+    return check_password_hash(password_hash, password)
+
+
+def _gevent_patched():
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('threading')
+
+
+def normalize_method(method):
+    """将哈希方法补全为 Werkzeug 写入哈希值中的完整形式，例如 pbkdf2 -> pbkdf2:sha256:600000"""
+    name, *args = method.split(':')
+    if name == 'scrypt' and not args:
+        return 'scrypt:32768:8:1'
+    if name == 'pbkdf2':
+        if not args:
+            return f'pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}'
+        if len(args) == 1:
+            return f'pbkdf2:{args[0]}:{DEFAULT_PBKDF2_ITERATIONS}'
+    return method
+
+
+class PasswordHasher:
+    """
+    在独立的进程池中计算密码哈希，避免 PBKDF2/scrypt 占用请求线程和 GIL
+
+    同时排队的任务数受 PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_LIMIT 限制，
+    超出时立即抛出 HasherBusy，由接口返回 503。
+    PASSWORD_HASH_WORKERS 为 0 时在当前线程中直接计算（用于开发和脚本）。
+    """
+
+    def __init__(self):
+        self.method = 'pbkdf2'
+        self.workers = 0
+        self.timeout = 10
+        self._capacity = 1
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        # fork 后子进程中没有父进程的在途任务，名额也一并重置
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self._capacity)
+
+    def init_app(self, app):
+        self.method = normalize_method(app.config.get('PASSWORD_HASH_METHOD', 'pbkdf2'))
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', 2)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', 10)
+        queue_limit = app.config.get('PASSWORD_HASH_QUEUE_LIMIT', 16)
+        self._capacity = max(1, self.workers + queue_limit)
+        self._slots = threading.BoundedSemaphore(self._capacity)
+        app.extensions['password_hasher'] = self
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                if _gevent_patched():
+                    # gevent 模式下进程池的管理线程会变成协程，改用 gevent 的原生线程池
+                    # （hashlib 计算时释放 GIL，不会阻塞其他协程）
+                    from gevent.threadpool import ThreadPoolExecutor
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers)
+                else:
+                    # 使用 spawn 启动子进程，避免在多线程的工作进程中 fork
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+            return self._executor
+
+    def _run(self, func, *args):
+        if self.workers <= 0:
+            return func(*args)
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise HasherBusy('密码哈希队列已满')
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            slots.release()
+            raise
+        # 任务真正结束（完成、失败或被取消）时才归还名额：等待超时后任务可能仍在执行，
+        # 提前归还会使在途任务超过 workers + 队列上限
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise HasherBusy('密码哈希等待超时')
+
+    def hash(self, password):
+        """使用配置的方法计算密码哈希"""
+        return self._run(_hash_password, password, self.method)
+
+    def verify(self, password_hash, password):
+        """校验密码"""
+        return self._run(_verify_password, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """已存储的哈希使用的方法或强度与当前配置不同时返回 True"""
+        return password_hash.split('$', 1)[0] != self.method
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,220 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import delete, func, select, update
+from models.community_post import CommunityPost, Comment, POST_DELETED, user_likes_table
+
+try:
+    import fcntl
+except ImportError:  # Windows 开发环境没有 fcntl，每个进程都可能执行清理
+    fcntl = None
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (OSError, TypeError):
+        # 没有权限发送信号说明进程仍存在；pid 无效时按已退出处理
+        return pid is not None
+    return True
+
+
+class PostPurger:
+    """
+    后台分批清理已删除的帖子
+
+    删除帖子只把状态改为 deleted，由本任务在后台依次删除帖子的评论、点赞记录和帖子本身：
+    每批最多删除 PURGE_BATCH_SIZE 行并单独提交，批次之间暂停 PURGE_BATCH_PAUSE 秒，
+    避免在一个长事务中持有大量行锁。多个工作进程通过文件锁保证同一时间只有一个在清理，
+    进度写入 instance/purge_progress.json，供管理接口和 purge_deleted.py 查看。
+    """
+
+    def __init__(self):
+        self.app = None
+        self.interval = 60
+        self.batch_size = 500
+        self.pause = 0.05
+        self._thread = None
+        self._pid = None
+        self._wakeup = threading.Event()
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config.get('PURGE_INTERVAL', 60)
+        self.batch_size = app.config.get('PURGE_BATCH_SIZE', 500)
+        self.pause = app.config.get('PURGE_BATCH_PAUSE', 0.05)
+        self.lock_path = os.path.join(app.instance_path, 'purge.lock')
+        self.progress_path = os.path.join(app.instance_path, 'purge_progress.json')
+        app.extensions['post_purger'] = self
+        if self.interval > 0:
+            app.before_request(self._ensure_worker)
+
+    def _ensure_worker(self):
+        # 在工作进程处理第一个请求时启动，避免线程在 fork 前启动而丢失
+        if self._pid != os.getpid() or not self._thread.is_alive():
+            self._pid = os.getpid()
+            self._wakeup = threading.Event()
+            self._thread = threading.Thread(target=self._run, name='post-purge', daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        """有帖子被删除时提前唤醒本进程的清理线程"""
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.purge()
+            except Exception as e:
+                self.app.logger.error(f"清理已删除的帖子失败: {str(e)}", exc_info=True)
+
+    def purge(self, log=None):
+        """清理全部已删除的帖子，返回清理的帖子数；其他进程正在清理时返回 None"""
+        handle = None
+        if fcntl is not None:
+            os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+            handle = open(self.lock_path, 'a')
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                handle.close()
+                return None
+        try:
+            with self.app.app_context():
+                return self._purge_all(self.app.db.session, log)
+        finally:
+            if handle is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+                handle.close()
+
+    def _purge_all(self, session, log):
+        progress = None
+        purged = 0
+        try:
+            while True:
+                # 经状态索引取任意一个已删除的帖子
+                post_id = session.scalar(
+                    select(CommunityPost.id).where(CommunityPost.status == POST_DELETED).limit(1)
+                )
+                if post_id is None:
+                    break
+                if progress is None:
+                    progress = {
+                        'state': 'running', 'pid': os.getpid(),
+                        'started_at': datetime.utcnow().isoformat(), 'finished_at': None,
+                        'purged_posts': 0, 'deleted_comments': 0, 'deleted_likes': 0,
+                        'current_post_id': None, 'error': None
+                    }
+                progress['current_post_id'] = post_id
+                self._write_progress(progress)
+                if self._purge_post(session, post_id, progress):
+                    purged += 1
+                    progress['purged_posts'] = purged
+                    if log:
+                        log(f"已清理帖子 {post_id}（累计评论 {progress['deleted_comments']} 条、"
+                            f"点赞 {progress['deleted_likes']} 条）")
+        except Exception as e:
+            session.rollback()
+            if progress is not None:
+                progress.update(state='failed', error=str(e), finished_at=datetime.utcnow().isoformat())
+                self._write_progress(progress)
+            raise
+        if progress is not None:
+            progress.update(state='idle', current_post_id=None, finished_at=datetime.utcnow().isoformat())
+            self._write_progress(progress)
+        return purged
+
+    def _still_deleted(self, session, post_id):
+        # 清理过程中帖子可能被管理员恢复，每批删除前重新确认
+        status = session.scalar(select(CommunityPost.status).where(CommunityPost.id == post_id))
+        session.commit()
+        return status == POST_DELETED
+
+    def _purge_post(self, session, post_id, progress):
+        """分批删除一个帖子的评论、点赞记录和帖子本身，帖子已被恢复时返回 False"""
+        # 评论按 id 倒序删除：回复总比被回复的评论后创建，先删回复；
+        # 批内先解除回复关系，避免同一条语句中删除父评论时违反自引用外键
+        while self._still_deleted(session, post_id):
+            comment_ids = session.scalars(
+                select(Comment.id).where(Comment.post_id == post_id)
+                .order_by(Comment.id.desc()).limit(self.batch_size)
+            ).all()
+            if not comment_ids:
+                break
+            session.execute(
+                update(Comment).where(Comment.id.in_(comment_ids), Comment.parent_id.isnot(None))
+                .values(parent_id=None).execution_options(synchronize_session=False)
+            )
+            session.execute(
+                delete(Comment).where(Comment.id.in_(comment_ids)).execution_options(synchronize_session=False)
+            )
+            session.commit()
+            progress['deleted_comments'] += len(comment_ids)
+            self._write_progress(progress)
+            self._throttle()
+        else:
+            return False  # 循环条件不成立：帖子已被恢复
+
+        # 点赞记录按 (post_id, user_id) 索引分批删除
+        while self._still_deleted(session, post_id):
+            user_ids = session.scalars(
+                select(user_likes_table.c.user_id).where(user_likes_table.c.post_id == post_id)
+                .limit(self.batch_size)
+            ).all()
+            if not user_ids:
+                break
+            session.execute(
+                user_likes_table.delete().where(
+                    user_likes_table.c.post_id == post_id,
+                    user_likes_table.c.user_id.in_(user_ids)
+                )
+            )
+            session.commit()
+            progress['deleted_likes'] += len(user_ids)
+            self._write_progress(progress)
+            self._throttle()
+        else:
+            return False  # 循环条件不成立：帖子已被恢复
+
+        deleted = session.execute(
+            delete(CommunityPost).where(CommunityPost.id == post_id, CommunityPost.status == POST_DELETED)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        session.commit()
+        return bool(deleted)
+
+    def _throttle(self):
+        if self.pause > 0:
+            time.sleep(self.pause)
+
+    def _write_progress(self, progress):
+        # 先写临时文件再改名，读取方不会读到写了一半的内容
+        os.makedirs(os.path.dirname(self.progress_path), exist_ok=True)
+        tmp_path = f'{self.progress_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(progress, f, ensure_ascii=False)
+        os.replace(tmp_path, self.progress_path)
+
+    def status(self, session):
+        """返回清理进度：最近一次清理的统计和仍待清理的帖子数"""
+        try:
+            with open(self.progress_path, encoding='utf-8') as f:
+                progress = json.load(f)
+        except (OSError, ValueError):
+            progress = {'state': 'idle'}
+        if progress.get('state') == 'running' and not _pid_alive(progress.get('pid')):
+            # 清理进程已退出，下次清理时从剩余的帖子继续
+            progress['state'] = 'interrupted'
+        progress['pending_posts'] = session.scalar(
+            select(func.count()).select_from(CommunityPost).where(CommunityPost.status == POST_DELETED)
+        )
+        return progress
+
+
+post_purger = PostPurger()
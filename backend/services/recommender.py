@@ -0,0 +1,612 @@
+import atexit
+import json
+import os
+import shutil
+import threading
+import time
+import zlib
+from collections import Counter
+from functools import lru_cache
+import numpy as np
+from sqlalchemy import select
+from models.community_post import CommunityPost
+from models.cultural_resource import CulturalResource
+from services.cache import response_cache
+from services.search import tokenize
+
+try:
+    import fcntl
+except ImportError:  # Windows 开发环境没有 fcntl，退化为不加文件锁
+    fcntl = None
+
+
+# 文档频率按词元哈希分桶统计的桶数
+DF_BUCKETS = 1 << 20
+
+# 参与相似度计算的字段及权重
+POST_FIELDS = {'title': 3.0, 'content': 1.0}
+RESOURCE_FIELDS = {'title': 3.0, 'tags': 2.0, 'description': 1.5, 'content': 1.0}
+
+# 低于该相似度的内容不作为近邻（哈希冲突会使无关内容之间产生很小的相似度）
+MIN_SIMILARITY = 0.05
+
+# 每个字段最多取前多少个字符（长正文的开头已足以代表主题）
+MAX_FIELD_CHARS = 5000
+
+# 批量计算近邻时相似度矩阵的最大元素数（约 256MB）
+_MAX_BATCH_CELLS = 1 << 26
+
+
+@lru_cache(maxsize=1 << 18)
+def _token_hash(token):
+    # 内置 hash() 在每个进程中随机化，持久化的向量需要跨进程稳定的哈希
+    return zlib.crc32(token.encode('utf-8'))
+
+
+def _top_k(similarities, k):
+    """对每一行取相似度最高的 k 列，返回 (列下标, 相似度)，不足 k 个或相似度低于 MIN_SIMILARITY 的位置列下标为 -1"""
+    rows, columns = similarities.shape
+    cols = np.full((rows, k), -1, dtype=np.int64)
+    values = np.zeros((rows, k), dtype=np.float32)
+    k_eff = min(k, columns)
+    if k_eff == 0:
+        return cols, values
+    part = np.argpartition(-similarities, k_eff - 1, axis=1)[:, :k_eff]
+    part_values = np.take_along_axis(similarities, part, axis=1)
+    order = np.argsort(-part_values, axis=1, kind='stable')
+    cols[:, :k_eff] = np.take_along_axis(part, order, axis=1)
+    values[:, :k_eff] = np.take_along_axis(part_values, order, axis=1)
+    empty = ~(values > MIN_SIMILARITY)
+    cols[empty] = -1
+    values[empty] = 0
+    return cols, values
+
+
+class SimilarityIndex:
+    """
+    一类内容（帖子或文化资源）的相似内容索引
+
+    每条内容的标题、正文等字段切分为中文 n-gram 后计算 TF-IDF 权重，通过带符号的特征哈希
+    压缩为固定维数的稠密向量并做 L2 归一化，向量间的点积即余弦相似度。全量构建时分批做矩阵乘法，
+    为每条内容预先算出最相似的 top_k 条内容，请求时直接读取，不做任何计算。
+
+    向量、近邻和文档频率保存为 .npy 文件并以内存映射方式打开，多个工作进程共享同一份页缓存；
+    新增、修改和移除内容时只放入队列，由后台线程增量更新：在文件锁内写入该内容的向量，锁外计算它与全部内容的相似度，
+    再回到锁内更新受影响的近邻行。其他进程通过元数据文件的变化发现新增的行。
+    """
+
+    def __init__(self, name, model, fields):
+        self.name = name
+        self.model = model
+        self.fields = fields
+        self.app = None
+        self.path = None
+        self.dim = 256
+        self.top_k = 20
+        self.batch_size = 256
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            # 预加载应用后 fork 出的工作进程需要各自的锁和构建线程
+            os.register_at_fork(after_in_child=self._reset_lock)
+
+    def _reset_lock(self):
+        self._lock = threading.RLock()
+        self._build_thread = None
+        # 等待增量更新的内容 {id: 字段（None 表示移除）}，同一内容只保留最后一次变化
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # 同一进程内按入队顺序逐批处理
+        self._wakeup = threading.Event()
+        self._update_thread = None
+
+    def _reset(self):
+        self._reset_lock()
+        self._version = None
+        self._meta = None
+        self._meta_stat = None
+        self._arrays = None
+
+    def configure(self, app, path):
+        self.app = app
+        self.path = path
+        self.dim = app.config.get('RECOMMENDER_DIM', 256)
+        self.top_k = app.config.get('RECOMMENDER_TOP_K', 20)
+        self.batch_size = app.config.get('RECOMMENDER_BATCH_SIZE', 256)
+
+    # ---- 向量化 ----
+
+    def document(self, item):
+        """从模型对象中提取参与计算的字段"""
+        return {field: getattr(item, field) for field in self.fields}
+
+    def _terms(self, document):
+        """返回 (词元哈希, 加权词频) 两个数组"""
+        weights = Counter()
+        for field, weight in self.fields.items():
+            text = document.get(field)
+            if not text:
+                continue
+            if field == 'tags':
+                text = text.replace(',', ' ')
+            for token in tokenize(text[:MAX_FIELD_CHARS]):
+                weights[token] += weight
+        hashes = np.fromiter((_token_hash(token) for token in weights), dtype=np.uint32, count=len(weights))
+        return hashes, np.fromiter(weights.values(), dtype=np.float32, count=len(weights))
+
+    def _vectorize(self, hashes, weights, df, doc_count):
+        """计算 L2 归一化的 TF-IDF 哈希向量，没有任何词元时返回全零向量"""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if not len(hashes):
+            return vector
+        idf = np.log((1.0 + doc_count) / (1.0 + df[hashes % DF_BUCKETS])) + 1.0
+        signs = np.where(hashes & 1, 1.0, -1.0)
+        vector[:] = np.bincount((hashes >> 1) % self.dim, weights=np.log1p(weights) * idf * signs,
+                                minlength=self.dim)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    # ---- 持久化 ----
+
+    @property
+    def current_path(self):
+        return os.path.join(self.path, 'CURRENT')
+
+    def _lock_file(self, name='.lock'):
+        if fcntl is None:
+            return None
+        os.makedirs(self.path, exist_ok=True)
+        handle = open(os.path.join(self.path, name), 'a')
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        return handle
+
+    @staticmethod
+    def _unlock_file(handle):
+        if handle is not None:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+            handle.close()
+
+    def _create_arrays(self, directory, capacity):
+        os.makedirs(directory)
+        shapes = {
+            'ids': ((capacity,), np.int32),
+            'vectors': ((capacity, self.dim), np.float32),
+            'neighbors': ((capacity, self.top_k), np.int32),
+            'scores': ((capacity, self.top_k), np.float32),
+            'df': ((DF_BUCKETS,), np.int32)
+        }
+        arrays = {}
+        for name, (shape, dtype) in shapes.items():
+            arrays[name] = np.lib.format.open_memmap(os.path.join(directory, name + '.npy'),
+                                                     mode='w+', dtype=dtype, shape=shape)
+        arrays['neighbors'][:] = -1
+        return arrays
+
+    @staticmethod
+    def _open_arrays(directory):
+        return {
+            name: np.load(os.path.join(directory, name + '.npy'), mmap_mode='r+')
+            for name in ('ids', 'vectors', 'neighbors', 'scores', 'df')
+        }
+
+    def _write_meta(self, directory, meta):
+        path = os.path.join(directory, 'meta.json')
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _new_version():
+        return f'v{time.time_ns()}'
+
+    def _publish(self, directory, arrays, meta):
+        """
+        写入元数据并将 CURRENT 切换到新版本，删除旧版本（已映射旧文件的进程在下次同步前仍可读取）
+
+        需持有写锁。directory 为构建中的临时目录（tmp- 开头）时先重命名为正式版本。
+        """
+        for array in arrays.values():
+            array.flush()
+        version = os.path.basename(directory)
+        if version.startswith('tmp-'):
+            version = self._new_version()
+            os.rename(directory, os.path.join(self.path, version))
+        self._write_meta(os.path.join(self.path, version), meta)
+        tmp_path = f'{self.current_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(version)
+        os.replace(tmp_path, self.current_path)
+        for entry in os.listdir(self.path):
+            if entry.startswith('v') and entry != version:
+                shutil.rmtree(os.path.join(self.path, entry), ignore_errors=True)
+
+    def _sync(self):
+        """确保内存映射指向磁盘上的最新版本，索引尚未构建时返回 False"""
+        try:
+            with open(self.current_path, encoding='utf-8') as f:
+                version = f.read().strip()
+        except OSError:
+            self._version = self._meta = self._arrays = None
+            return False
+        directory = os.path.join(self.path, version)
+        meta_path = os.path.join(directory, 'meta.json')
+        try:
+            stat = os.stat(meta_path)
+            meta_stat = (stat.st_ino, stat.st_mtime_ns)
+            if version != self._version:
+                self._arrays = self._open_arrays(directory)
+                self._version, self._meta_stat = version, None
+            if meta_stat != self._meta_stat:
+                with open(meta_path, encoding='utf-8') as f:
+                    self._meta = json.load(f)
+                self._meta_stat = meta_stat
+        except (OSError, ValueError):
+            # 读到了正被其他进程替换的旧版本，按未构建处理，下次请求重试
+            self._version = self._meta = self._arrays = None
+            return False
+        return True
+
+    def _row(self, doc_id):
+        count = self._meta['count']
+        ids = self._arrays['ids'][:count]
+        if self._meta['sorted']:
+            row = int(np.searchsorted(ids, doc_id))
+            return row if row < count and ids[row] == doc_id else None
+        rows = np.flatnonzero(ids == doc_id)
+        return int(rows[0]) if len(rows) else None
+
+    # ---- 全量构建 ----
+
+    def _documents(self, session, after_id=0, up_to_id=None):
+        """按主键顺序逐行读取已发布的内容（在主键上扫描，状态在读取后过滤，避免按状态索引读取后再排序）"""
+        columns = [getattr(self.model, field) for field in self.fields]
+        query = select(self.model.id, self.model.status, *columns).where(self.model.id > after_id)
+        if up_to_id is not None:
+            query = query.where(self.model.id <= up_to_id)
+        for row in session.execute(query.order_by(self.model.id).execution_options(yield_per=1000)):
+            if row.status == 'published':
+                yield row
+
+    def _compute_neighbors(self, arrays, count):
+        """分批计算每条内容的 top_k 近邻：每批为 (批大小 × 全部内容) 的一次矩阵乘法"""
+        vectors = arrays['vectors'][:count]
+        ids = arrays['ids'][:count]
+        batch_size = max(1, min(self.batch_size, _MAX_BATCH_CELLS // max(count, 1)))
+        for start in range(0, count, batch_size):
+            stop = min(start + batch_size, count)
+            similarities = vectors[start:stop] @ vectors.T
+            similarities[np.arange(stop - start), np.arange(start, stop)] = -np.inf  # 排除自身
+            cols, values = _top_k(similarities, self.top_k)
+            arrays['neighbors'][start:stop] = np.where(cols >= 0, ids[cols], -1)
+            arrays['scores'][start:stop] = values
+
+    def rebuild(self, session, only_if_missing=False):
+        """从数据库全量构建索引，返回索引的内容数；构建期间新增的内容在切换版本后补齐"""
+        handle = self._lock_file('.build.lock')
+        try:
+            if only_if_missing and os.path.exists(self.current_path):
+                return None
+
+            # 清理上次中断的构建留下的临时目录
+            os.makedirs(self.path, exist_ok=True)
+            for entry in os.listdir(self.path):
+                if entry.startswith('tmp-'):
+                    shutil.rmtree(os.path.join(self.path, entry), ignore_errors=True)
+
+            # 第一遍：统计文档频率
+            df = np.zeros(DF_BUCKETS, dtype=np.int32)
+            doc_ids = []
+            for row in self._documents(session):
+                hashes, _ = self._terms(row._mapping)
+                df[np.unique(hashes % DF_BUCKETS)] += 1
+                doc_ids.append(row.id)
+            count = len(doc_ids)
+            last_id = doc_ids[-1] if doc_ids else 0
+
+            directory = os.path.join(self.path, f'tmp-{os.getpid()}-{time.time_ns()}')
+            arrays = self._create_arrays(directory, max(1024, count + count // 4))
+            arrays['df'][:] = df
+            arrays['ids'][:count] = doc_ids
+            del doc_ids
+
+            # 第二遍：计算向量（两遍之间新增的内容留待切换版本后补齐）
+            ids = arrays['ids'][:count]
+            for row in self._documents(session, up_to_id=last_id):
+                position = int(np.searchsorted(ids, row.id))
+                if position < count and ids[position] == row.id:
+                    hashes, weights = self._terms(row._mapping)
+                    arrays['vectors'][position] = self._vectorize(hashes, weights, df, count)
+
+            self._compute_neighbors(arrays, count)
+            meta = {'count': count, 'capacity': len(arrays['ids']), 'dim': self.dim,
+                    'top_k': self.top_k, 'doc_count': count, 'sorted': True}
+
+            with self._lock:
+                write_handle = self._lock_file()
+                try:
+                    self._publish(directory, arrays, meta)
+                    self._sync()
+                    for row in self._documents(session, last_id):
+                        self._upsert(row.id, row._mapping)
+                    self._write_meta(os.path.join(self.path, self._version), self._meta)
+                    count = self._meta['count']
+                finally:
+                    self._unlock_file(write_handle)
+            # 缓存的相关内容接口响应按新索引重新生成
+            response_cache.invalidate(self.name)
+            return count
+        finally:
+            self._unlock_file(handle)
+
+    def _schedule_build(self):
+        # 索引尚未构建时在后台线程中构建，期间相关内容接口使用回退逻辑
+        if self.app is None or (self._build_thread is not None and self._build_thread.is_alive()):
+            return
+        self._build_thread = threading.Thread(target=self._build_in_background,
+                                              name=f'recommender-{self.name}', daemon=True)
+        self._build_thread.start()
+
+    def _build_in_background(self):
+        with self.app.app_context():
+            try:
+                self.rebuild(self.app.db.session, only_if_missing=True)
+            except Exception as e:
+                self.app.logger.error(f"构建相似内容索引失败（{self.name}）: {str(e)}", exc_info=True)
+            finally:
+                self.app.db.session.remove()
+
+    # ---- 增量更新 ----
+
+    def _grow(self):
+        """容量用尽时复制到容量翻倍的新版本"""
+        old = self._arrays
+        meta = dict(self._meta, capacity=self._meta['capacity'] * 2)
+        directory = os.path.join(self.path, self._new_version())
+        arrays = self._create_arrays(directory, meta['capacity'])
+        count = meta['count']
+        for name in ('ids', 'vectors', 'neighbors', 'scores'):
+            arrays[name][:count] = old[name][:count]
+        arrays['df'][:] = old['df']
+        self._publish(directory, arrays, meta)
+        self._sync()
+
+    def _replace_neighbor(self, row, doc_id, similarity):
+        """在某一行的近邻列表中移除 doc_id，相似度足够高时按新相似度重新插入"""
+        neighbors, scores = self._arrays['neighbors'], self._arrays['scores']
+        entries = [(float(score), int(neighbor)) for neighbor, score in zip(neighbors[row], scores[row])
+                   if neighbor >= 0 and neighbor != doc_id]
+        if similarity > MIN_SIMILARITY:
+            entries.append((float(similarity), doc_id))
+        entries.sort(reverse=True)
+        entries = entries[:self.top_k]
+        neighbors[row] = -1
+        scores[row] = 0
+        if entries:
+            neighbors[row, :len(entries)] = [neighbor for _, neighbor in entries]
+            scores[row, :len(entries)] = [score for score, _ in entries]
+
+    def _update_neighbors(self, row, doc_id, similarities):
+        """按该行与全部内容的相似度（similarities，长度为 count）更新它的近邻，以及受其影响的其他行"""
+        count = self._meta['count']
+        arrays = self._arrays
+        similarities[row] = -np.inf
+        cols, values = _top_k(similarities[np.newaxis, :], self.top_k)
+        arrays['neighbors'][row] = np.where(cols[0] >= 0, arrays['ids'][:count][cols[0]], -1)
+        arrays['scores'][row] = values[0]
+
+        # 近邻中已包含本内容的行（相似度可能变化）和新相似度超过末位近邻的行
+        affected = (arrays['neighbors'][:count] == doc_id).any(axis=1) | (similarities > arrays['scores'][:count, -1])
+        affected[row] = False
+        for other in np.flatnonzero(affected):
+            self._replace_neighbor(other, doc_id, similarities[other])
+
+    def _store(self, doc_id, hashes, weights):
+        """写入一条内容的向量（新内容追加一行），返回行号；调用方需持有文件锁且已同步"""
+        arrays, meta = self._arrays, self._meta
+        row = self._row(doc_id)
+        if row is None:
+            # 新内容计入文档频率；已有内容修改后不回退旧词元的文档频率，误差在下次全量构建时消除
+            arrays['df'][np.unique(hashes % DF_BUCKETS)] += 1
+            meta['doc_count'] += 1
+            if meta['count'] >= meta['capacity']:
+                self._grow()
+                arrays, meta = self._arrays, self._meta
+            row = meta['count']
+            if row and doc_id < arrays['ids'][row - 1]:
+                meta['sorted'] = False
+            arrays['ids'][row] = doc_id
+            meta['count'] += 1
+        arrays['vectors'][row] = self._vectorize(hashes, weights, arrays['df'], meta['doc_count'])
+        return row
+
+    def _upsert(self, doc_id, document):
+        # 调用方需持有文件锁且已同步（全量构建结束时补齐构建期间新增的内容）
+        hashes, weights = self._terms(document)
+        row = self._store(doc_id, hashes, weights)
+        vectors = self._arrays['vectors']
+        self._update_neighbors(row, doc_id, vectors[:self._meta['count']] @ vectors[row])
+
+    @staticmethod
+    def _similarities(vectors, vector):
+        """一条内容与多条内容的余弦相似度（向量已归一化）"""
+        return vectors @ vector
+
+    def _index(self, doc_id, document):
+        """
+        增量索引一条新增或修改的内容，索引尚未构建时忽略（构建时会包含该内容）
+
+        与全部内容的相似度（O(内容数 × 维数) 的矩阵乘法）在锁外计算，持锁期间只写入向量和更新近邻行。
+        """
+        hashes, weights = self._terms(document)
+        with self._lock:
+            handle = self._lock_file()
+            try:
+                if not self._sync():
+                    return False
+                row = self._store(doc_id, hashes, weights)
+                self._write_meta(os.path.join(self.path, self._version), self._meta)
+                version, count = self._version, self._meta['count']
+                vectors = self._arrays['vectors']
+                vector = np.array(vectors[row])
+            finally:
+                self._unlock_file(handle)
+
+        # 其他进程此后追加的内容计算自身近邻时会包含本内容，本内容的近邻在下面补算这些行
+        similarities = self._similarities(vectors[:count], vector)
+
+        with self._lock:
+            handle = self._lock_file()
+            try:
+                if not self._sync():
+                    return False
+                row = self._row(doc_id)
+                if row is None or not np.array_equal(self._arrays['vectors'][row], vector):
+                    # 期间该内容再次被修改或已移除，由后一次更新负责
+                    return False
+                vectors = self._arrays['vectors']
+                if self._version != version:
+                    # 期间索引被重建或扩容，行号可能变化，在锁内重新计算
+                    similarities = self._similarities(vectors[:self._meta['count']], vector)
+                elif self._meta['count'] > count:
+                    similarities = np.concatenate([similarities,
+                                                   self._similarities(vectors[count:self._meta['count']], vector)])
+                self._update_neighbors(row, doc_id, similarities)
+                self._write_meta(os.path.join(self.path, self._version), self._meta)
+                return True
+            finally:
+                self._unlock_file(handle)
+
+    def _remove(self, doc_id):
+        """从索引中移除一条内容（删除或不再公开），保留其行以便重新发布时复用"""
+        with self._lock:
+            handle = self._lock_file()
+            try:
+                if not self._sync():
+                    return False
+                row = self._row(doc_id)
+                if row is None:
+                    return False
+                count = self._meta['count']
+                arrays = self._arrays
+                arrays['vectors'][row] = 0
+                arrays['neighbors'][row] = -1
+                arrays['scores'][row] = 0
+                for other in np.flatnonzero((arrays['neighbors'][:count] == doc_id).any(axis=1)):
+                    self._replace_neighbor(other, doc_id, 0)
+                self._write_meta(os.path.join(self.path, self._version), self._meta)
+                return True
+            finally:
+                self._unlock_file(handle)
+
+    def _enqueue(self, doc_id, document):
+        with self._pending_lock:
+            self._pending[doc_id] = document
+            if self._update_thread is None or not self._update_thread.is_alive():
+                self._update_thread = threading.Thread(target=self._run, name=f'recommender-{self.name}-update',
+                                                       daemon=True)
+                self._update_thread.start()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            self.flush()
+
+    def upsert(self, item):
+        """新增或修改了一条已发布的内容：放入队列，由后台线程增量索引（请求中不做相似度计算）"""
+        self._enqueue(item.id, self.document(item))
+
+    def remove(self, doc_id):
+        """删除了一条内容或内容不再公开：放入队列，由后台线程从索引中移除"""
+        self._enqueue(doc_id, None)
+
+    def flush(self):
+        """处理队列中的全部增量更新，返回处理的内容数；单条内容更新失败只记录日志，下次全量构建时纠正"""
+        with self._flush_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, {}
+            for doc_id, document in pending.items():
+                try:
+                    if document is None:
+                        self._remove(doc_id)
+                    else:
+                        self._index(doc_id, document)
+                except Exception as e:
+                    if self.app is not None:
+                        self.app.logger.warning(f"更新相似内容索引失败（{self.name} {doc_id}）: {str(e)}")
+            return len(pending)
+
+    # ---- 查询 ----
+
+    def related(self, doc_id):
+        """
+        返回预先计算的相似内容id（按相似度降序，最多 top_k 条）
+
+        索引尚未构建（此时在后台开始构建）或该内容不在索引中时返回 None，由调用方回退到其他推荐逻辑。
+        """
+        with self._lock:
+            if not self._sync():
+                self._schedule_build()
+                return None
+            row = self._row(doc_id)
+            if row is None:
+                return None
+            return [int(neighbor) for neighbor in self._arrays['neighbors'][row] if neighbor >= 0]
+
+
+def related_items(session, index, item, limit, fallback_order):
+    """
+    返回与 item 相似的已发布内容（最多 limit 条）
+
+    优先使用预先计算的近邻，按相似度排序；近邻不足（索引尚未构建、内容刚发布或正文过短）时，
+    以同分类的其他内容按 fallback_order 排序补足。
+    """
+    model = index.model
+    items = []
+    related_ids = index.related(item.id) if limit > 0 else None
+    if related_ids:
+        found = {
+            row.id: row for row in session.scalars(
+                select(model).where(model.id.in_(related_ids), model.status == 'published')
+            )
+        }
+        items = [found[doc_id] for doc_id in related_ids if doc_id in found][:limit]
+    if len(items) < limit:
+        excluded = [item.id] + [row.id for row in items]
+        items += session.scalars(
+            select(model)
+            .where(model.status == 'published', model.category == item.category, model.id.notin_(excluded))
+            .order_by(*fallback_order)
+            .limit(limit - len(items))
+        ).all()
+    return items
+
+
+class Recommender:
+    """帖子和文化资源的相似内容推荐"""
+
+    def __init__(self):
+        self.posts = SimilarityIndex('posts', CommunityPost, POST_FIELDS)
+        self.resources = SimilarityIndex('resources', CulturalResource, RESOURCE_FIELDS)
+
+    def init_app(self, app):
+        path = app.config.get('RECOMMENDER_PATH') or os.path.join(app.instance_path, 'recommender')
+        self.posts.configure(app, os.path.join(path, 'posts'))
+        self.resources.configure(app, os.path.join(path, 'resources'))
+        app.extensions['recommender'] = self
+        atexit.register(self.flush)
+
+    def flush(self):
+        """处理两个索引队列中的增量更新（进程退出前和测试中调用）"""
+        return self.posts.flush() + self.resources.flush()
+
+    def rebuild(self, session):
+        """全量重建帖子和文化资源的相似内容索引，返回 (帖子数, 资源数)"""
+        return self.posts.rebuild(session), self.resources.rebuild(session)
+
+
+recommender = Recommender()
+
@@ -0,0 +1,35 @@
+from services.tags import split_tags
+
+
+# 创建文化资源时必须提供的字段（接口和批量导入共用）
+REQUIRED_FIELDS = ['title', 'content', 'type', 'category']
+
+# 创建时可选的字段
+OPTIONAL_FIELDS = ['description', 'author', 'source', 'cover_image', 'media_url']
+
+# 资源状态
+RESOURCE_STATUSES = ('draft', 'published', 'archived')
+
+# 对外展示的资源状态：列表、检索、详情、相似推荐和分面统计都只包含该状态的资源
+PUBLISHED_STATUS = 'published'
+
+
+def validate_resource(data):
+    """校验文化资源数据，返回第一条错误信息，校验通过时返回 None"""
+    for field in REQUIRED_FIELDS:
+        if not data.get(field):
+            return f'{field} 是必需的'
+    return None
+
+
+def normalize_tags(tags):
+    """标签统一为逗号分隔的字符串，接受列表或逗号分隔的字符串"""
+    return ','.join(split_tags(tags))
+
+
+def resource_values(data):
+    """从请求或导入数据中提取 cultural_resources 的列值（已通过 validate_resource 校验）"""
+    values = {field: data[field] for field in REQUIRED_FIELDS}
+    values.update({field: data.get(field) or None for field in OPTIONAL_FIELDS})
+    values['tags'] = normalize_tags(data.get('tags'))
+    return values
@@ -0,0 +1,371 @@
+import heapq
+import json
+import math
+import os
+import pickle
+import re
+import threading
+from collections import Counter
+from services.resources import PUBLISHED_STATUS
+
+try:
+    import fcntl
+except ImportError:  # Windows 开发环境没有 fcntl，退化为不加文件锁
+    fcntl = None
+
+
+# 中文按字切分为一元和二元组，英文和数字按词切分
+_TOKEN_RE = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+|[a-z0-9]+')
+_CJK_RE = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]')
+
+# 各字段的权重
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'tags': 2.0,
+    'description': 1.5,
+    'content': 1.0
+}
+
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 索引格式版本，快照版本不一致时从数据库重建（2：只索引已发布的资源）
+INDEX_VERSION = 2
+
+
+def tokenize(text):
+    """将文本切分为适合中文检索的 n-gram 词元（一元 + 二元）"""
+    tokens = []
+    if not text:
+        return tokens
+    for run in _TOKEN_RE.findall(text.lower()):
+        if _CJK_RE.match(run):
+            tokens.extend(run)
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def query_tokens(text):
+    """查询词元：多字中文只使用二元组，单字查询使用一元组"""
+    tokens = []
+    for run in _TOKEN_RE.findall((text or '').lower()):
+        if _CJK_RE.match(run) and len(run) > 1:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return list(dict.fromkeys(tokens))
+
+
+def resource_document(resource):
+    """从文化资源中提取需要索引的字段"""
+    return {
+        'title': resource.title,
+        'description': resource.description,
+        'content': resource.content,
+        'tags': resource.tags.replace(',', ' ') if resource.tags else None,
+        'category': resource.category
+    }
+
+
+class SearchIndex:
+    """
+    已发布文化资源的倒排索引，使用 BM25 对结果排序
+
+    索引以快照文件 + 追加日志的形式持久化：新增资源或资源状态变化只追加一行日志，
+    其他进程在检索前检查日志长度并回放新增部分，日志过长时合并为新快照。
+    """
+
+    def __init__(self):
+        self.path = None
+        self.compact_threshold = 1000
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._reset()
+
+    def init_app(self, app):
+        self.path = app.config.get('SEARCH_INDEX_PATH') or os.path.join(app.instance_path, 'search_index.pkl')
+        self.compact_threshold = app.config.get('SEARCH_INDEX_COMPACT_THRESHOLD', 1000)
+        app.extensions['search_index'] = self
+
+    def _reset(self):
+        self.postings = {}  # token -> {doc_id: 加权词频}
+        self.doc_terms = {}  # doc_id -> {token: 加权词频}
+        self.doc_lengths = {}
+        self.categories = {}
+        self.total_length = 0.0
+        self._journal_offset = 0
+        self._snapshot_mtime = None
+        self._invalidate_stats()
+
+    def _invalidate_stats(self):
+        # 词元的 IDF 和文档的长度归一化因子依赖文档总数和平均长度，索引变化后按需重新计算
+        self._idf = {}
+        self._norms = {}
+
+    @property
+    def journal_path(self):
+        return self.path + '.journal'
+
+    def _add(self, doc_id, document):
+        self._remove(doc_id)
+
+        terms = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(document.get(field)):
+                terms[token] += weight
+        if not terms:
+            return
+
+        for token, freq in terms.items():
+            self.postings.setdefault(token, {})[doc_id] = freq
+        self.doc_terms[doc_id] = dict(terms)
+        length = sum(terms.values())
+        self.doc_lengths[doc_id] = length
+        self.categories[doc_id] = document.get('category')
+        self.total_length += length
+        self._invalidate_stats()
+
+    def _remove(self, doc_id):
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for token in terms:
+            docs = self.postings.get(token)
+            if docs is not None:
+                docs.pop(doc_id, None)
+                if not docs:
+                    del self.postings[token]
+        self.total_length -= self.doc_lengths.pop(doc_id, 0)
+        self.categories.pop(doc_id, None)
+        self._invalidate_stats()
+
+    # ---- 持久化 ----
+
+    def _lock_file(self, exclusive):
+        if fcntl is None:
+            return None
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        handle = open(self.path + '.lock', 'a')
+        fcntl.flock(handle, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        return handle
+
+    @staticmethod
+    def _unlock_file(handle):
+        if handle is not None:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+            handle.close()
+
+    def _current_snapshot_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _load_snapshot(self):
+        self._reset()
+        try:
+            with open(self.path, 'rb') as f:
+                self._snapshot_mtime = os.fstat(f.fileno()).st_mtime_ns
+                data = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False
+        if data.get('version') != INDEX_VERSION:
+            return False
+        self.postings = data['postings']
+        self.doc_terms = data['doc_terms']
+        self.doc_lengths = data['doc_lengths']
+        self.categories = data['categories']
+        self.total_length = data['total_length']
+        self._invalidate_stats()
+        return True
+
+    def _write_snapshot(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({
+                'version': INDEX_VERSION,
+                'postings': self.postings,
+                'doc_terms': self.doc_terms,
+                'doc_lengths': self.doc_lengths,
+                'categories': self.categories,
+                'total_length': self.total_length
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+        self._snapshot_mtime = self._current_snapshot_mtime()
+        # 快照已包含全部日志内容，清空日志
+        with open(self.journal_path, 'w', encoding='utf-8'):
+            pass
+        self._journal_offset = 0
+
+    def _replay_journal(self):
+        if self._current_snapshot_mtime() != self._snapshot_mtime:
+            # 日志已被其他进程合并进新快照，重新加载
+            self._load_snapshot()
+        try:
+            size = os.path.getsize(self.journal_path)
+        except OSError:
+            size = 0
+        if size == self._journal_offset:
+            return
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            f.seek(self._journal_offset)
+            for line in f:
+                if not line.endswith('\n'):
+                    break  # 另一进程尚未写完的行，下次再读
+                entry = json.loads(line)
+                if entry['doc'] is None:
+                    self._remove(entry['id'])
+                else:
+                    self._add(entry['id'], entry['doc'])
+                self._journal_offset += len(line.encode('utf-8'))
+
+    def _sync(self):
+        """确保内存中的索引与磁盘上的快照和日志一致"""
+        if self._loaded:
+            self._replay_journal()
+            return
+        handle = self._lock_file(exclusive=True)
+        try:
+            if not self._load_snapshot():
+                self._build_from_database()
+                self._write_snapshot()
+            self._replay_journal()
+            self._loaded = True
+        finally:
+            self._unlock_file(handle)
+
+    def _build_from_database(self):
+        from flask import current_app
+        from models.cultural_resource import CulturalResource
+
+        self._reset()
+        query = current_app.db.session.query(CulturalResource).yield_per(1000)
+        for resource in query:
+            if resource.status == PUBLISHED_STATUS:
+                self._add(resource.id, resource_document(resource))
+
+    # ---- 公开接口 ----
+
+    def rebuild(self):
+        """从数据库全量重建索引并写入快照"""
+        with self._lock:
+            handle = self._lock_file(exclusive=True)
+            try:
+                self._build_from_database()
+                self._write_snapshot()
+                self._loaded = True
+            finally:
+                self._unlock_file(handle)
+
+    def add_resource(self, resource):
+        """增量索引一条新增或修改的文化资源，未发布的资源从索引中移除"""
+        document = resource_document(resource) if resource.status == PUBLISHED_STATUS else None
+        with self._lock:
+            self._sync()
+            handle = self._lock_file(exclusive=True)
+            try:
+                self._replay_journal()
+                if document is None:
+                    self._remove(resource.id)
+                else:
+                    self._add(resource.id, document)
+                line = json.dumps({'id': resource.id, 'doc': document}, ensure_ascii=False) + '\n'
+                with open(self.journal_path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+                self._journal_offset += len(line.encode('utf-8'))
+                if self._journal_entries() >= self.compact_threshold:
+                    self._write_snapshot()
+            finally:
+                self._unlock_file(handle)
+
+    def _journal_entries(self):
+        with open(self.journal_path, 'rb') as f:
+            return sum(1 for _ in f)
+
+    def _token_idf(self, token):
+        idf = self._idf.get(token)
+        if idf is None:
+            doc_count = len(self.doc_lengths)
+            df = len(self.postings.get(token, ()))
+            idf = self._idf[token] = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+        return idf
+
+    def _doc_norm(self, doc_id):
+        norm = self._norms.get(doc_id)
+        if norm is None:
+            avg_length = self.total_length / len(self.doc_lengths)
+            norm = self._norms[doc_id] = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / avg_length)
+        return norm
+
+    def _candidates(self, tokens, category):
+        """匹配的文档id集合：优先返回包含全部查询词元的文档，没有时退化为任意匹配"""
+        matched = sorted((self.postings.get(token, {}) for token in tokens), key=len)
+        if not matched[-1]:
+            return set()
+        # 从最短的倒排表开始求交集
+        candidates = set(matched[0])
+        for docs in matched[1:]:
+            candidates.intersection_update(docs)
+            if not candidates:
+                break
+        if not candidates:
+            candidates = set().union(*matched)
+        if category:
+            candidates = {doc_id for doc_id in candidates if self.categories.get(doc_id) == category}
+        return candidates
+
+    def match(self, text, category=None):
+        """返回匹配的资源id集合（不计算得分），用于统计总数、分面和按标签过滤"""
+        tokens = query_tokens(text)
+        if not tokens:
+            return set()
+        with self._lock:
+            self._sync()
+            return self._candidates(tokens, category)
+
+    def search(self, text, category=None, limit=None, within=None):
+        """
+        返回按相关度降序排列的 [(资源id, 得分), ...]
+
+        limit 为需要的条数（分页时为游标位置加每页条数），只在有界堆中保留得分最高的 limit 条，
+        不对全部匹配结果排序；within 为已筛选的资源id集合（如按标签过滤后的结果），只对其中的资源打分。
+        """
+        tokens = query_tokens(text)
+        if not tokens or limit == 0:
+            return []
+
+        with self._lock:
+            self._sync()
+            if not self.doc_lengths:
+                return []
+            candidates = self._candidates(tokens, category)
+            if within is not None:
+                candidates &= set(within)
+
+            # 按候选文档逐个打分，只查询文档包含的词元，不再遍历常见词元的整条倒排表
+            weighted = [(self.postings[token], self._token_idf(token) * (BM25_K1 + 1))
+                        for token in tokens if token in self.postings]
+
+            def scored():
+                for doc_id in candidates:
+                    norm = self._doc_norm(doc_id)
+                    score = 0.0
+                    for docs, weight in weighted:
+                        freq = docs.get(doc_id)
+                        if freq:
+                            score += weight * freq / (freq + norm)
+                    yield score, doc_id
+
+            if limit is None:
+                ranked = sorted(scored(), reverse=True)
+            else:
+                ranked = heapq.nlargest(limit, scored())
+
+        return [(doc_id, score) for score, doc_id in ranked]
+
+
+search_index = SearchIndex()
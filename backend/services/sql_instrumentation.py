@@ -0,0 +1,176 @@
+import json
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# 语句“形状”：去掉参数差异后的SQL，用于发现同一请求中重复执行的相同查询（N+1）
+_IN_LIST = re.compile(r'IN \((?:[^()]|\([^()]*\))*\)', re.IGNORECASE)
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r'\s+')
+
+
+def statement_shape(statement):
+    """将SQL规范化为形状：折叠 IN 列表、数字和字符串字面量以及空白"""
+    shape = _IN_LIST.sub('IN (...)', statement)
+    shape = _LITERAL.sub('?', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+class QueryStats:
+    """一次请求（或一段代码）内执行的SQL统计"""
+
+    def __init__(self, keep_parameters=False):
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+        self.statements = []
+        # 与 statements 一一对应的参数，只在需要重新执行语句（如 EXPLAIN）时保存
+        self.parameters = [] if keep_parameters else None
+        self.shapes = Counter()
+
+    def record(self, statement, duration, parameters=None):
+        self.count += 1
+        self.total_time += duration
+        self.statements.append(statement)
+        if self.parameters is not None:
+            self.parameters.append(parameters)
+        self.shapes[statement_shape(statement)] += 1
+        if duration >= self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_statement = statement
+
+    def repeated(self, threshold):
+        """重复执行次数达到 threshold 的语句形状 [(形状, 次数)]，即疑似 N+1 查询"""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    def as_dict(self, threshold=3):
+        return {
+            'count': self.count,
+            'db_time_ms': round(self.total_time * 1000, 3),
+            'slowest_ms': round(self.slowest_time * 1000, 3),
+            'slowest_statement': _WHITESPACE.sub(' ', self.slowest_statement or '').strip() or None,
+            'n_plus_one': [{'statement': shape, 'count': n} for shape, n in self.repeated(threshold)],
+        }
+
+
+class SQLInstrumentation:
+    """
+    按请求统计SQL条数、数据库耗时和最慢的语句，并检测 N+1 查询
+
+    统计结果写入结构化日志（发现 N+1 或慢请求时为 WARNING，否则为 DEBUG）；
+    SQL_DEBUG_HEADERS 开启时（默认跟随 debug 模式）同时写入响应头：
+    X-SQL-Count、X-SQL-Time（毫秒）、X-SQL-Slowest（毫秒）、X-SQL-N-Plus-One（重复的语句形状数）。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.debug_headers = None
+        self.n_plus_one_threshold = 3
+        self.slow_request_ms = 200
+        self._local = threading.local()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('SQL_INSTRUMENTATION', True)
+        # None 表示跟随 debug 模式，在每个响应时判断（app.run(debug=True) 在创建应用之后才开启 debug）
+        self.debug_headers = app.config.get('SQL_DEBUG_HEADERS')
+        self.n_plus_one_threshold = app.config.get('SQL_N_PLUS_ONE_THRESHOLD', 3)
+        self.slow_request_ms = app.config.get('SQL_SLOW_REQUEST_MS', 200)
+        app.extensions['sql_instrumentation'] = self
+        _listen()
+        if self.enabled:
+            app.before_request(self._start_request)
+            app.after_request(self._finish_request)
+
+    def _collectors(self):
+        collectors = list(getattr(self._local, 'captures', ()))
+        if self.enabled and has_request_context():
+            stats = g.get('_sql_stats')
+            if stats is not None:
+                collectors.append(stats)
+        return collectors
+
+    def _start_request(self):
+        g._sql_stats = QueryStats()
+
+    def _finish_request(self, response):
+        stats = g.pop('_sql_stats', None)
+        if stats is None:
+            return response
+        summary = stats.as_dict(self.n_plus_one_threshold)
+        debug_headers = current_app.debug if self.debug_headers is None else self.debug_headers
+        if debug_headers:
+            response.headers['X-SQL-Count'] = str(summary['count'])
+            response.headers['X-SQL-Time'] = str(summary['db_time_ms'])
+            response.headers['X-SQL-Slowest'] = str(summary['slowest_ms'])
+            response.headers['X-SQL-N-Plus-One'] = str(len(summary['n_plus_one']))
+
+        record = dict(event='sql_stats', method=request.method, path=request.path,
+                      endpoint=request.endpoint, status=response.status_code, **summary)
+        if summary['n_plus_one'] or summary['db_time_ms'] >= self.slow_request_ms:
+            current_app.logger.warning(json.dumps(record, ensure_ascii=False))
+        else:
+            current_app.logger.debug(json.dumps(record, ensure_ascii=False))
+        return response
+
+    @contextmanager
+    def capture(self, parameters=False):
+        """统计代码块内当前线程执行的SQL（包括其中通过测试客户端发起的请求），parameters 为真时同时保存参数"""
+        stats = QueryStats(keep_parameters=parameters)
+        captures = self._local.__dict__.setdefault('captures', [])
+        captures.append(stats)
+        try:
+            yield stats
+        finally:
+            captures.remove(stats)
+
+
+sql_instrumentation = SQLInstrumentation()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._sql_query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collectors = sql_instrumentation._collectors()
+    if collectors:
+        started = getattr(context, '_sql_query_start', None)
+        duration = time.perf_counter() - started if started is not None else 0.0
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        for stats in collectors:
+            stats.record(statement, duration, parameters)
+
+
+def _listen():
+    # 监听所有 Engine（包括只读从库），多次创建应用时只注册一次
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+@contextmanager
+def assert_max_queries(max_queries, allow_n_plus_one=False):
+    """
+    pytest 辅助函数：代码块内执行的SQL超过 max_queries 条（或出现 N+1）时断言失败
+
+        with assert_max_queries(3):
+            client.get('/api/community/posts')
+    """
+    with sql_instrumentation.capture() as stats:
+        yield stats
+    statements = '\n'.join(f'  {i + 1}. {_WHITESPACE.sub(" ", s).strip()}' for i, s in enumerate(stats.statements))
+    if stats.count > max_queries:
+        raise AssertionError(f'执行了 {stats.count} 条SQL，超过上限 {max_queries} 条：\n{statements}')
+    repeated = stats.repeated(sql_instrumentation.n_plus_one_threshold)
+    if repeated and not allow_n_plus_one:
+        details = '\n'.join(f'  {n} 次: {shape}' for shape, n in repeated)
+        raise AssertionError(f'检测到重复执行的相同语句（N+1）：\n{details}')
@@ -0,0 +1,124 @@
+import unicodedata
+from sqlalchemy import func, insert, select
+from models.cultural_resource import CulturalResource, Tag, resource_tags_table
+
+
+# 标签名最大长度（与 tags.name 列一致）
+TAG_MAX_LENGTH = 50
+
+# IN 列表每批的最大元素数
+_CHUNK_SIZE = 500
+
+
+def tag_key(name):
+    """
+    标签名的比较键：忽略大小写和重音
+
+    与 MySQL 默认的 utf8mb4 排序规则（*_ci / *_ai_ci）比较标签名的方式一致，"Tea" 和 "tea" 视为同一个标签。
+    """
+    decomposed = unicodedata.normalize('NFKD', name)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def split_tags(tags):
+    """将标签列表或逗号分隔的字符串拆分为去重（按 tag_key）后的标签名列表，保留第一次出现的写法"""
+    if not tags:
+        return []
+    if isinstance(tags, str):
+        tags = tags.split(',')
+    names = (str(tag).strip()[:TAG_MAX_LENGTH] for tag in tags if tag)
+    unique = {}
+    for name in names:
+        if name:
+            unique.setdefault(tag_key(name), name)
+    return list(unique.values())
+
+
+def parse_tag_args(args):
+    """
+    从查询参数中读取标签过滤条件，返回 (标签名列表, 'all' 或 'any')
+
+    支持 tag=湘绣&tag=长沙 或 tag=湘绣,长沙；tagMode=any 表示包含任一标签，默认需包含全部标签。
+    """
+    names = split_tags([name for value in args.getlist('tag') for name in value.split(',')])
+    mode = 'any' if (args.get('tagMode') or 'all').lower() == 'any' else 'all'
+    return names, mode
+
+
+def tag_filter(names, mode='all'):
+    """按标签过滤资源的条件：通过标签名唯一索引和 (tag_id, resource_id) 索引查找资源id"""
+    resource_ids = select(resource_tags_table.c.resource_id).join(
+        Tag, Tag.id == resource_tags_table.c.tag_id
+    ).where(Tag.name.in_(names))
+    if mode == 'all' and len(names) > 1:
+        resource_ids = resource_ids.group_by(resource_tags_table.c.resource_id).having(
+            func.count(resource_tags_table.c.tag_id) == len(names)
+        )
+    return CulturalResource.id.in_(resource_ids)
+
+
+def filter_ids_by_tags(session, ids, names, mode='all'):
+    """从资源id列表中筛选出满足标签条件的id（保持原有顺序）"""
+    matched = set()
+    for start in range(0, len(ids), _CHUNK_SIZE):
+        chunk = ids[start:start + _CHUNK_SIZE]
+        matched.update(session.scalars(
+            select(CulturalResource.id).where(CulturalResource.id.in_(chunk), tag_filter(names, mode))
+        ))
+    return [resource_id for resource_id in ids if resource_id in matched]
+
+
+def _match_tags(session, names):
+    """查询已有的标签，返回 {比较键: 标签id}"""
+    # MySQL 按不区分大小写的排序规则比较，查询 'tea' 可能返回已有的 'Tea'，因此按比较键而不是原名对应
+    rows = session.execute(select(Tag.name, Tag.id).where(Tag.name.in_(names))).all()
+    return {tag_key(name): tag_id for name, tag_id in rows}
+
+
+def ensure_tags(session, names):
+    """
+    返回 {标签名: 标签id}，不存在的标签先创建（并发创建同名标签时由唯一索引去重）
+
+    比较键（tag_key）相同的标签名对应同一个标签，以第一次出现的写法查询和创建。
+    """
+    canonical = {}
+    for name in names:
+        canonical.setdefault(tag_key(name), name)
+    keys = list(canonical)
+    found = {}
+    for start in range(0, len(keys), _CHUNK_SIZE):
+        chunk = [canonical[key] for key in keys[start:start + _CHUNK_SIZE]]
+        found.update(_match_tags(session, chunk))
+        missing = [name for name in chunk if tag_key(name) not in found]
+        if missing:
+            session.execute(
+                insert(Tag.__table__).prefix_with('IGNORE', dialect='mysql').prefix_with('OR IGNORE', dialect='sqlite'),
+                [{'name': name} for name in missing]
+            )
+            found.update(_match_tags(session, missing))
+    return {name: found[tag_key(name)] for name in names}
+
+
+def linked_tag_names(session, resource_id):
+    """资源已关联的标签名（tags 表中的写法，与按关联表聚合的结果一致）"""
+    return list(session.scalars(
+        select(Tag.name).join(resource_tags_table, resource_tags_table.c.tag_id == Tag.id)
+        .where(resource_tags_table.c.resource_id == resource_id)
+    ))
+
+
+def attach_tags(session, resource_tags):
+    """
+    为资源写入标签关联，resource_tags 为 [(资源id, 标签列表或逗号分隔的字符串), ...]
+
+    只新增关联，已存在的关联被忽略；由调用方提交事务。
+    """
+    pairs = [(resource_id, split_tags(tags)) for resource_id, tags in resource_tags]
+    tag_ids = ensure_tags(session, [name for _, names in pairs for name in names])
+    rows = [{'resource_id': resource_id, 'tag_id': tag_ids[name]} for resource_id, names in pairs for name in names]
+    if rows:
+        session.execute(
+            insert(resource_tags_table).prefix_with('IGNORE', dialect='mysql').prefix_with('OR IGNORE', dialect='sqlite'),
+            rows
+        )
+    return len(rows)
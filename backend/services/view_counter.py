@@ -0,0 +1,113 @@
+import atexit
+import os
+import threading
+from sqlalchemy import bindparam, func, update
+from services.hot_score import refresh_hot_scores
+
+
+class ViewCounter:
+    """
+    浏览量写缓冲
+
+    浏览请求只在进程内累加计数，后台线程按时间间隔或缓冲数量阈值，
+    将累计值批量写回数据库（UPDATE ... SET view_count = view_count + n），
+    进程退出时再写回一次。返回给客户端的浏览量为最终一致。
+    """
+
+    # 允许缓冲浏览量的表
+    TABLES = ('cultural_resources', 'community_posts')
+
+    def __init__(self):
+        self.app = None
+        self.flush_interval = 5
+        self.flush_size = 500
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            # Gunicorn 预加载应用后 fork 出的工作进程需要各自的缓冲和后台线程
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._pending = {}
+        self._buffered = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        self.app = app
+        self.flush_interval = app.config.get('VIEW_COUNT_FLUSH_INTERVAL', 5)
+        self.flush_size = app.config.get('VIEW_COUNT_FLUSH_SIZE', 500)
+        app.extensions['view_counter'] = self
+        atexit.register(self.flush)
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='view-counter-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                self.app.logger.error(f"写回浏览量失败: {str(e)}", exc_info=True)
+
+    def incr(self, table, row_id, n=1):
+        """累加一次浏览，返回该行尚未写回数据库的浏览量"""
+        if table not in self.TABLES:
+            raise ValueError(f'不支持缓冲浏览量的表: {table}')
+        with self._lock:
+            key = (table, row_id)
+            self._pending[key] = self._pending.get(key, 0) + n
+            self._buffered += n
+            pending = self._pending[key]
+            self._ensure_worker()
+            if self._buffered >= self.flush_size:
+                self._wakeup.set()
+        return pending
+
+    def pending(self, table, row_id):
+        """返回该行尚未写回数据库的浏览量"""
+        with self._lock:
+            return self._pending.get((table, row_id), 0)
+
+    def flush(self):
+        """将缓冲的浏览量批量写回数据库，返回写回的行数"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._buffered = 0
+        if not pending or self.app is None:
+            return 0
+
+        by_table = {}
+        for (table, row_id), n in pending.items():
+            by_table.setdefault(table, []).append({'row_id': row_id, 'n': n})
+
+        try:
+            with self.app.app_context():
+                db = self.app.db
+                with db.engine.begin() as conn:
+                    for table_name, params in by_table.items():
+                        table = db.metadata.tables[table_name]
+                        stmt = update(table).where(
+                            table.c.id == bindparam('row_id')
+                        ).values(
+                            view_count=func.coalesce(table.c.view_count, 0) + bindparam('n')
+                        )
+                        conn.execute(stmt, params)
+                        if table_name == 'community_posts':
+                            # 浏览量变化后同步更新帖子热度分
+                            refresh_hot_scores([p['row_id'] for p in params], session=conn)
+        except Exception:
+            # 写回失败时把计数放回缓冲区，等待下一次写回
+            with self._lock:
+                for key, n in pending.items():
+                    self._pending[key] = self._pending.get(key, 0) + n
+                    self._buffered += n
+            raise
+        return len(pending)
+
+
+view_counter = ViewCounter()
@@ -0,0 +1,80 @@
+import os
+import sys
+import tempfile
+import pytest
+
+# 测试使用临时 SQLite 数据库和索引文件，关闭响应缓存和后台任务；需在导入 config 之前设置
+# TEST_DATABASE_URL 可指定一个空的 MySQL 数据库，在 MySQL 上检查执行计划
+_workdir = tempfile.mkdtemp(prefix='huxiang_tests_')
+os.environ['DATABASE_URL'] = os.environ.get('TEST_DATABASE_URL') or 'sqlite:///' + os.path.join(_workdir, 'test.db')
+os.environ['SEARCH_INDEX_PATH'] = os.path.join(_workdir, 'search_index.pkl')
+os.environ['RECOMMENDER_PATH'] = os.path.join(_workdir, 'recommender')
+os.environ['RESPONSE_CACHE_BACKEND'] = 'none'
+os.environ['HOT_SCORE_REFRESH_INTERVAL'] = '0'
+os.environ['PURGE_INTERVAL'] = '0'
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_app(config_class=None):
+    """
+    创建测试用的应用
+
+    后台任务、索引等单例在 create_app 时绑定到最新创建的应用；使用其他配置创建应用的测试结束后
+    需再调用一次 make_app()，让单例重新指向默认配置。
+    """
+    from app import create_app
+    from config import Config
+    from services.purge import post_purger
+    app = create_app(config_class or Config)
+    app.config['TESTING'] = True
+    # 清理任务的文件锁和进度文件写入临时目录，不写入 instance/
+    post_purger.lock_path = os.path.join(_workdir, 'purge.lock')
+    post_purger.progress_path = os.path.join(_workdir, 'purge_progress.json')
+    return app
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import db
+    app = make_app()
+    with app.app_context():
+        # 只建默认库的表（其他测试以从库配置创建应用后，db 中会留下从库的空元数据）
+        db.create_all(bind_key=None)
+        seed(db)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def seed(db):
+    """多个作者的帖子和多层回复，作者信息逐条加载（N+1）时会被检测出来"""
+    from models.user import User
+    from models.community_post import CommunityPost, Comment
+
+    users = [User(username=f'user{i}', email=f'user{i}@example.com', role='admin' if i == 0 else 'user')
+             for i in range(5)]
+    for user in users:
+        user.password_hash = 'x'
+    db.session.add_all(users)
+    db.session.flush()
+
+    posts = [CommunityPost(title=f'湖湘文化{i}', content='湖湘文化源远流长' * (i + 1),
+                           author_id=users[i % len(users)].id, category='讨论')
+             for i in range(6)]
+    db.session.add_all(posts)
+    db.session.flush()
+
+    for i, user in enumerate(users):
+        comment = Comment(content=f'评论{i}', author_id=user.id, post_id=posts[0].id)
+        db.session.add(comment)
+        db.session.flush()
+        reply = Comment(content=f'回复{i}', author_id=users[(i + 1) % len(users)].id,
+                        post_id=posts[0].id, parent_id=comment.id)
+        db.session.add(reply)
+        comment.reply_count = 1
+    posts[0].comment_count = len(users)
+    db.session.commit()
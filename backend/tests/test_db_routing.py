@@ -0,0 +1,130 @@
+"""
+读写分离：两个 SQLite 文件分别充当主库和从库
+
+只读接口从从库读取、写操作落在主库，写入后 REPLICA_STICKY_SECONDS 秒内该客户端的读请求仍走主库。
+从库是主库的一份拷贝，拷贝后把从库中的标题和内容加上“从库:”前缀，以此区分读取的是哪个库。
+
+    cd backend && python -m pytest tests/test_db_routing.py
+"""
+import shutil
+import sqlite3
+import pytest
+from flask_jwt_extended import create_access_token
+from config import Config
+from conftest import make_app, seed
+from services.db_routing import PRIMARY_COOKIE
+
+REPLICA_PREFIX = '从库:'
+
+
+@pytest.fixture(scope='module')
+def routing(tmp_path_factory):
+    workdir = tmp_path_factory.mktemp('db_routing')
+    primary_path, replica_path = workdir / 'primary.db', workdir / 'replica.db'
+
+    class ReplicaConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{primary_path}'
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        SQLALCHEMY_BINDS = {'replica': f'sqlite:///{replica_path}'}
+        REPLICA_STICKY_SECONDS = 5
+        SEARCH_INDEX_PATH = str(workdir / 'search_index.pkl')
+        RECOMMENDER_PATH = str(workdir / 'recommender')
+
+    from app import db
+    from models.cultural_resource import CulturalResource
+    from services.recommender import recommender
+    from services.view_counter import view_counter
+
+    app = make_app(ReplicaConfig)
+    with app.app_context():
+        db.create_all(bind_key=None)
+        seed(db)
+        db.session.add(CulturalResource(title='岳麓书院', content='千年学府', type='遗迹', category='历史',
+                                        status='published'))
+        db.session.commit()
+        recommender.rebuild(db.session)
+        token = create_access_token(identity=1)
+        for engine in db.engines.values():
+            engine.dispose()
+
+    # 从库：主库的拷贝，内容带上前缀
+    shutil.copyfile(primary_path, replica_path)
+    with sqlite3.connect(replica_path) as conn:
+        conn.execute('UPDATE community_posts SET title = ? || title', (REPLICA_PREFIX,))
+        conn.execute('UPDATE comments SET content = ? || content', (REPLICA_PREFIX,))
+        conn.execute('UPDATE cultural_resources SET title = ? || title', (REPLICA_PREFIX,))
+
+    yield app, token, str(primary_path), str(replica_path)
+
+    # 详情接口累计的浏览量写回本测试的主库，相似帖子索引的增量更新写入本测试的索引目录
+    view_counter.flush()
+    recommender.flush()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    # 让后台任务、索引等单例重新指向默认配置的应用
+    make_app()
+
+
+def _rows(path, sql, *params):
+    with sqlite3.connect(path) as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+@pytest.mark.parametrize('url, field', [
+    ('/api/community/posts', 'title'),
+    ('/api/community/posts?cursor=', 'title'),
+    ('/api/resources/', 'title'),
+    ('/api/community/posts/1/comments', 'content'),
+    ('/api/community/posts/related/1?limit=3', 'title'),
+])
+def test_read_only_endpoints_use_replica(routing, url, field):
+    app, _, _, _ = routing
+    response = app.test_client().get(url)
+    assert response.status_code == 200, response.get_json()
+    data = response.get_json()['data']
+    assert data
+    assert all(item[field].startswith(REPLICA_PREFIX) for item in data)
+
+
+def test_detail_endpoint_reads_primary(routing):
+    # 详情接口没有标记为只读（会累计浏览量），始终使用主库
+    app, _, _, _ = routing
+    response = app.test_client().get('/api/community/posts/1')
+    assert not response.get_json()['data']['title'].startswith(REPLICA_PREFIX)
+
+
+def test_writes_land_on_primary(routing):
+    app, token, primary_path, replica_path = routing
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.post('/api/community/posts', headers=headers,
+                           json={'title': '写入主库', 'content': '内容', 'category': '讨论'})
+    assert response.status_code == 201, response.get_json()
+    response = client.post('/api/community/posts/1/comments', headers=headers, json={'content': '主库评论'})
+    assert response.status_code == 201, response.get_json()
+
+    assert _rows(primary_path, 'SELECT COUNT(*) FROM community_posts WHERE title = ?', '写入主库') == [(1,)]
+    assert _rows(replica_path, 'SELECT COUNT(*) FROM community_posts WHERE title = ?', '写入主库') == [(0,)]
+    assert _rows(primary_path, 'SELECT COUNT(*) FROM comments WHERE content = ?', '主库评论') == [(1,)]
+    assert _rows(replica_path, 'SELECT COUNT(*) FROM comments WHERE content = ?', '主库评论') == [(0,)]
+
+
+def test_reads_after_write_stick_to_primary(routing):
+    app, token, _, _ = routing
+    writer = app.test_client()
+    response = writer.post('/api/community/posts', headers={'Authorization': f'Bearer {token}'},
+                           json={'title': '刚写入', 'content': '内容', 'category': '讨论'})
+    assert response.status_code == 201
+    assert PRIMARY_COOKIE in response.headers.get('Set-Cookie', '')
+
+    # 写入的客户端在 Cookie 有效期内读主库，能读到自己的写入
+    titles = [item['title'] for item in writer.get('/api/community/posts?limit=100').get_json()['data']]
+    assert '刚写入' in titles
+    assert not any(title.startswith(REPLICA_PREFIX) for title in titles)
+
+    # 其他客户端仍从从库读取
+    titles = [item['title'] for item in app.test_client().get('/api/community/posts?limit=100').get_json()['data']]
+    assert '刚写入' not in titles
+    assert all(title.startswith(REPLICA_PREFIX) for title in titles)
@@ -0,0 +1,77 @@
+"""
+分面统计：按增量更新的全量统计与重新聚合的结果一致
+
+    cd backend && python -m pytest tests/test_facets.py
+"""
+import pytest
+from services.facets import FacetCounts, aggregate_facets
+
+
+@pytest.fixture
+def tagged_resources(app):
+    """已有标签 "Tea"；测试结束后删除新增的资源、标签关联和标签"""
+    from app import db
+    from models.cultural_resource import CulturalResource, Tag, resource_tags_table
+
+    with app.app_context():
+        last_id = db.session.query(db.func.max(CulturalResource.id)).scalar() or 0
+        tag = Tag(name='Tea')
+        db.session.add(tag)
+        db.session.commit()
+
+        def create(tags, status='published'):
+            # 模拟 MySQL 不区分大小写的排序规则：资源的 tags 列写作 "tea"，关联到已有的标签 "Tea"
+            resource = CulturalResource(title='茶', content='安化黑茶', type='物产', category='饮食',
+                                        tags=tags, status=status)
+            db.session.add(resource)
+            db.session.flush()
+            db.session.execute(resource_tags_table.insert().values(resource_id=resource.id, tag_id=tag.id))
+            db.session.commit()
+            return resource
+
+        yield db.session, create
+
+        db.session.rollback()
+        db.session.execute(resource_tags_table.delete().where(resource_tags_table.c.resource_id > last_id))
+        CulturalResource.query.filter(CulturalResource.id > last_id).delete(synchronize_session=False)
+        Tag.query.filter_by(id=tag.id).delete()
+        db.session.commit()
+
+
+def _assert_matches_aggregation(counts, session):
+    total, facets = counts.get(session)
+    assert (total, facets) == aggregate_facets(session)
+    return facets
+
+
+def test_incremental_tags_use_linked_tag_name(tagged_resources):
+    session, create = tagged_resources
+    counts = FacetCounts()
+    counts.get(session)
+
+    resource = create('tea')
+    counts.resource_created(session, resource)
+    facets = _assert_matches_aggregation(counts, session)
+    assert facets['tags']['Tea'] == 1
+    assert 'tea' not in facets['tags']
+
+    old_status, resource.status = resource.status, 'archived'
+    session.commit()
+    counts.resource_status_changed(session, resource, old_status)
+    facets = _assert_matches_aggregation(counts, session)
+    assert 'Tea' not in facets['tags']
+
+
+def test_unpublished_resource_is_not_counted(tagged_resources):
+    session, create = tagged_resources
+    counts = FacetCounts()
+    total, _ = counts.get(session)
+
+    resource = create('tea', status='draft')
+    counts.resource_created(session, resource)
+    assert counts.get(session)[0] == total
+
+    resource.status = 'published'
+    session.commit()
+    counts.resource_status_changed(session, resource, 'draft')
+    assert _assert_matches_aggregation(counts, session)['tags']['Tea'] == 1
@@ -0,0 +1,98 @@
+"""
+批量导入：--offset 跳过的记录不解析，其余记录按批写入并统计
+
+    cd backend && python -m pytest tests/test_import_resources.py
+"""
+import json
+import pytest
+from import_resources import import_resources, read_records
+
+# 两种格式都是：前2条位于 offset 之前（已在上次导入），其后依次为一条重复的记录、一条无效记录和一条带标签的记录
+# JSONL 第1条无法解析，跳过时不解析，因此不计入无效记录；CSV 第1条带有跨行的字段
+JSONL_LINES = [
+    '{"title": "残缺的记录",',
+    json.dumps({'title': '岳麓书院', 'content': '千年学府', 'type': '遗迹', 'category': '历史'}, ensure_ascii=False),
+    '',
+    json.dumps({'title': '橘子洲', 'content': '湘江中的沙洲', 'type': '景观', 'category': '地理'}, ensure_ascii=False),
+    json.dumps({'title': '橘子洲', 'content': '湘江中的沙洲', 'type': '景观', 'category': '地理'}, ensure_ascii=False),
+    json.dumps({'title': '缺少内容', 'type': '景观', 'category': '地理'}, ensure_ascii=False),
+    json.dumps({'title': '湘绣', 'content': '四大名绣之一', 'type': '技艺', 'category': '非遗',
+                'tags': ['刺绣', '非遗']}, ensure_ascii=False),
+]
+
+CSV_TEXT = (
+    'title,content,type,category,tags\n'
+    '旧记录,"跨行\n的内容",遗迹,历史,\n'
+    '\n'
+    '岳麓书院,千年学府,遗迹,历史,\n'
+    '橘子洲,湘江中的沙洲,景观,地理,\n'
+    '橘子洲,湘江中的沙洲,景观,地理,\n'
+    '缺少内容,,景观,地理,\n'
+    '湘绣,四大名绣之一,技艺,非遗,"刺绣,非遗"\n'
+)
+
+
+@pytest.fixture
+def imported(app):
+    """记录导入前的最大资源id，测试结束后删除导入的资源和标签关联"""
+    from app import db
+    from models.cultural_resource import CulturalResource, resource_tags_table
+
+    with app.app_context():
+        last_id = db.session.query(db.func.max(CulturalResource.id)).scalar() or 0
+
+        def titles():
+            return [title for (title,) in db.session.query(CulturalResource.title)
+                    .filter(CulturalResource.id > last_id).order_by(CulturalResource.id)]
+
+        yield titles
+
+        db.session.execute(resource_tags_table.delete().where(resource_tags_table.c.resource_id > last_id))
+        CulturalResource.query.filter(CulturalResource.id > last_id).delete(synchronize_session=False)
+        db.session.commit()
+
+
+def _import(path, file_format, offset):
+    with open(path, 'r', encoding='utf-8-sig', newline='' if file_format == 'csv' else None) as handle:
+        return import_resources(read_records(handle, file_format, offset), batch_size=2, offset=offset)
+
+
+def _assert_resumed_import(stats, titles):
+    # 重复的记录没有去重，按两条记录写入
+    assert {key: stats[key] for key in ('read', 'imported', 'invalid', 'position', 'committed')} == {
+        'read': 4, 'imported': 3, 'invalid': 1, 'position': 6, 'committed': 6}
+    assert titles() == ['橘子洲', '橘子洲', '湘绣']
+
+
+def test_jsonl_offset_skips_lines_before_parsing(imported, tmp_path):
+    path = tmp_path / 'resources.jsonl'
+    path.write_text('\n'.join(JSONL_LINES) + '\n', encoding='utf-8')
+    _assert_resumed_import(_import(path, 'jsonl', offset=2), imported)
+
+
+def test_csv_offset_skips_rows_before_parsing(imported, tmp_path):
+    path = tmp_path / 'resources.csv'
+    path.write_text(CSV_TEXT, encoding='utf-8')
+    _assert_resumed_import(_import(path, 'csv', offset=2), imported)
+
+
+def test_imported_resources_get_tag_links(app, imported, tmp_path):
+    from app import db
+    from models.cultural_resource import CulturalResource, Tag, resource_tags_table
+
+    path = tmp_path / 'resources.jsonl'
+    path.write_text('\n'.join(JSONL_LINES[-1:]) + '\n', encoding='utf-8')
+    assert _import(path, 'jsonl', offset=0)['imported'] == 1
+    resource = db.session.query(CulturalResource).filter_by(title='湘绣').one()
+    assert resource.tags == '刺绣,非遗'
+    names = db.session.query(Tag.name).join(resource_tags_table, resource_tags_table.c.tag_id == Tag.id) \
+        .filter(resource_tags_table.c.resource_id == resource.id)
+    assert sorted(name for (name,) in names) == ['刺绣', '非遗']
+
+
+def test_offset_past_end_reads_nothing(imported, tmp_path):
+    path = tmp_path / 'resources.csv'
+    path.write_text(CSV_TEXT, encoding='utf-8')
+    stats = _import(path, 'csv', offset=10)
+    assert (stats['read'], stats['imported'], stats['committed']) == (0, 0, 10)
+    assert imported() == []
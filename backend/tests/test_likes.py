@@ -0,0 +1,103 @@
+"""
+点赞切换：语句条数、点赞数与点赞记录一致（含重复点击和并发点赞）、热度分随点赞增量更新
+
+    cd backend && python -m pytest tests/test_likes.py
+"""
+import threading
+import pytest
+from sqlalchemy import func, select
+from models.community_post import CommunityPost, compute_hot_score, user_likes_table
+from services.likes import toggle_post_like
+from services.sql_instrumentation import assert_max_queries
+
+
+@pytest.fixture
+def post_id(app):
+    from app import db
+    with app.app_context():
+        post = CommunityPost(title='点赞', content='点赞', author_id=1, category='讨论', view_count=30)
+        db.session.add(post)
+        db.session.commit()
+        post_id = post.id
+    yield post_id
+    with app.app_context():
+        db.session.execute(user_likes_table.delete().where(user_likes_table.c.post_id == post_id))
+        CommunityPost.query.filter_by(id=post_id).delete()
+        db.session.commit()
+
+
+def _counts(app, post_id):
+    """返回 (帖子的点赞数, 点赞记录条数)"""
+    from app import db
+    with app.app_context():
+        like_count = db.session.scalar(select(CommunityPost.like_count).where(CommunityPost.id == post_id))
+        rows = db.session.scalar(
+            select(func.count()).select_from(user_likes_table).where(user_likes_table.c.post_id == post_id)
+        )
+        return like_count, rows
+
+
+def test_like_and_unlike_statements(app, post_id):
+    with app.app_context():
+        # 点赞：INSERT IGNORE、UPDATE（同时返回点赞数）
+        with assert_max_queries(2):
+            assert toggle_post_like(post_id, 1) == (True, 1)
+        # 取消点赞：INSERT IGNORE（被忽略）、DELETE、UPDATE
+        with assert_max_queries(3):
+            assert toggle_post_like(post_id, 1) == (False, 0)
+    assert _counts(app, post_id) == (0, 0)
+
+
+def test_double_toggle_keeps_count_in_sync(app, post_id):
+    with app.app_context():
+        assert toggle_post_like(post_id, 1) == (True, 1)
+        assert toggle_post_like(post_id, 2) == (True, 2)
+        assert toggle_post_like(post_id, 1) == (False, 1)
+        assert toggle_post_like(post_id, 1) == (True, 2)
+    assert _counts(app, post_id) == (2, 2)
+
+
+def test_hot_score_follows_like_count(app, post_id):
+    from app import db
+    with app.app_context():
+        for user_id in (1, 2, 3):
+            toggle_post_like(post_id, user_id)
+        toggle_post_like(post_id, 2)
+        post = db.session.get(CommunityPost, post_id)
+        expected = compute_hot_score(post.like_count, post.comment_count, post.view_count, post.created_at)
+        assert post.like_count == 2
+        assert post.hot_score == pytest.approx(expected, abs=1e-6)
+
+
+def test_missing_post_is_not_liked(app):
+    with app.app_context():
+        assert toggle_post_like(999999, 1) is None
+    assert _counts(app, 999999) == (None, 0)
+
+
+def test_parallel_toggles_keep_count_equal_to_rows(app, post_id):
+    errors = []
+    start = threading.Barrier(10)
+
+    def worker(user_id, times):
+        try:
+            start.wait()
+            for _ in range(times):
+                with app.app_context():
+                    toggle_post_like(post_id, user_id)
+        except Exception as e:  # 线程中的异常不会让测试失败，收集后断言
+            errors.append(e)
+
+    # 5 个用户并发点赞（奇数次切换，最终为已点赞），其中每个用户再由另一线程并发重复点击
+    threads = [threading.Thread(target=worker, args=(user_id, 3)) for user_id in range(1, 6)]
+    threads += [threading.Thread(target=worker, args=(user_id, 2)) for user_id in range(1, 6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    like_count, rows = _counts(app, post_id)
+    assert like_count == rows
+    # 每个用户共切换 5 次（奇数），最终全部为已点赞
+    assert rows == 5
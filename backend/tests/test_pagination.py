@@ -0,0 +1,116 @@
+"""
+游标分页：排序键相同的行逐页遍历时不重复、不遗漏；被篡改的游标返回 400
+
+    cd backend && python -m pytest tests/test_pagination.py
+"""
+import base64
+import json
+from datetime import datetime
+import pytest
+from services.pagination import encode_cursor
+
+
+def _walk(client, url, limit=2):
+    """沿 next_cursor 逐页读取，返回全部条目的 id"""
+    ids, cursor = [], ''
+    for _ in range(100):
+        separator = '&' if '?' in url else '?'
+        response = client.get(f'{url}{separator}limit={limit}&cursor={cursor}')
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        ids.extend(item['id'] for item in body['data'])
+        cursor = body['pagination']['next_cursor']
+        if cursor is None:
+            return ids
+    raise AssertionError('游标分页没有结束')
+
+
+def _raw_cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+@pytest.fixture(scope='module')
+def tied_post(app):
+    """评论的创建时间全部相同的帖子，翻页只能依靠 id 区分"""
+    from app import db
+    from models.community_post import CommunityPost, Comment
+    with app.app_context():
+        post = CommunityPost(title='分页', content='分页', author_id=1, category='讨论')
+        db.session.add(post)
+        db.session.flush()
+        created_at = datetime(2024, 5, 1, 12, 0, 0)
+        db.session.add_all([Comment(content=f'同时{i}', author_id=1, post_id=post.id, created_at=created_at)
+                            for i in range(7)])
+        post.comment_count = 7
+        db.session.commit()
+        post_id = post.id
+    yield post_id
+    with app.app_context():
+        # 其他测试依赖种子数据的条数，用完即删除
+        Comment.query.filter_by(post_id=post_id).delete()
+        CommunityPost.query.filter_by(id=post_id).delete()
+        db.session.commit()
+
+
+@pytest.mark.parametrize('sort_by', ['latest', 'popular', 'comments'])
+def test_post_cursor_walk_matches_offset_listing(client, sort_by, tied_post):
+    # comments 排序下大部分帖子的评论数都为 0，翻页依赖 id 打破并列
+    expected = [item['id'] for item in
+                client.get(f'/api/community/posts?sortBy={sort_by}&limit=100').get_json()['data']]
+    walked = _walk(client, f'/api/community/posts?sortBy={sort_by}')
+    assert walked == expected
+    assert len(set(walked)) == len(walked)
+
+
+def test_comment_cursor_walk_with_equal_timestamps(client, tied_post):
+    walked = _walk(client, f'/api/community/posts/{tied_post}/comments', limit=3)
+    assert len(walked) == 7
+    assert walked == sorted(walked, reverse=True)
+
+
+@pytest.mark.parametrize('cursor', [
+    _raw_cursor({'s': 'latest', 'k': [[1, 2], 3]}),
+    _raw_cursor({'s': 'latest', 'k': [{'dt': '2024-01-01T00:00:00'}, {'id': 1}]}),
+    _raw_cursor({'s': 'latest', 'k': [{'dt': ['x']}, 1]}),
+    _raw_cursor({'s': 'latest', 'k': ['2024-01-01', 1]}),
+    _raw_cursor({'s': 'latest', 'k': [{'dt': '2024-01-01T00:00:00'}, True]}),
+    _raw_cursor({'s': 'latest', 'k': [{'dt': '2024-01-01T00:00:00'}]}),
+    _raw_cursor({'s': 'latest', 'k': 5}),
+    _raw_cursor(['latest']),
+    _raw_cursor({'s': 'popular', 'k': ['1.5', 1]}),
+    'not-base64!',
+])
+def test_tampered_post_cursor_is_rejected(client, cursor):
+    response = client.get(f'/api/community/posts?cursor={cursor}')
+    assert response.status_code == 400
+    assert response.get_json()['message'] in ('无效的游标', '游标与排序方式不匹配')
+
+
+def test_cursor_for_another_sort_is_rejected(client):
+    cursor = encode_cursor('comments', [0, 1])
+    response = client.get(f'/api/community/posts?sortBy=latest&cursor={cursor}')
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('values', [[[1]], [{'a': 1}], ['3'], [-1]])
+def test_tampered_relevance_cursor_is_rejected(client, values):
+    cursor = encode_cursor('relevance', values)
+    response = client.get(f'/api/resources/?search=湖湘&cursor={cursor}')
+    assert response.status_code == 400
+    assert response.get_json()['message'] == '无效的游标'
+
+
+def test_tampered_comment_cursor_is_rejected(client, tied_post):
+    cursor = _raw_cursor({'s': 'comments', 'k': [{'dt': '2024-05-01T12:00:00'}, [1]]})
+    response = client.get(f'/api/community/posts/{tied_post}/comments?cursor={cursor}')
+    assert response.status_code == 400
+
+
+def test_hot_score_round_trips_through_cursor():
+    # 游标把热度分原样带回做 = 和 < 比较：MySQL 上必须是 DOUBLE（FLOAT(53)）而不是4字节的 FLOAT，且不能为空
+    from sqlalchemy.dialects import mysql
+    from models.community_post import CommunityPost
+    column = CommunityPost.__table__.c.hot_score
+    assert column.type.compile(dialect=mysql.dialect()) == 'FLOAT(53)'
+    assert not column.nullable
+    assert column.server_default is not None
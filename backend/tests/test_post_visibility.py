@@ -0,0 +1,117 @@
+"""
+帖子可见性：已删除的帖子对所有人按不存在处理，未发布（隐藏、草稿）的帖子只对作者和管理员可见，
+帖子详情、评论、回复、发表评论、相关帖子、删除评论和点赞接口使用同一规则
+
+    cd backend && python -m pytest tests/test_post_visibility.py
+"""
+import pytest
+from flask_jwt_extended import create_access_token
+
+# 种子数据中 user0（id 1）为管理员；帖子作者为 user1（id 2），其他用户为 user2（id 3）
+ADMIN_ID, AUTHOR_ID, OTHER_ID = 1, 2, 3
+
+# 接口：(方法, 路径, 请求体, 是否需要登录)，路径中的 {comment_id} 为每次请求新建的作者评论
+ENDPOINTS = {
+    'detail': ('GET', '/api/community/posts/{post_id}', None, False),
+    'comments': ('GET', '/api/community/posts/{post_id}/comments', None, False),
+    'replies': ('GET', '/api/community/comments/{parent_id}/replies', None, False),
+    'related': ('GET', '/api/community/posts/related/{post_id}', None, False),
+    'add_comment': ('POST', '/api/community/posts/{post_id}/comments', {'content': '评论'}, True),
+    'delete_comment': ('DELETE', '/api/community/comments/{comment_id}', None, True),
+    'like': ('POST', '/api/community/posts/{post_id}/like', None, True),
+}
+
+
+@pytest.fixture(scope='module')
+def posts(app):
+    """作者的隐藏帖子和已删除帖子（各带一条评论和一条回复），模块结束后删除"""
+    from app import db
+    from models.community_post import CommunityPost, Comment
+
+    with app.app_context():
+        ids = {}
+        for status in ('hidden', 'deleted'):
+            post = CommunityPost(title=f'{status}帖子', content='内容', author_id=AUTHOR_ID, category='讨论',
+                                 status=status)
+            db.session.add(post)
+            db.session.flush()
+            comment = Comment(content='评论', author_id=AUTHOR_ID, post_id=post.id, reply_count=1)
+            db.session.add(comment)
+            db.session.flush()
+            db.session.add(Comment(content='回复', author_id=OTHER_ID, post_id=post.id, parent_id=comment.id))
+            ids[status] = {'post_id': post.id, 'parent_id': comment.id}
+        db.session.commit()
+        tokens = {user_id: create_access_token(identity=user_id) for user_id in (ADMIN_ID, AUTHOR_ID, OTHER_ID)}
+
+    yield ids, tokens
+
+    from models.community_post import user_likes_table
+    with app.app_context():
+        post_ids = [post['post_id'] for post in ids.values()]
+        comments = Comment.query.filter(Comment.post_id.in_(post_ids))
+        comments.update({'parent_id': None}, synchronize_session=False)
+        comments.delete(synchronize_session=False)
+        db.session.execute(user_likes_table.delete().where(user_likes_table.c.post_id.in_(post_ids)))
+        CommunityPost.query.filter(CommunityPost.id.in_(post_ids)).delete(synchronize_session=False)
+        db.session.commit()
+
+
+def _cases(user_ids):
+    """(接口, 用户) 组合，未登录（None）时跳过需要登录的接口"""
+    return [pytest.param(endpoint, user_id, id=f'{endpoint}-{user_id}')
+            for endpoint, (_, _, _, auth) in ENDPOINTS.items() for user_id in user_ids
+            if user_id is not None or not auth]
+
+
+def _request(app, client, posts, status, endpoint, user_id):
+    from app import db
+    from models.community_post import Comment
+
+    ids, tokens = posts
+    method, path, body, _ = ENDPOINTS[endpoint]
+    values = dict(ids[status])
+    if '{comment_id}' in path:
+        with app.app_context():
+            comment = Comment(content='待删除', author_id=AUTHOR_ID, post_id=values['post_id'])
+            db.session.add(comment)
+            db.session.commit()
+            values['comment_id'] = comment.id
+    headers = {'Authorization': f'Bearer {tokens[user_id]}'} if user_id else {}
+    return client.open(path.format(**values), method=method, headers=headers, json=body)
+
+
+@pytest.mark.parametrize('endpoint, user_id', _cases([None, OTHER_ID]))
+def test_hidden_post_is_not_found_for_others(app, client, posts, endpoint, user_id):
+    response = _request(app, client, posts, 'hidden', endpoint, user_id)
+    assert response.status_code == 404, response.get_json()
+
+
+@pytest.mark.parametrize('endpoint, user_id', _cases([AUTHOR_ID, ADMIN_ID]))
+def test_hidden_post_is_visible_to_author_and_admin(app, client, posts, endpoint, user_id):
+    response = _request(app, client, posts, 'hidden', endpoint, user_id)
+    assert response.status_code < 400, response.get_json()
+
+
+@pytest.mark.parametrize('endpoint, user_id', _cases([None, OTHER_ID, AUTHOR_ID, ADMIN_ID]))
+def test_deleted_post_is_not_found(app, client, posts, endpoint, user_id):
+    response = _request(app, client, posts, 'deleted', endpoint, user_id)
+    assert response.status_code == 404, response.get_json()
+
+
+def test_related_posts_of_hidden_post_are_not_shared_by_cache(app, client, posts):
+    response = _request(app, client, posts, 'hidden', 'related', AUTHOR_ID)
+    assert response.status_code == 200
+    assert response.cache_control.private
+
+
+def test_hidden_post_likes_follow_visibility(app, posts):
+    from services.likes import toggle_post_like
+
+    ids, _ = posts
+    post_id = ids['hidden']['post_id']
+    with app.app_context():
+        assert toggle_post_like(post_id, OTHER_ID) is None
+        liked, _ = toggle_post_like(post_id, AUTHOR_ID)
+        assert toggle_post_like(post_id, AUTHOR_ID)[0] is not liked
+        assert toggle_post_like(post_id, OTHER_ID, include_unpublished=True) is not None
+        assert toggle_post_like(ids['deleted']['post_id'], ADMIN_ID, include_unpublished=True) is None
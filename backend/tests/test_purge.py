@@ -0,0 +1,85 @@
+"""
+已删除帖子的后台清理：分批删除评论（含回复）、点赞记录和帖子本身，清理前被恢复的帖子保留
+
+    cd backend && python -m pytest tests/test_purge.py
+"""
+import pytest
+from sqlalchemy import func, select
+from models.community_post import CommunityPost, Comment, POST_DELETED, user_likes_table
+from services.purge import post_purger
+
+
+@pytest.fixture
+def purger(monkeypatch):
+    # 每批2行，评论和点赞记录都需要多个批次
+    monkeypatch.setattr(post_purger, 'batch_size', 2)
+    monkeypatch.setattr(post_purger, 'pause', 0)
+    return post_purger
+
+
+@pytest.fixture
+def make_post(app):
+    """创建带3条评论、2条回复和4条点赞记录的帖子，测试结束后删除剩余数据"""
+    from app import db
+    post_ids = []
+
+    def make(status):
+        with app.app_context():
+            post = CommunityPost(title='待清理', content='内容', author_id=2, category='讨论', status=status)
+            db.session.add(post)
+            db.session.flush()
+            for i in range(3):
+                comment = Comment(content=f'评论{i}', author_id=i + 1, post_id=post.id)
+                db.session.add(comment)
+                db.session.flush()
+                if i < 2:
+                    db.session.add(Comment(content=f'回复{i}', author_id=i + 2, post_id=post.id,
+                                           parent_id=comment.id))
+            db.session.execute(user_likes_table.insert(),
+                               [{'user_id': user_id, 'post_id': post.id} for user_id in range(1, 5)])
+            db.session.commit()
+            post_ids.append(post.id)
+            return post.id
+
+    yield make
+
+    with app.app_context():
+        comments = Comment.query.filter(Comment.post_id.in_(post_ids))
+        comments.update({'parent_id': None}, synchronize_session=False)
+        comments.delete(synchronize_session=False)
+        db.session.execute(user_likes_table.delete().where(user_likes_table.c.post_id.in_(post_ids)))
+        CommunityPost.query.filter(CommunityPost.id.in_(post_ids)).delete(synchronize_session=False)
+        db.session.commit()
+
+
+def _remaining(app, post_id):
+    """返回 (帖子是否存在, 评论数, 点赞记录数)"""
+    from app import db
+    with app.app_context():
+        def count(table, column):
+            return db.session.scalar(select(func.count()).select_from(table).where(column == post_id))
+        return (db.session.get(CommunityPost, post_id) is not None,
+                count(Comment.__table__, Comment.post_id),
+                count(user_likes_table, user_likes_table.c.post_id))
+
+
+def test_purge_removes_comments_likes_and_post(app, purger, make_post):
+    post_id = make_post(POST_DELETED)
+    assert _remaining(app, post_id) == (True, 5, 4)
+
+    assert purger.purge() == 1
+    assert _remaining(app, post_id) == (False, 0, 0)
+
+    with app.app_context():
+        status = purger.status(app.db.session)
+    assert status['state'] == 'idle'
+    assert (status['purged_posts'], status['deleted_comments'], status['deleted_likes']) == (1, 5, 4)
+
+
+def test_purge_keeps_posts_that_are_not_deleted(app, purger, make_post):
+    kept = make_post('hidden')
+    purged = make_post(POST_DELETED)
+
+    assert purger.purge() == 1
+    assert _remaining(app, purged) == (False, 0, 0)
+    assert _remaining(app, kept) == (True, 5, 4)
@@ -0,0 +1,41 @@
+"""
+接口的SQL条数预算：作者信息、评论树等改为逐条查询（N+1）或多出查询时测试失败
+
+    cd backend && python -m pytest tests
+"""
+from services.sql_instrumentation import assert_max_queries
+
+
+def test_get_posts_queries(client):
+    # 总数（缓存未命中时）、帖子列表、批量加载作者
+    with assert_max_queries(3):
+        response = client.get('/api/community/posts')
+    assert response.status_code == 200
+    assert len(response.get_json()['data']) == 6
+
+
+def test_get_post_queries(client):
+    # 帖子、评论树（一条查询）、批量加载评论作者和帖子作者
+    with assert_max_queries(4):
+        response = client.get('/api/community/posts/1')
+    assert response.status_code == 200
+    assert len(response.get_json()['data']['comments']) == 5
+
+
+def test_get_comments_queries(client):
+    # 帖子、一页评论、批量加载作者
+    with assert_max_queries(3):
+        response = client.get('/api/community/posts/1/comments')
+    assert response.status_code == 200
+    assert len(response.get_json()['data']) == 5
+
+
+def test_sql_headers_follow_debug_mode(app, client):
+    # app.run(debug=True) 在创建应用之后才开启 debug，响应头需按当前的 debug 状态输出
+    assert 'X-SQL-Count' not in client.get('/api/community/posts').headers
+    app.debug = True
+    try:
+        response = client.get('/api/community/posts')
+    finally:
+        app.debug = False
+    assert int(response.headers['X-SQL-Count']) >= 1
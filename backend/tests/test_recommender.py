@@ -0,0 +1,92 @@
+"""
+相似内容索引的增量更新：写请求只入队，后台处理时不在文件锁内计算相似度
+
+    cd backend && python -m pytest tests/test_recommender.py
+"""
+import os
+from types import SimpleNamespace
+import pytest
+from models.community_post import CommunityPost
+from services.recommender import POST_FIELDS, SimilarityIndex
+
+# 与种子帖子（标题“湖湘文化N”）不重叠的内容，彼此之间高度相似
+TEA_POSTS = [
+    SimpleNamespace(id=1001, title='安化黑茶', content='安化黑茶的制作工艺与茶马古道'),
+    SimpleNamespace(id=1002, title='安化黑茶工艺', content='安化黑茶的制作工艺'),
+]
+
+
+@pytest.fixture
+def index(app, tmp_path):
+    from app import db
+    index = SimilarityIndex('posts', CommunityPost, POST_FIELDS)
+    index.configure(app, str(tmp_path / 'posts'))
+    with app.app_context():
+        index.rebuild(db.session)
+    return index
+
+
+def test_upsert_is_applied_by_flush(index):
+    first, second = TEA_POSTS
+    index.upsert(first)
+    index.upsert(second)
+    index.flush()
+
+    assert index.related(second.id)[0] == first.id
+    assert index.related(first.id)[0] == second.id
+
+
+def test_queued_remove_wins_over_earlier_upsert(index):
+    first, second = TEA_POSTS
+    index.upsert(first)
+    index.flush()
+    index.upsert(second)
+    index.remove(second.id)
+    index.flush()
+
+    assert index.related(second.id) is None
+    assert second.id not in index.related(first.id)
+
+
+def test_similarities_are_computed_outside_file_lock(index, monkeypatch):
+    fcntl = pytest.importorskip('fcntl')
+    lock_states = []
+
+    def lock_is_free():
+        # flock 按打开的文件区分，另开一个文件描述符以非阻塞方式加锁即可判断锁是否被持有
+        with open(os.path.join(index.path, '.lock'), 'a') as handle:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            fcntl.flock(handle, fcntl.LOCK_UN)
+            return True
+
+    def similarities(vectors, vector):
+        lock_states.append((len(vectors), lock_is_free()))
+        return SimilarityIndex._similarities(vectors, vector)
+
+    monkeypatch.setattr(index, '_similarities', similarities)
+    index.upsert(TEA_POSTS[0])
+    index.flush()
+
+    # 与全部内容（种子帖子加新帖子）的相似度只计算一次，且计算时文件锁空闲
+    assert lock_states == [(index._meta['count'], True)]
+    assert index.related(TEA_POSTS[0].id) is not None
+
+
+def test_rows_appended_during_computation_are_included(index, monkeypatch):
+    first, second = TEA_POSTS
+
+    def similarities(vectors, vector):
+        # 计算期间另一条内容被追加到索引中
+        monkeypatch.undo()
+        index._index(second.id, index.document(second))
+        return SimilarityIndex._similarities(vectors, vector)
+
+    monkeypatch.setattr(index, '_similarities', similarities)
+    index.upsert(first)
+    index.flush()
+
+    assert index.related(first.id)[0] == second.id
+    assert index.related(second.id)[0] == first.id
@@ -0,0 +1,114 @@
+"""
+响应缓存：失效时递增版本号，其他工作进程的进程内缓存随之失效；共享存储不可用时接口照常返回
+
+    cd backend && python -m pytest tests/test_response_cache.py
+"""
+import sqlite3
+import pytest
+from flask import jsonify
+from services.cache import ResponseCache, SQLiteCache, TTLCache
+
+
+def _worker(path):
+    """一个使用进程内缓存、版本号放在共享 SQLite 文件中的工作进程"""
+    cache = ResponseCache()
+    cache.enabled = True
+    cache.backend = TTLCache()
+    cache.signal = SQLiteCache(path)
+    return cache
+
+
+class UnavailableStore:
+    """模拟断开的 Redis 或被锁住的 SQLite 文件"""
+
+    def get(self, key, default=None):
+        raise sqlite3.OperationalError('database is locked')
+
+    set = incr = get
+
+
+@pytest.fixture
+def signal_path(tmp_path):
+    return str(tmp_path / 'response_cache.sqlite')
+
+
+def _cached_view(cache, data):
+    calls = []
+
+    @cache.cached('posts')
+    def view():
+        calls.append(1)
+        return jsonify({'data': data['value']})
+    return view, calls
+
+
+def test_invalidate_bumps_generation(app, signal_path):
+    cache = _worker(signal_path)
+    with app.app_context():
+        assert cache.generation('posts') == 0
+        cache.invalidate('posts')
+        cache.invalidate('posts', 'resources')
+        assert cache.generation('posts') == 2
+        assert cache.generation('resources') == 1
+
+
+def test_invalidation_reaches_another_worker(app, signal_path):
+    data = {'value': 'old'}
+    first, second = _worker(signal_path), _worker(signal_path)
+    first_view, first_calls = _cached_view(first, data)
+    second_view, second_calls = _cached_view(second, data)
+
+    with app.test_request_context('/api/community/posts?page=1'):
+        assert first_view().headers['X-Cache'] == 'MISS'
+        assert first_view().headers['X-Cache'] == 'HIT'
+        assert second_view().headers['X-Cache'] == 'MISS'
+        assert second_view().get_json() == {'data': 'old'}
+
+        # 第一个进程写入数据并使缓存失效，第二个进程的进程内缓存不再命中
+        data['value'] = 'new'
+        first.invalidate('posts')
+        response = second_view()
+        assert response.headers['X-Cache'] == 'MISS'
+        assert response.get_json() == {'data': 'new'}
+        assert len(second_calls) == 2
+        assert first_view().get_json() == {'data': 'new'}
+        assert len(first_calls) == 2
+
+
+def test_unavailable_signal_store_falls_through_to_view(app, signal_path):
+    cache = _worker(signal_path)
+    cache.signal = UnavailableStore()
+    view, calls = _cached_view(cache, {'value': 'fresh'})
+
+    with app.test_request_context('/api/community/posts'):
+        assert cache.generation('posts') is None
+        for _ in range(2):
+            response = view()
+            assert response.status_code == 200
+            assert response.get_json() == {'data': 'fresh'}
+            assert 'X-Cache' not in response.headers
+        # 版本号未知时不能使用缓存，每次都执行接口
+        assert len(calls) == 2
+        cache.invalidate('posts')  # 只记录错误，不抛出
+
+
+def test_unavailable_backend_falls_through_to_view(app, signal_path):
+    cache = _worker(signal_path)
+    cache.backend = UnavailableStore()
+    view, calls = _cached_view(cache, {'value': 'fresh'})
+
+    with app.test_request_context('/api/community/posts'):
+        assert view().get_json() == {'data': 'fresh'}
+        assert view().status_code == 200
+        assert len(calls) == 2
+
+
+def test_cached_endpoints_survive_store_outage(app, client):
+    from services.cache import response_cache
+    saved = response_cache.enabled, response_cache.backend, response_cache.signal
+    response_cache.enabled, response_cache.backend, response_cache.signal = True, TTLCache(), UnavailableStore()
+    try:
+        for url in ('/api/community/posts', '/api/resources/', '/api/resources/facets'):
+            assert client.get(url).status_code == 200, url
+    finally:
+        response_cache.enabled, response_cache.backend, response_cache.signal = saved
@@ -0,0 +1,140 @@
+"""
+全文索引：BM25 排序、分类过滤、有界堆取前 N 条，以及一个进程写入的日志被另一个进程回放
+
+    cd backend && python -m pytest tests/test_search.py
+"""
+import pytest
+from models.cultural_resource import CulturalResource
+from services.search import SearchIndex
+
+
+def _resource(id, title, category='历史', description=None, content=None, tags=None, status='published'):
+    return CulturalResource(id=id, title=title, description=description, content=content, tags=tags,
+                            type='遗迹', category=category, status=status)
+
+
+@pytest.fixture
+def index(app, tmp_path):
+    """使用独立索引文件的索引，模拟一个工作进程"""
+    index = SearchIndex()
+    index.path = str(tmp_path / 'search_index.pkl')
+    with app.app_context():
+        yield index
+
+
+def _other_process(index):
+    # 同一份索引文件上的另一个实例，相当于另一个 Gunicorn 工作进程
+    other = SearchIndex()
+    other.path = index.path
+    other.compact_threshold = index.compact_threshold
+    return other
+
+
+def _ids(results):
+    return [doc_id for doc_id, _ in results]
+
+
+def test_title_match_outranks_content_match(index):
+    index.add_resource(_resource(10001, '岳麓书院', content='千年学府'))
+    index.add_resource(_resource(10002, '湘江风光', content='岳麓书院位于岳麓山下'))
+    index.add_resource(_resource(10003, '橘子洲', content='橘子洲头'))
+
+    results = index.search('岳麓书院')
+    assert _ids(results) == [10001, 10002]
+    assert results[0][1] > results[1][1] > 0
+
+
+def test_all_terms_preferred_over_partial_matches(index):
+    index.add_resource(_resource(10011, '湘绣技艺'))
+    index.add_resource(_resource(10012, '湘剧'))
+
+    # 包含全部查询词元的资源存在时，只返回这些资源
+    assert _ids(index.search('湘绣')) == [10011]
+    # 没有资源同时包含全部词元时退化为任意匹配
+    assert set(_ids(index.search('湘绣花鼓'))) == {10011}
+
+
+def test_category_filter(index):
+    index.add_resource(_resource(10021, '花鼓戏', category='传统艺术'))
+    index.add_resource(_resource(10022, '花鼓戏舞台', category='历史'))
+
+    assert _ids(index.search('花鼓戏', category='传统艺术')) == [10021]
+    assert index.match('花鼓戏', category='历史') == {10022}
+    assert index.search('花鼓戏', category='民间文学') == []
+
+
+def test_limit_keeps_top_results_in_order(index):
+    for i in range(20):
+        # 标题重复次数不同，得分各不相同
+        index.add_resource(_resource(10100 + i, '铜官窑' * (i % 5 + 1), content='长沙' * i))
+
+    full = index.search('铜官窑')
+    assert len(full) == 20
+    assert index.search('铜官窑', limit=7) == full[:7]
+    assert index.search('铜官窑', limit=0) == []
+    assert index.search('铜官窑', limit=5, within={10101, 10102}) == [r for r in full if r[0] in (10101, 10102)]
+
+
+def test_journal_written_by_one_process_is_replayed_by_another(index):
+    index.add_resource(_resource(10201, '马王堆'))
+    reader = _other_process(index)
+    assert _ids(reader.search('马王堆')) == [10201]
+
+    # 写入进程追加日志后，读取进程在下次检索前回放新增的部分
+    index.add_resource(_resource(10202, '马王堆汉墓'))
+    assert set(_ids(reader.search('马王堆'))) == {10201, 10202}
+
+    # 资源改为草稿后从另一个进程的检索结果中移除
+    index.add_resource(_resource(10201, '马王堆', status='draft'))
+    assert _ids(reader.search('马王堆')) == [10202]
+
+
+def test_compacted_snapshot_is_reloaded_by_another_process(index):
+    index.compact_threshold = 3
+    reader = _other_process(index)
+    assert reader.search('天心阁') == []
+
+    for i in range(5):
+        index.add_resource(_resource(10301 + i, f'天心阁{i}'))
+    # 日志已合并进新快照并清空，读取进程需重新加载快照
+    assert index._journal_entries() < 3
+    assert sorted(_ids(reader.search('天心阁'))) == [10301 + i for i in range(5)]
+
+
+@pytest.fixture
+def searchable_resources(app):
+    """数据库中的已发布资源，全局索引从数据库重建"""
+    from app import db
+    from services.search import search_index
+    with app.app_context():
+        resources = [CulturalResource(title='湘菜' * (i % 4 + 1), type='饮食', category='民俗' if i % 2 else '饮食',
+                                      priority=i, status='published') for i in range(9)]
+        db.session.add_all(resources)
+        db.session.commit()
+        ids = [r.id for r in resources]
+        search_index.rebuild()
+    yield ids
+    with app.app_context():
+        CulturalResource.query.filter(CulturalResource.id.in_(ids)).delete()
+        db.session.commit()
+        search_index.rebuild()
+
+
+def test_search_endpoint_cursor_walk_follows_ranking(client, searchable_resources):
+    full = client.get('/api/resources/?search=湘菜&limit=100').get_json()
+    assert full['pagination']['total'] == 9
+    expected = [item['id'] for item in full['data']]
+    assert sorted(expected) == sorted(searchable_resources)
+
+    walked, cursor = [], ''
+    while cursor is not None:
+        body = client.get(f'/api/resources/?search=湘菜&limit=4&cursor={cursor}').get_json()
+        assert body['pagination']['total'] == 9
+        walked.extend(item['id'] for item in body['data'])
+        cursor = body['pagination']['next_cursor']
+    assert walked == expected
+
+    page = client.get('/api/resources/?search=湘菜&category=民俗&page=2&limit=2').get_json()
+    assert page['pagination']['total'] == 4
+    assert all(item['category'] == '民俗' for item in page['data'])
+    assert len(page['data']) == 2
@@ -0,0 +1,21 @@
+"""
+Gunicorn 入口
+
+    gunicorn -w 4 -b 0.0.0.0:5000 wsgi:app           # 同步工作进程
+    gunicorn -c gunicorn_gevent.conf.py wsgi:app     # gevent 工作进程
+
+gevent 模式下 gunicorn_gevent.conf.py 会在导入应用之前完成 monkey patch，此时使用 GeventConfig。
+"""
+from app import create_app
+from config import Config, GeventConfig
+
+
+def _gevent_patched():
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('socket')
+
+
+app = create_app(GeventConfig if _gevent_patched() else Config)
@@ -69,4 +69,24 @@ export const request = async (endpoint, method = 'GET', data = null) => {
     
     throw error;
   }
-};
\ No newline at end of file
+};
+
+/**
+ * 批量请求多个 GET 接口，一次往返返回全部结果
+ * @param {Array<string>} endpoints - API端点列表（与 request 相同，不含 /api 前缀）
+ * @returns {Promise<Array>} 按顺序返回每个接口的 { status, body }
+ */
+export const batchRequest = async (endpoints) => {
+  const result = await request('/batch', 'POST', {
+    requests: endpoints.map(endpoint => ({ path: `${API_BASE_URL}${endpoint}` }))
+  });
+
+  // 与单个请求相同：任一子请求返回401时清除本地token并触发登出事件
+  if (result.responses.some(item => item.status === 401)) {
+    localStorage.removeItem('access_token');
+    localStorage.removeItem('user');
+    window.dispatchEvent(new Event('logout'));
+  }
+
+  return result.responses;
+};